@@ -1,12 +1,58 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans
+import atexit
+import logging
+import logging.handlers
 import os
+import queue
+import sys
+
+# Request-scoped stage timer behind the Server-Timing header, shared with the ML service
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common.request_timing import PROMETHEUS_AVAILABLE, StageTimer, init_server_timing
+
+# Without prometheus_client nothing is recorded and /metrics reports it missing
+if PROMETHEUS_AVAILABLE:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, generate_latest
+
+# Request threads only enqueue log records; a listener thread writes them out
+LOG_LEVEL = os.environ.get('DIET_LOG_LEVEL', 'INFO').upper()
+log_listener = logging.handlers.QueueListener(queue.Queue(10000), logging.StreamHandler())
+logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s %(levelname)s %(name)s: %(message)s',
+                    handlers=[logging.handlers.QueueHandler(log_listener.queue)])
+log_listener.start()
+atexit.register(log_listener.stop)
+logger = logging.getLogger('diet')
+
+# Per-stage latency histograms plus request counters, exposed on /metrics
+STAGES = StageTimer('diet_stage_seconds', 'Time spent in each recommendation stage')
+# Times a `with` block (or decorated function) into the histogram and the request's Server-Timing
+stage = STAGES.stage
+if PROMETHEUS_AVAILABLE:
+    REQUESTS = Counter('diet_requests', 'Requests by endpoint and status code', ['endpoint', 'status'])
+    IN_FLIGHT = Gauge('diet_requests_in_flight', 'Requests currently being handled')
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+# Per-stage durations as a Server-Timing header for requests sending X-Server-Timing: 1 or ?timing=1
+init_server_timing(app)
+
+if PROMETHEUS_AVAILABLE:
+    @app.before_request
+    def start_request_metrics():
+        IN_FLIGHT.inc()
+
+    @app.after_request
+    def count_request(response):
+        REQUESTS.labels(request.endpoint or 'unknown', response.status_code).inc()
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        IN_FLIGHT.dec()
 
 class VfcDietRecommendation:
     def __init__(self, age, height, weight, activity_level, body_type):
@@ -55,6 +101,7 @@ class DietRecommendationSystem:
         self.nepali_lunch = self._load_data("Data_sets/nepali_lunch.csv")
         self.nepali_dinner = self._load_data("Data_sets/nepali_dinner.csv")
 
+    @stage('load_data')
     def _load_data(self, filepath):
         """Load data with proper error handling and ensure required columns exist"""
         try:
@@ -81,7 +128,7 @@ class DietRecommendationSystem:
             return df
             
         except Exception as e:
-            print(f"Error loading {filepath}: {str(e)}")
+            logger.error("Error loading %s: %s", filepath, e)
             # Return empty dataframe with required columns
             return pd.DataFrame(columns=['Food_items', 'Calories', 'Fats', 'Proteins', 'Carbohydrates', 'Link'])
 
@@ -100,7 +147,8 @@ class DietRecommendationSystem:
         X = meal_items[features].values
         
         # Apply KMeans clustering
-        kmeans = KMeans(n_clusters=min(k, len(meal_items)), random_state=42).fit(X)
+        with stage('kmeans_fit'):
+            kmeans = KMeans(n_clusters=min(k, len(meal_items)), random_state=42).fit(X)
         
         # Add cluster labels to the dataframe
         meal_items = meal_items.copy()
@@ -194,6 +242,13 @@ def health():
         "version": "1.0.0"
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms and request counters in the Prometheus text format"""
+    if not PROMETHEUS_AVAILABLE:
+        return jsonify({"error": "prometheus_client is not installed"}), 501
+    return Response(generate_latest(), content_type=CONTENT_TYPE_LATEST)
+
 @app.route('/recommend', methods=['POST'])
 def recommend():
     try:
@@ -216,8 +271,10 @@ def recommend():
         diet_system = DietRecommendationSystem(user)
         recommendations = diet_system.recommend_diet_kmeans(data['goal'])
         
-        return jsonify(recommendations)
+        with stage('build_response'):
+            return jsonify(recommendations)
     except Exception as e:
+        logger.exception("Recommendation failed: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/recommend-post-yoga', methods=['POST'])
@@ -314,29 +371,31 @@ def recommend_post_yoga():
         elif pose_analysis['flexibility'] > 2:
             message += "\n\n🤸 Your flexibility work benefits from anti-inflammatory foods for joint health."
         
-        return jsonify({
-            "success": True,
-            "sessionSummary": {
-                "caloriesBurned": calories_burned,
-                "duration": duration,
-                "accuracy": accuracy,
-                "poseTypes": pose_analysis['types']
-            },
-            "recoveryNeeds": {
-                "calories": round(target_calories),
-                "protein": 15 if pose_analysis['strength'] > 2 else 12,
-                "carbs": 50 if calories_burned > 150 else 30,
-                "hydration": round(duration / 15)
-            },
-            "recommendations": {
-                "primary": recommendations.iloc[0].to_dict() if len(recommendations) > 0 else {},
-                "alternatives": recommendations.iloc[1:].to_dict('records') if len(recommendations) > 1 else [],
-                "allOptions": recommendations.to_dict('records')
-            },
-            "message": message
-        })
+        with stage('build_response'):
+            return jsonify({
+                "success": True,
+                "sessionSummary": {
+                    "caloriesBurned": calories_burned,
+                    "duration": duration,
+                    "accuracy": accuracy,
+                    "poseTypes": pose_analysis['types']
+                },
+                "recoveryNeeds": {
+                    "calories": round(target_calories),
+                    "protein": 15 if pose_analysis['strength'] > 2 else 12,
+                    "carbs": 50 if calories_burned > 150 else 30,
+                    "hydration": round(duration / 15)
+                },
+                "recommendations": {
+                    "primary": recommendations.iloc[0].to_dict() if len(recommendations) > 0 else {},
+                    "alternatives": recommendations.iloc[1:].to_dict('records') if len(recommendations) > 1 else [],
+                    "allOptions": recommendations.to_dict('records')
+                },
+                "message": message
+            })
         
     except Exception as e:
+        logger.exception("Recommendation failed: %s", e)
         return jsonify({"error": str(e)}), 500
 
 def analyze_poses(poses):
@@ -374,6 +433,6 @@ if __name__ == '__main__':
     # Create data directory if it doesn't exist
     if not os.path.exists('Data_sets'):
         os.makedirs('Data_sets')
-        print("Created Data_sets directory - please add your CSV files here")
+        logger.warning("Created Data_sets directory - please add your CSV files here")
     
     app.run(debug=True, port=5002)
\ No newline at end of file
@@ -4,14 +4,39 @@ MAIN YOGA AI POSE DETECTION API - STABLE MEDIAPIPE
 Integrated stable MediaPipe with compact pose cards and real landmark detection
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import cv2
 import numpy as np
 import base64
+import hmac
 import json
+import logging
+import multiprocessing
+import os
+import signal
 import threading
 import time
+import uuid
+from contextlib import contextmanager
+
+from detector_pool import DetectorPool, DetectorPoolTimeout, create_pose_detector
+from frame_preprocessing import MAX_INPUT_SIDE, POSE_INPUT_SIDES, decode_frame_for_pose
+from inference_workers import InferenceWorkerPool
+from landmark_filter import FilterSettings, LandmarkSmoother, parse_pose_settings
+from landmark_frame import LandmarkFrame
+from pose_analysis import AUTO_POSE_TYPE, POSE_RULES, analyze_frame, get_pose_name
+from pose_hold import PoseHoldTracker
+from profiling import SAMPLE, ProfilerBusy, ProfilerControl
+from response_encoding import VERBOSE, choose_encoding, encode_response, verbose_response
+from frame_dedup import FrameDeduplicator
+from service_logging import configure_logging, dropped_records, frame_trace, tracing
+from service_metrics import count_frame, frame_in_flight, observe, render_metrics, stage
+from common.request_timing import TIMING_ARG, init_server_timing, request_timer, timing_requested
+from session_store import BUSY, SUPERSEDED, SessionClosed, SessionStore
+
+# Leveled, queue-backed logging; per-frame steps are DEBUG (see ML_LOG_* in the README)
+configure_logging()
+logger = logging.getLogger('app')
 
 # Try to import MediaPipe with error handling
 try:
@@ -21,43 +46,141 @@ try:
     from mediapipe.tasks.python import vision
     MEDIAPIPE_AVAILABLE = True
     USE_NEW_API = True
-    print("✅ MediaPipe 0.10.x (Tasks API) loaded successfully")
+    logger.info("✅ MediaPipe 0.10.x (Tasks API) loaded successfully")
 except Exception as e:
-    print(f"❌ MediaPipe not available: {e}")
+    logger.error("❌ MediaPipe not available: %s", e)
     MEDIAPIPE_AVAILABLE = False
     USE_NEW_API = False
 
+# WebSocket streaming is optional - the HTTP endpoints work without it
+try:
+    from flask_sock import Sock
+    SOCK_AVAILABLE = True
+except ImportError:
+    logger.warning("⚠️ flask-sock not installed - /api/ml/stream WebSocket disabled")
+    SOCK_AVAILABLE = False
+
 app = Flask(__name__)
 CORS(app, origins="*")  # Allow all origins
+sock = Sock(app) if SOCK_AVAILABLE else None
+# Per-stage durations as a Server-Timing header for requests sending X-Server-Timing: 1 or ?timing=1
+init_server_timing(app)
+
+@app.before_request
+def start_request_profile():
+    """cProfile this request while a cprofile run is armed (a single attribute check otherwise)"""
+    if request.endpoint != 'profile_admin':
+        g.profile = profiler_control.begin_request()
 
-# Global MediaPipe instance (avoid recreation)
-pose_detector = None
+@app.teardown_request
+def finish_request_profile(exc):
+    profiler_control.end_request(g.pop('profile', None))
+
+# Pool of MediaPipe detectors (avoid recreation, allow parallel detection)
+detector_pool = None
 detector_lock = threading.Lock()
 
+# Optional process-pool mode: worker processes own the detectors instead
+inference_workers = None
+
+# Pool sizing - one detector per core by default
+DETECTOR_POOL_SIZE = int(os.environ.get('ML_DETECTOR_POOL_SIZE', os.cpu_count() or 1))
+DETECTOR_CHECKOUT_TIMEOUT = float(os.environ.get('ML_DETECTOR_TIMEOUT', '2.0'))
+
+# 'thread' (detector pool in this process) or 'process' (shared-memory worker processes)
+EXECUTION_MODE = os.environ.get('ML_EXECUTION_MODE', 'thread').lower()
+WORKER_MAX_FRAME_PIXELS = int(os.environ.get('ML_WORKER_MAX_FRAME_PIXELS', 1920 * 1080))
+
+# Frames carrying a session id keep per-session state; in thread mode that includes
+# a VIDEO-mode detector (tracking between frames)
+session_store = None
+SESSION_TRACKING = os.environ.get('ML_SESSION_TRACKING', '1') != '0'
+SESSION_IDLE_TIMEOUT = float(os.environ.get('ML_SESSION_IDLE_TIMEOUT', '60'))
+# Estimated memory cap for all session state (a loaded tracking detector is charged ML_SESSION_DETECTOR_MB)
+SESSION_MEMORY_MB = float(os.environ.get('ML_SESSION_MEMORY_MB', '2048'))
+SESSION_DETECTOR_MB = float(os.environ.get('ML_SESSION_DETECTOR_MB', '40'))
+# Live sessions kept; by default as many as have tracking detectors fitting the memory cap
+MAX_TRACKED_SESSIONS = int(os.environ.get(
+    'ML_MAX_TRACKED_SESSIONS',
+    int(SESSION_MEMORY_MB // SESSION_DETECTOR_MB) if SESSION_MEMORY_MB > 0 and SESSION_DETECTOR_MB > 0 else 64))
+
+# Server-side pose completion: accuracy >= threshold held for the duration, timed by frame arrival
+HOLD_THRESHOLD = float(os.environ.get('ML_HOLD_THRESHOLD', '90'))
+HOLD_SECONDS = float(os.environ.get('ML_HOLD_SECONDS', '2.0'))
+HOLD_MAX_GAP_S = float(os.environ.get('ML_HOLD_MAX_GAP_S', '1.0'))
+hold_tracker = PoseHoldTracker(HOLD_THRESHOLD, HOLD_SECONDS, HOLD_MAX_GAP_S)
+
+# Near-identical session frames reuse the last result (mean grayscale diff, 0-1; 0 disables)
+DEDUP_THRESHOLD = float(os.environ.get('ML_DEDUP_THRESHOLD', '0.01'))
+DEDUP_MAX_REUSE = int(os.environ.get('ML_DEDUP_MAX_REUSE', '10'))
+frame_deduplicator = FrameDeduplicator(DEDUP_THRESHOLD, DEDUP_MAX_REUSE)
+
+# One Euro smoothing of session landmarks; per-pose "pose:min_cutoff[:beta]" or "pose:off" overrides
+SMOOTHING_ENABLED = os.environ.get('ML_SMOOTHING', '1') != '0'
+SMOOTHING_SETTINGS = FilterSettings(float(os.environ.get('ML_SMOOTHING_MIN_CUTOFF', '1.0')),
+                                    float(os.environ.get('ML_SMOOTHING_BETA', '10.0')),
+                                    float(os.environ.get('ML_SMOOTHING_D_CUTOFF', '1.0')))
+SMOOTHING_POSES = parse_pose_settings(os.environ.get('ML_SMOOTHING_POSES', ''), SMOOTHING_SETTINGS)
+SMOOTHING_RESET_S = float(os.environ.get('ML_SMOOTHING_RESET_S', '1.0'))
+landmark_smoother = LandmarkSmoother(SMOOTHING_SETTINGS, SMOOTHING_POSES, SMOOTHING_RESET_S, SMOOTHING_ENABLED)
+
+# On-demand profiling (see profiling.py); the admin endpoint stays disabled without a token
+ADMIN_TOKEN = os.environ.get('ML_ADMIN_TOKEN', '')
+PROFILE_DIR = os.environ.get('ML_PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+PROFILE_MAX_SECONDS = float(os.environ.get('ML_PROFILE_MAX_SECONDS', '300'))
+PROFILE_SIGNAL_SECONDS = float(os.environ.get('ML_PROFILE_SIGNAL_SECONDS', '30'))
+profiler_control = ProfilerControl(PROFILE_DIR, PROFILE_MAX_SECONDS)
+
+# Known poses get their own metric labels; anything else a client sends is counted as "other"
+METRIC_POSE_LABELS = frozenset(POSE_RULES) | {AUTO_POSE_TYPE}
+
+# Floor for the next-frame interval suggested to clients (the web client sends every 50 ms)
+MIN_FRAME_INTERVAL_MS = int(os.environ.get('ML_MIN_FRAME_INTERVAL_MS', '50'))
+
 def init_mediapipe():
-    """Initialize MediaPipe pose detector once"""
-    global pose_detector
-    if MEDIAPIPE_AVAILABLE and pose_detector is None:
+    """Initialize the MediaPipe pose detector pool (or inference workers) once"""
+    global detector_pool, inference_workers
+    if EXECUTION_MODE == 'process':
+        # Spawned workers re-import this module - only the parent starts workers
+        if MEDIAPIPE_AVAILABLE and inference_workers is None and multiprocessing.parent_process() is None:
+            with detector_lock:
+                if inference_workers is None:
+                    try:
+                        inference_workers = InferenceWorkerPool(DETECTOR_POOL_SIZE,
+                                                                max_frame_pixels=WORKER_MAX_FRAME_PIXELS,
+                                                                timeout=DETECTOR_CHECKOUT_TIMEOUT)
+                        logger.info("✅ Started %d MediaPipe inference worker processes", inference_workers.workers)
+                    except Exception as e:
+                        logger.error("❌ Failed to start inference workers: %s", e)
+                        inference_workers = None
+        return
+
+    if MEDIAPIPE_AVAILABLE and detector_pool is None:
         with detector_lock:
-            if pose_detector is None:
+            if detector_pool is None:
                 try:
-                    # Create pose landmarker for MediaPipe 0.10.x
-                    base_options = mp_tasks.BaseOptions(model_asset_path='pose_landmarker.task')
-                    options = vision.PoseLandmarkerOptions(
-                        base_options=base_options,
-                        output_segmentation_masks=False)
-                    pose_detector = vision.PoseLandmarker.create_from_options(options)
-                    print("✅ MediaPipe 0.10.x pose detector initialized")
+                    detector_pool = DetectorPool(create_pose_detector, DETECTOR_POOL_SIZE, DETECTOR_CHECKOUT_TIMEOUT)
+                    logger.info("✅ MediaPipe 0.10.x detector pool initialized (%d detectors)", detector_pool.size)
                 except Exception as e:
-                    print(f"❌ Failed to initialize MediaPipe: {e}")
-                    pose_detector = None
+                    logger.error("❌ Failed to initialize MediaPipe: %s", e)
+                    detector_pool = None
+
+def detector_ready():
+    """True when either execution mode has detectors available"""
+    return detector_pool is not None or inference_workers is not None
 
 # Initialize on startup
 init_mediapipe()
 
-print("=" * 60)
-print("🧘 YOGA AI POSE DETECTION ML API - STABLE MEDIAPIPE")
-print("=" * 60)
+# Tracking needs in-process detectors, so only thread mode with a working pool gets it
+session_store = SessionStore(
+    (lambda: create_pose_detector(running_mode='VIDEO')) if SESSION_TRACKING and detector_pool is not None else None,
+    idle_timeout=SESSION_IDLE_TIMEOUT,
+    max_sessions=MAX_TRACKED_SESSIONS,
+    memory_limit=SESSION_MEMORY_MB * 2**20,
+    detector_bytes=SESSION_DETECTOR_MB * 2**20)
+
+logger.info("🧘 YOGA AI POSE DETECTION ML API - STABLE MEDIAPIPE")
 
 @app.route('/')
 def home():
@@ -66,11 +189,14 @@ def home():
         "version": "4.0.0",
         "status": "running",
         "mediapipe_available": MEDIAPIPE_AVAILABLE,
-        "detector_ready": pose_detector is not None,
+        "detector_ready": detector_ready(),
         "endpoints": [
             "/health - Service health check",
+            "/api/ml/stats - Detector pool utilization and wait times",
+            "/metrics - Prometheus stage latencies and frame counters",
             "/api/ml/available-poses - Get available poses",
             "/api/ml/detect-pose - Real-time pose detection",
+            "/api/ml/stream - WebSocket live pose coaching session",
             "/api/ml/pose/yog1 - Warrior II Pose",
             "/api/ml/pose/yog2 - T Pose", 
             "/api/ml/pose/yog3 - Tree Pose",
@@ -86,19 +212,72 @@ def health():
         "status": "healthy",
         "service": "Yoga AI Pose Detection API - Stable MediaPipe",
         "mediapipe_available": MEDIAPIPE_AVAILABLE,
-        "detector_ready": pose_detector is not None,
+        "detector_ready": detector_ready(),
+        "streaming_available": SOCK_AVAILABLE,
         "real_landmarks": True
     })
 
+@app.route('/api/ml/stats', methods=['GET'])
+def service_stats():
+    """Runtime statistics for capacity planning"""
+    return jsonify({
+        "success": True,
+        "execution_mode": EXECUTION_MODE,
+        "detector_pool": detector_pool.stats() if detector_pool is not None else None,
+        "inference_workers": inference_workers.stats() if inference_workers is not None else None,
+        "sessions": session_store.stats(),
+        "frame_dedup": frame_deduplicator.stats(),
+        "landmark_smoothing": landmark_smoother.stats(),
+        "pose_hold": hold_tracker.stats(),
+        "max_input_side": MAX_INPUT_SIDE,
+        "pose_input_sides": POSE_INPUT_SIDES,
+        "log_records_dropped": dropped_records()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms and frame counters in the Prometheus text format"""
+    body, content_type = render_metrics()
+    if body is None:
+        return jsonify({"success": False, "error": "prometheus_client is not installed"}), 501
+    return Response(body, content_type=content_type)
+
+def admin_authorized():
+    """True when the request carries the configured admin token"""
+    supplied = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode())
+
+@app.route('/api/ml/admin/profile', methods=['GET', 'POST'])
+def profile_admin():
+    """Start an on-demand profiling run (POST) or report the current one (GET); needs X-Admin-Token"""
+    if not ADMIN_TOKEN:
+        return jsonify({"success": False, "error": "Admin endpoints are disabled (ML_ADMIN_TOKEN is not set)"}), 404
+    if not admin_authorized():
+        logger.warning("🚫 Rejected profiling request from %s", request.remote_addr)
+        return jsonify({"success": False, "error": "Invalid admin token"}), 403
+    if request.method == 'GET':
+        return jsonify({"success": True, **profiler_control.status()})
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        output = profiler_control.start(mode=data.get('mode', SAMPLE),
+                                        seconds=data.get('seconds', 30),
+                                        requests=data.get('requests', 100),
+                                        interval=float(data.get('interval_ms', 5)) / 1000)
+    except ProfilerBusy as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "output": output, **profiler_control.status()})
+
 @app.route('/api/ml/test-detection', methods=['POST'])
 def test_detection():
     """Test endpoint to verify detection is working"""
     try:
-        print("🧪 TEST DETECTION REQUEST RECEIVED")
         data = request.get_json()
         pose_type = data.get('pose_type', 'yog3')
         
-        print(f"🎯 Test request for pose: {pose_type}")
+        logger.info("🧪 Test detection request for pose: %s", pose_type)
         
         # Return a test response
         return jsonify({
@@ -111,7 +290,7 @@ def test_detection():
         })
         
     except Exception as e:
-        print(f"❌ Test detection error: {e}")
+        logger.error("❌ Test detection error: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/ml/available-poses', methods=['GET'])
@@ -189,1183 +368,539 @@ def start_downward_dog():
 def start_plank_pose():
     return jsonify({"success": True, "message": "Plank Pose started", "pose_type": "yog6", "pose_name": "Plank Pose"})
 
+# Content types accepted as a raw frame body (no JSON/base64 wrapping)
+RAW_FRAME_CONTENT_TYPES = ('image/jpeg', 'image/jpg', 'image/webp', 'image/png', 'application/octet-stream')
+
+def read_request_field(name, header, form=None, default=None):
+    """Read a request parameter from a header, the query string or a form field"""
+    value = request.headers.get(header) or request.args.get(name)
+    if value is None and form is not None:
+        value = form.get(name)
+    return value if value else default
+
+def read_stream_into_buffer(stream, length):
+    """Read exactly `length` bytes from the request stream into a NumPy buffer"""
+    buffer = np.empty(length, dtype=np.uint8)
+    view = memoryview(buffer)
+    received = 0
+    while received < length:
+        chunk = stream.readinto(view[received:])
+        if not chunk:
+            break
+        received += chunk
+    return buffer[:received]
+
+def read_frame_request():
+    """Extract (encoded frame buffer, pose_type, session_id) from the current request.
+
+    Supports three upload modes:
+      - JSON body with a base64 data-URL in `image` (legacy)
+      - raw image/jpeg or image/webp body, parameters in headers or query
+      - multipart/form-data with the frame in an `image` file field
+    Raises ValueError with a client-facing message on a bad request.
+    """
+    content_type = (request.mimetype or '').lower()
+
+    if content_type in RAW_FRAME_CONTENT_TYPES:
+        length = request.content_length
+        with stage('read_body'):
+            if length:
+                nparr = read_stream_into_buffer(request.stream, length)
+            else:
+                nparr = np.frombuffer(request.get_data(), np.uint8)
+        if nparr.size == 0:
+            raise ValueError("No image data")
+        pose_type = read_request_field('pose_type', 'X-Pose-Type', default='yog2')
+        session_id = read_request_field('session_id', 'X-Session-Id')
+        return nparr, pose_type, session_id
+
+    if content_type == 'multipart/form-data':
+        with stage('read_body'):
+            upload = request.files.get('image')
+            if upload is None:
+                raise ValueError("No image data")
+            nparr = np.frombuffer(upload.read(), np.uint8)
+        if nparr.size == 0:
+            raise ValueError("No image data")
+        pose_type = read_request_field('pose_type', 'X-Pose-Type', request.form, default='yog2')
+        session_id = read_request_field('session_id', 'X-Session-Id', request.form)
+        return nparr, pose_type, session_id
+
+    with stage('parse_json'):
+        data = request.get_json(silent=True)
+    if not data or 'image' not in data:
+        raise ValueError("No image data")
+
+    # Decode base64 data-URL
+    image_data = data['image']
+    if image_data.startswith('data:image'):
+        image_data = image_data.split(',')[1]
+
+    with stage('base64_decode'):
+        image_bytes = base64.b64decode(image_data)
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    pose_type = data.get('pose_type', 'yog2')
+    session_id = data.get('session_id') or read_request_field('session_id', 'X-Session-Id')
+    return nparr, pose_type, session_id
+
 @app.route('/api/ml/detect-pose', methods=['POST'])
+@frame_in_flight()
 def detect_pose():
     """MAIN pose detection with guaranteed REAL landmarks"""
+    encoding = request_encoding()
     try:
-        print("📸 Received pose detection request")
-        
-        data = request.get_json()
-        if not data or 'image' not in data:
-            print("❌ No image data in request")
-            return jsonify({"success": False, "error": "No image data"}), 400
-        
-        # Get pose type from request
-        pose_type = data.get('pose_type', 'yog2')
-        print(f"🎯 Requested pose type: {pose_type} ({get_pose_name(pose_type)})")
-        
-        # Decode image
-        image_data = data['image']
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
-        
-        image_bytes = base64.b64decode(image_data)
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if image is None:
-            print("❌ Invalid image data")
-            return jsonify({"success": False, "error": "Invalid image"}), 400
-        
-        print(f"🖼️ Image decoded: {image.shape}")
-        
-        landmarks = []
-        
-        # Try MediaPipe detection
-        if MEDIAPIPE_AVAILABLE and pose_detector is not None:
-            try:
-                with detector_lock:
-                    # Convert image to MediaPipe format
-                    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-                    
-                    # Detect pose
-                    detection_result = pose_detector.detect(mp_image)
-                    
-                    if detection_result.pose_landmarks:
-                        pose_landmarks = detection_result.pose_landmarks[0]  # First person
-                        
-                        for i, landmark in enumerate(pose_landmarks):
-                            landmarks.append({
-                                'x': landmark.x,
-                                'y': landmark.y,
-                                'z': landmark.z,
-                                'visibility': 0.8,  # New API doesn't have visibility
-                                'index': i
-                            })
-                        
-                        print(f"✅ REAL MediaPipe 0.10.x detected {len(landmarks)} landmarks")
-                        print(f"🔍 Sample: nose=({landmarks[0]['x']:.3f},{landmarks[0]['y']:.3f}), shoulder=({landmarks[11]['x']:.3f},{landmarks[11]['y']:.3f})")
-                    else:
-                        print("⚠️ MediaPipe 0.10.x: No pose detected in image")
-                        
-            except Exception as e:
-                print(f"❌ MediaPipe detection failed: {e}")
-                landmarks = []
-        
-        # If no landmarks detected, return appropriate response
-        if not landmarks:
-            print("❌ No landmarks detected - returning no pose detected")
-            return jsonify({
-                "success": True,
-                "pose_detected": False,
-                "landmarks": [],
-                "accuracy_score": 0,
-                "feedback": ["Please ensure your full body is visible in good lighting"],
-                "corrections": [],
-                "pose_name": "No Pose Detected"
-            })
-        
-        # REAL pose analysis
-        print(f"🎯 Analyzing pose: {pose_type} ({get_pose_name(pose_type)}) with {len(landmarks)} landmarks")
-        
-        # Add request timestamp for debugging
-        import time
-        request_time = time.strftime("%H:%M:%S")
-        print(f"⏰ Detection request at {request_time}")
-        
-        accuracy_score, feedback, corrections = analyze_pose_accuracy(landmarks, pose_type)
-        
-        print(f"📊 Analysis complete: Score={accuracy_score:.1f}%, Feedback={len(feedback)} items, Corrections={len(corrections)} items")
-        
-        # Log the actual feedback for debugging
-        if feedback:
-            print(f"💬 Feedback: {feedback}")
-        if corrections:
-            print(f"🔧 Corrections: {[c.get('message', 'Unknown') for c in corrections]}")
-        
-        response = {
-            "success": True,
-            "pose_detected": True,
-            "landmarks": landmarks,
-            "accuracy_score": round(accuracy_score, 1),
-            "feedback": feedback,
-            "corrections": corrections,
-            "pose_name": get_pose_name(pose_type),
-            "landmarks_count": len(landmarks),
-            "pose_type": pose_type,
-            "real_mediapipe": True,
-            "analysis_timestamp": request_time
-        }
+        try:
+            nparr, pose_type, session_id = read_frame_request()
+            g.pose_type = pose_type  # labels this request's metrics in pose_reply()
+        except ValueError as e:
+            logger.warning("❌ %s in request", e)
+            return pose_reply({"success": False, "error": str(e)}, encoding, 400)
+        
+        with frame_trace(session_id), frame_admission(session_id) as (session, admission):
+            logger.debug("📸 Pose detection request: %s (%s)", pose_type, get_pose_name(pose_type))
+
+            if admission == SUPERSEDED:
+                return pose_reply(superseded_response(session), encoding)
+            if admission == BUSY:
+                return pose_reply(busy_response(session), encoding, 503)
+            
+            # Decode straight to a model-sized RGB frame (reduced JPEG decode when oversized)
+            image = decode_frame_for_pose(nparr, pose_type)
+            
+            if image is None:
+                logger.warning("❌ Invalid image data")
+                return pose_reply({"success": False, "error": "Invalid image"}, encoding, 400)
+            
+            return pose_reply(process_pose_frame(image, pose_type, session), encoding)
         
-        print(f"📤 Response: {len(landmarks)} landmarks, {accuracy_score:.1f}% accuracy, pose={get_pose_name(pose_type)}")
-        return jsonify(response)
+    except DetectorPoolTimeout as e:
+        logger.warning("⏳ Detector pool saturated: %s", e)
+        return pose_reply(busy_response(), encoding, 503)
         
     except Exception as e:
-        print(f"❌ Detection error: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({
+        logger.exception("❌ Detection error: %s", e)
+        return pose_reply({
             "success": False,
             "error": str(e),
             "landmarks": []
-        }), 500
+        }, encoding, 500)
 
-def calculate_angle(a, b, c):
-    """Calculate angle between three points"""
-    a = np.array([a['x'], a['y']])
-    b = np.array([b['x'], b['y']])
-    c = np.array([c['x'], c['y']])
-    
-    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    
-    if angle > 180.0:
-        angle = 360 - angle
-        
-    return angle
-
-def get_pose_name(pose_type):
-    """Get pose name from pose type"""
-    pose_names = {
-        'yog1': 'Warrior II',
-        'yog2': 'T Pose',
-        'yog3': 'Tree Pose',
-        'yog4': 'Goddess Pose',
-        'yog5': 'Downward Dog',
-        'yog6': 'Plank Pose'
-    }
-    return pose_names.get(pose_type, 'Unknown Pose')
+def request_encoding():
+    """Response encoding negotiated from the Accept header and the compact flag"""
+    return choose_encoding(request.headers.get('Accept'), read_request_field('compact', 'X-Compact'))
 
-def analyze_pose_accuracy(landmarks, pose_type):
-    """Analyze pose accuracy with REAL feedback for all 6 poses"""
-    
-    print(f"🔍 Starting pose analysis for: {pose_type} ({get_pose_name(pose_type)})")
-    
-    try:
-        # Key landmark indices (MediaPipe Pose)
-        NOSE = 0
-        LEFT_SHOULDER = 11
-        RIGHT_SHOULDER = 12
-        LEFT_ELBOW = 13
-        RIGHT_ELBOW = 14
-        LEFT_WRIST = 15
-        RIGHT_WRIST = 16
-        LEFT_HIP = 23
-        RIGHT_HIP = 24
-        LEFT_KNEE = 25
-        RIGHT_KNEE = 26
-        LEFT_ANKLE = 27
-        RIGHT_ANKLE = 28
-        
-        # Calculate key angles
-        left_arm_angle = calculate_angle(landmarks[LEFT_SHOULDER], landmarks[LEFT_ELBOW], landmarks[LEFT_WRIST])
-        right_arm_angle = calculate_angle(landmarks[RIGHT_SHOULDER], landmarks[RIGHT_ELBOW], landmarks[RIGHT_WRIST])
-        left_shoulder_angle = calculate_angle(landmarks[LEFT_ELBOW], landmarks[LEFT_SHOULDER], landmarks[LEFT_HIP])
-        right_shoulder_angle = calculate_angle(landmarks[RIGHT_ELBOW], landmarks[RIGHT_SHOULDER], landmarks[RIGHT_HIP])
-        
-        print(f"🔍 Pose Analysis: L_arm={left_arm_angle:.1f}°, R_arm={right_arm_angle:.1f}°, L_shoulder={left_shoulder_angle:.1f}°, R_shoulder={right_shoulder_angle:.1f}°")
-        
-        # Route to specific pose analysis
-        if pose_type == 'yog1':  # Warrior II
-            return analyze_warrior2_pose(landmarks, left_arm_angle, right_arm_angle, left_shoulder_angle, right_shoulder_angle)
-        elif pose_type == 'yog2':  # T Pose
-            return analyze_t_pose_strict(left_arm_angle, right_arm_angle, left_shoulder_angle, right_shoulder_angle, landmarks)
-        elif pose_type == 'yog3':  # Tree Pose
-            return analyze_tree_pose(landmarks, left_arm_angle, right_arm_angle)
-        elif pose_type == 'yog4':  # Goddess Pose
-            return analyze_goddess_pose(landmarks, left_arm_angle, right_arm_angle)
-        elif pose_type == 'yog5':  # Downward Dog
-            return analyze_downward_dog_pose(landmarks, left_arm_angle, right_arm_angle)
-        elif pose_type == 'yog6':  # Plank Pose
-            return analyze_plank_pose(landmarks, left_arm_angle, right_arm_angle)
+def pose_reply(response, encoding, status=200):
+    """HTTP response in the negotiated encoding (the default JSON goes through jsonify as before)"""
+    count_response(g.get('pose_type'), response)
+    with stage('encode'):
+        if encoding == VERBOSE:
+            reply = jsonify(verbose_response(response))
         else:
-            return analyze_generic_pose(left_arm_angle, right_arm_angle, left_shoulder_angle, right_shoulder_angle)
-            
-    except Exception as e:
-        print(f"❌ Pose analysis error: {e}")
-        return 30, ["Unable to analyze pose properly"], []
+            body, mimetype = encode_response(response, encoding)
+            reply = Response(body, mimetype=mimetype)
+    reply.status_code = status
+    reply.vary.add('Accept')
+    return reply
 
-def analyze_t_pose_strict(left_arm_angle, right_arm_angle, left_shoulder_angle, right_shoulder_angle, landmarks):
-    """RESPONSIVE T-Pose analysis - gives gradual feedback and scores"""
-    
-    feedback = []
-    corrections = []
-    score_components = []
-    
-    print(f"🤸 Analyzing T-Pose - L_arm={left_arm_angle:.1f}°, R_arm={right_arm_angle:.1f}°, L_shoulder={left_shoulder_angle:.1f}°, R_shoulder={right_shoulder_angle:.1f}°")
-    
-    try:
-        # Check if this might be Tree Pose instead (hands together)
-        LEFT_WRIST = 15
-        RIGHT_WRIST = 16
-        LEFT_ANKLE = 27
-        RIGHT_ANKLE = 28
-        
-        hand_distance = abs(landmarks[LEFT_WRIST]['x'] - landmarks[RIGHT_WRIST]['x'])
-        foot_height_diff = abs(landmarks[LEFT_ANKLE]['y'] - landmarks[RIGHT_ANKLE]['y'])
-        
-        print(f"🔍 T-Pose check: hand_distance={hand_distance:.3f}, foot_height_diff={foot_height_diff:.3f}")
-        
-        # If hands are together and one foot is raised, this is likely Tree Pose, not T-Pose
-        if hand_distance < 0.15 and foot_height_diff > 0.1:
-            feedback = ["This looks like Tree Pose, not T-Pose - extend your arms out"]
-            corrections = [{'joint_index': 15, 'message': 'Extend arms for T-Pose', 'type': 'extend_arms'}]
-            print("❌ Detected Tree Pose characteristics - NOT T-Pose!")
-            return 25, feedback, corrections
-        
-        # GRADUAL scoring for T-Pose components
-        
-        # 1. Left arm straightness (more forgiving)
-        if left_arm_angle >= 170:
-            score_components.append(100)
-            print("✅ Left arm perfectly straight")
-        elif left_arm_angle >= 150:
-            score_components.append(85)
-            feedback.append("Straighten your left arm a bit more")
-        elif left_arm_angle >= 130:
-            score_components.append(70)
-            feedback.append("Straighten your left arm more")
-            corrections.append({'joint_index': 13, 'message': 'Extend left arm', 'type': 'extend_arm'})
-        else:
-            score_components.append(50)
-            feedback.append("Straighten your left arm completely")
-            corrections.append({'joint_index': 13, 'message': 'Extend left arm', 'type': 'extend_arm'})
-            
-        # 2. Right arm straightness (more forgiving)
-        if right_arm_angle >= 170:
-            score_components.append(100)
-            print("✅ Right arm perfectly straight")
-        elif right_arm_angle >= 150:
-            score_components.append(85)
-            feedback.append("Straighten your right arm a bit more")
-        elif right_arm_angle >= 130:
-            score_components.append(70)
-            feedback.append("Straighten your right arm more")
-            corrections.append({'joint_index': 14, 'message': 'Extend right arm', 'type': 'extend_arm'})
-        else:
-            score_components.append(50)
-            feedback.append("Straighten your right arm completely")
-            corrections.append({'joint_index': 14, 'message': 'Extend right arm', 'type': 'extend_arm'})
-        
-        # 3. Left arm horizontal position (more forgiving)
-        if 85 <= left_shoulder_angle <= 95:
-            score_components.append(100)
-            print("✅ Left arm perfectly horizontal")
-        elif 80 <= left_shoulder_angle <= 100:
-            score_components.append(90)
-            feedback.append("Left arm height is very good")
-        elif 70 <= left_shoulder_angle <= 110:
-            score_components.append(75)
-            feedback.append("Adjust left arm to shoulder height")
-            corrections.append({'joint_index': 11, 'message': 'Adjust left arm height', 'type': 'adjust_shoulder'})
-        else:
-            score_components.append(60)
-            feedback.append("Raise your left arm to shoulder height")
-            corrections.append({'joint_index': 11, 'message': 'Adjust left arm height', 'type': 'adjust_shoulder'})
-            
-        # 4. Right arm horizontal position (more forgiving)
-        if 85 <= right_shoulder_angle <= 95:
-            score_components.append(100)
-            print("✅ Right arm perfectly horizontal")
-        elif 80 <= right_shoulder_angle <= 100:
-            score_components.append(90)
-            feedback.append("Right arm height is very good")
-        elif 70 <= right_shoulder_angle <= 110:
-            score_components.append(75)
-            feedback.append("Adjust right arm to shoulder height")
-            corrections.append({'joint_index': 12, 'message': 'Adjust right arm height', 'type': 'adjust_shoulder'})
-        else:
-            score_components.append(60)
-            feedback.append("Raise your right arm to shoulder height")
-            corrections.append({'joint_index': 12, 'message': 'Adjust right arm height', 'type': 'adjust_shoulder'})
-        
-        # 5. Check that both feet are on ground (T-Pose requirement)
-        if foot_height_diff <= 0.05:
-            score_components.append(100)
-            print("✅ Both feet on ground")
-        elif foot_height_diff <= 0.1:
-            score_components.append(80)
-            feedback.append("Keep both feet firmly on the ground")
-        else:
-            score_components.append(60)
-            feedback.append("Keep both feet on the ground for T-Pose")
-            
-    except Exception as e:
-        print(f"❌ T-Pose analysis error: {e}")
-        score_components = [60]
-    
-    # Calculate overall score
-    overall_score = sum(score_components) / len(score_components) if score_components else 60
-    
-    # RESPONSIVE feedback based on score
-    if overall_score >= 95:
-        feedback = ["Perfect T Pose! Excellent form!"]
-    elif overall_score >= 85:
-        feedback.insert(0, "Excellent T Pose! Minor adjustments:")
-    elif overall_score >= 75:
-        feedback.insert(0, "Good T Pose! Keep improving:")
-    elif overall_score >= 60:
-        feedback.insert(0, "Getting closer to T Pose:")
+def count_response(pose_type, response):
+    """Count a finished frame under its requested pose and outcome"""
+    if response.get("superseded"):
+        outcome = 'superseded'
+    elif response.get("busy"):
+        outcome = 'busy'
+    elif not response.get("success"):
+        outcome = 'error'
+    elif response.get("reused"):
+        outcome = 'reused'
     else:
-        feedback.insert(0, "This is not a T Pose yet. Please:")
-        feedback.append("Stand straight with arms extended horizontally")
-    
-    print(f"🎯 T-Pose Analysis: Score={overall_score:.1f}%, Components={score_components}")
-    
-    return overall_score, feedback[:3], corrections[:2]
+        outcome = 'detected' if response.get("pose_detected") else 'no_pose'
+    count_frame(pose_type if pose_type in METRIC_POSE_LABELS else 'other', outcome)
 
-def analyze_warrior2_pose(landmarks, left_arm_angle, right_arm_angle, left_shoulder_angle, right_shoulder_angle):
-    """Analyze Warrior II pose - REAL MediaPipe analysis only"""
-    
-    feedback = []
-    corrections = []
-    score_components = []
-    
-    print(f"⚔️ REAL Warrior II Analysis - L_arm={left_arm_angle:.1f}°, R_arm={right_arm_angle:.1f}°, L_shoulder={left_shoulder_angle:.1f}°, R_shoulder={right_shoulder_angle:.1f}°")
-    
-    if not landmarks or len(landmarks) < 33:
-        print("❌ Warrior II: Insufficient landmark data")
-        return 0, ["Cannot detect pose - ensure full body is visible"], []
-    
-    try:
-        # Key landmarks for Warrior II - REAL MediaPipe indices
-        LEFT_SHOULDER = 11
-        RIGHT_SHOULDER = 12
-        LEFT_ELBOW = 13
-        RIGHT_ELBOW = 14
-        LEFT_WRIST = 15
-        RIGHT_WRIST = 16
-        LEFT_HIP = 23
-        RIGHT_HIP = 24
-        LEFT_KNEE = 25
-        RIGHT_KNEE = 26
-        LEFT_ANKLE = 27
-        RIGHT_ANKLE = 28
-        
-        print(f"✅ Warrior II: Analyzing {len(landmarks)} real landmarks")
-        
-        # 1. REAL arm extension analysis (should be straight like T-Pose)
-        if left_arm_angle >= 170:
-            score_components.append(100)
-            print("✅ Left arm perfectly straight")
-        elif left_arm_angle >= 150:
-            score_components.append(85)
-            feedback.append("Straighten your left arm a bit more")
-        elif left_arm_angle >= 130:
-            score_components.append(70)
-            feedback.append("Straighten your left arm more")
-            corrections.append({'joint_index': LEFT_ELBOW, 'message': 'Extend left arm', 'type': 'extend_arm'})
-        else:
-            score_components.append(50)
-            feedback.append("Straighten your left arm completely")
-            corrections.append({'joint_index': LEFT_ELBOW, 'message': 'Extend left arm', 'type': 'extend_arm'})
-            
-        if right_arm_angle >= 170:
-            score_components.append(100)
-            print("✅ Right arm perfectly straight")
-        elif right_arm_angle >= 150:
-            score_components.append(85)
-            feedback.append("Straighten your right arm a bit more")
-        elif right_arm_angle >= 130:
-            score_components.append(70)
-            feedback.append("Straighten your right arm more")
-            corrections.append({'joint_index': RIGHT_ELBOW, 'message': 'Extend right arm', 'type': 'extend_arm'})
-        else:
-            score_components.append(50)
-            feedback.append("Straighten your right arm completely")
-            corrections.append({'joint_index': RIGHT_ELBOW, 'message': 'Extend right arm', 'type': 'extend_arm'})
-        
-        # 2. REAL arm height analysis (should be horizontal)
-        if 85 <= left_shoulder_angle <= 95:
-            score_components.append(100)
-            print("✅ Left arm perfectly horizontal")
-        elif 80 <= left_shoulder_angle <= 100:
-            score_components.append(90)
-        elif 70 <= left_shoulder_angle <= 110:
-            score_components.append(75)
-            feedback.append("Adjust left arm to shoulder height")
-            corrections.append({'joint_index': LEFT_SHOULDER, 'message': 'Adjust left arm height', 'type': 'adjust_shoulder'})
-        else:
-            score_components.append(60)
-            feedback.append("Raise your left arm to shoulder height")
-            corrections.append({'joint_index': LEFT_SHOULDER, 'message': 'Adjust left arm height', 'type': 'adjust_shoulder'})
-            
-        if 85 <= right_shoulder_angle <= 95:
-            score_components.append(100)
-            print("✅ Right arm perfectly horizontal")
-        elif 80 <= right_shoulder_angle <= 100:
-            score_components.append(90)
-        elif 70 <= right_shoulder_angle <= 110:
-            score_components.append(75)
-            feedback.append("Adjust right arm to shoulder height")
-            corrections.append({'joint_index': RIGHT_SHOULDER, 'message': 'Adjust right arm height', 'type': 'adjust_shoulder'})
-        else:
-            score_components.append(60)
-            feedback.append("Raise your right arm to shoulder height")
-            corrections.append({'joint_index': RIGHT_SHOULDER, 'message': 'Adjust right arm height', 'type': 'adjust_shoulder'})
-        
-        # 3. REAL stance width analysis (feet should be wide apart)
-        left_ankle_x = landmarks[LEFT_ANKLE]['x']
-        right_ankle_x = landmarks[RIGHT_ANKLE]['x']
-        stance_width = abs(left_ankle_x - right_ankle_x)
-        
-        print(f"🦶 REAL Stance analysis: L_ankle_x={left_ankle_x:.3f}, R_ankle_x={right_ankle_x:.3f}, width={stance_width:.3f}")
-        
-        if stance_width >= 0.30:
-            score_components.append(100)
-            print("✅ Perfect wide stance!")
-        elif stance_width >= 0.25:
-            score_components.append(85)
-            feedback.append("Good stance width!")
-        elif stance_width >= 0.20:
-            score_components.append(70)
-            feedback.append("Widen your stance a bit more")
-            corrections.append({'joint_index': LEFT_ANKLE, 'message': 'Widen stance', 'type': 'widen_stance'})
-        else:
-            score_components.append(50)
-            feedback.append("Widen your stance - step feet much further apart")
-            corrections.append({'joint_index': LEFT_ANKLE, 'message': 'Widen stance', 'type': 'widen_stance'})
-        
-        # 4. REAL knee bend analysis (one knee should be bent)
-        left_knee_angle = calculate_angle(landmarks[LEFT_HIP], landmarks[LEFT_KNEE], landmarks[LEFT_ANKLE])
-        right_knee_angle = calculate_angle(landmarks[RIGHT_HIP], landmarks[RIGHT_KNEE], landmarks[RIGHT_ANKLE])
-        
-        print(f"🦵 REAL Knee analysis: L_knee={left_knee_angle:.1f}°, R_knee={right_knee_angle:.1f}°")
-        
-        # At least one knee should be bent (less than 160°)
-        min_knee_angle = min(left_knee_angle, right_knee_angle)
-        if min_knee_angle <= 120:
-            score_components.append(100)
-            print("✅ Perfect lunge depth!")
-        elif min_knee_angle <= 140:
-            score_components.append(85)
-            feedback.append("Good knee bend!")
-        elif min_knee_angle <= 160:
-            score_components.append(70)
-            feedback.append("Bend your front knee more - lunge deeper")
-            corrections.append({'joint_index': LEFT_KNEE, 'message': 'Bend front knee', 'type': 'bend_knee'})
-        else:
-            score_components.append(50)
-            feedback.append("Bend your front knee - lunge into the pose")
-            corrections.append({'joint_index': LEFT_KNEE, 'message': 'Bend front knee', 'type': 'bend_knee'})
-            
-    except Exception as e:
-        print(f"❌ Warrior II REAL analysis error: {e}")
-        import traceback
-        traceback.print_exc()
-        return 0, ["Error analyzing pose - please try again"], []
-    
-    # Calculate REAL overall score
-    if not score_components:
-        print("❌ No score components calculated")
-        return 0, ["Unable to analyze pose"], []
-    
-    overall_score = sum(score_components) / len(score_components)
-    
-    # REAL feedback based on actual score
-    if overall_score >= 95:
-        feedback = ["Perfect Warrior II! Excellent warrior stance!"]
-    elif overall_score >= 85:
-        feedback.insert(0, "Excellent Warrior II! Minor adjustments:")
-    elif overall_score >= 75:
-        feedback.insert(0, "Strong Warrior II! Keep improving:")
-    elif overall_score >= 60:
-        feedback.insert(0, "Getting closer to Warrior II:")
-    else:
-        feedback.insert(0, "This is not Warrior II yet. Please:")
-        feedback.append("Wide stance, arms extended, front knee bent")
-    
-    print(f"⚔️ REAL Warrior II Analysis Complete: Score={overall_score:.1f}%, Components={score_components}")
-    return overall_score, feedback[:3], corrections[:2]
+def busy_response(session=None):
+    """Response sent when every pooled detector stayed busy past the checkout timeout"""
+    return {
+        "success": False,
+        "error": "Pose detector busy - please retry",
+        "busy": True,
+        "retry_after_ms": int(DETECTOR_CHECKOUT_TIMEOUT * 1000),
+        "next_frame_interval_ms": suggested_frame_interval_ms(session),
+        "landmarks": []
+    }
 
-def analyze_tree_pose(landmarks, left_arm_angle, right_arm_angle):
-    """Analyze Tree Pose - balance on one leg with hands in prayer - REAL MediaPipe data only"""
-    
-    feedback = []
-    corrections = []
-    score_components = []
-    
-    print(f"🌳 REAL Tree Pose Analysis - L_arm={left_arm_angle:.1f}°, R_arm={right_arm_angle:.1f}°")
-    
-    if not landmarks or len(landmarks) < 33:
-        print("❌ Tree Pose: Insufficient landmark data")
-        return 0, ["Cannot detect pose - ensure full body is visible"], []
-    
-    try:
-        # Key landmarks - REAL MediaPipe indices
-        LEFT_WRIST = 15
-        RIGHT_WRIST = 16
-        LEFT_ANKLE = 27
-        RIGHT_ANKLE = 28
-        LEFT_KNEE = 25
-        RIGHT_KNEE = 26
-        LEFT_HIP = 23
-        RIGHT_HIP = 24
-        LEFT_SHOULDER = 11
-        RIGHT_SHOULDER = 12
-        
-        # Validate landmark data
-        required_landmarks = [LEFT_WRIST, RIGHT_WRIST, LEFT_ANKLE, RIGHT_ANKLE, LEFT_KNEE, RIGHT_KNEE, LEFT_HIP, RIGHT_HIP]
-        for idx in required_landmarks:
-            if idx >= len(landmarks) or landmarks[idx] is None:
-                print(f"❌ Tree Pose: Missing landmark {idx}")
-                return 0, ["Cannot analyze pose - landmark data incomplete"], []
-        
-        print(f"✅ Tree Pose: Analyzing {len(landmarks)} real landmarks")
-        
-        # 1. REAL hand position analysis (prayer position)
-        left_wrist_x = landmarks[LEFT_WRIST]['x']
-        left_wrist_y = landmarks[LEFT_WRIST]['y']
-        right_wrist_x = landmarks[RIGHT_WRIST]['x']
-        right_wrist_y = landmarks[RIGHT_WRIST]['y']
-        
-        hand_distance = abs(left_wrist_x - right_wrist_x)
-        wrist_height_diff = abs(left_wrist_y - right_wrist_y)
-        
-        print(f"🙏 REAL Hand analysis: L_wrist=({left_wrist_x:.3f},{left_wrist_y:.3f}), R_wrist=({right_wrist_x:.3f},{right_wrist_y:.3f})")
-        print(f"🙏 Hand distance={hand_distance:.3f}, height_diff={wrist_height_diff:.3f}")
-        
-        # Check if hands are in center of body (prayer position)
-        body_center_x = (landmarks[LEFT_SHOULDER]['x'] + landmarks[RIGHT_SHOULDER]['x']) / 2
-        hands_center_x = (left_wrist_x + right_wrist_x) / 2
-        hands_center_offset = abs(hands_center_x - body_center_x)
-        
-        if hand_distance <= 0.08 and wrist_height_diff <= 0.05 and hands_center_offset <= 0.1:
-            score_components.append(100)
-            print("✅ Perfect prayer position!")
-        elif hand_distance <= 0.12 and wrist_height_diff <= 0.08:
-            score_components.append(85)
-            feedback.append("Bring hands closer together in prayer")
-        elif hand_distance <= 0.18:
-            score_components.append(70)
-            feedback.append("Bring your hands together in prayer position")
-            corrections.append({'joint_index': LEFT_WRIST, 'message': 'Join hands in prayer', 'type': 'prayer_hands'})
-        else:
-            score_components.append(40)
-            feedback.append("This is not Tree Pose - bring hands to prayer position")
-            corrections.append({'joint_index': LEFT_WRIST, 'message': 'Prayer position needed', 'type': 'prayer_hands'})
-        
-        # 2. REAL balance analysis (one foot raised)
-        left_ankle_y = landmarks[LEFT_ANKLE]['y']
-        right_ankle_y = landmarks[RIGHT_ANKLE]['y']
-        foot_height_diff = abs(left_ankle_y - right_ankle_y)
-        
-        print(f"🦶 REAL Foot analysis: L_ankle_y={left_ankle_y:.3f}, R_ankle_y={right_ankle_y:.3f}, diff={foot_height_diff:.3f}")
-        
-        if foot_height_diff >= 0.20:
-            score_components.append(100)
-            print("✅ Excellent balance - one foot well raised!")
-        elif foot_height_diff >= 0.15:
-            score_components.append(85)
-            feedback.append("Great balance! Try to lift your foot a bit higher")
-        elif foot_height_diff >= 0.10:
-            score_components.append(65)
-            feedback.append("Good start! Lift your foot higher on your inner thigh")
-            corrections.append({'joint_index': LEFT_ANKLE, 'message': 'Raise foot higher', 'type': 'lift_foot'})
-        elif foot_height_diff >= 0.05:
-            score_components.append(40)
-            feedback.append("Lift one foot and place it on your inner thigh")
-            corrections.append({'joint_index': LEFT_ANKLE, 'message': 'Raise foot much higher', 'type': 'lift_foot'})
-        else:
-            score_components.append(20)
-            feedback.append("This is not Tree Pose - you need to lift one foot off the ground")
-            corrections.append({'joint_index': LEFT_ANKLE, 'message': 'Lift one foot', 'type': 'lift_foot'})
-        
-        # 3. REAL knee position analysis (raised leg knee should be out to side)
-        left_knee_x = landmarks[LEFT_KNEE]['x']
-        right_knee_x = landmarks[RIGHT_KNEE]['x']
-        knee_separation = abs(left_knee_x - right_knee_x)
-        
-        print(f"🦵 REAL Knee analysis: L_knee_x={left_knee_x:.3f}, R_knee_x={right_knee_x:.3f}, separation={knee_separation:.3f}")
-        
-        if knee_separation >= 0.25:
-            score_components.append(100)
-            print("✅ Perfect knee opening!")
-        elif knee_separation >= 0.20:
-            score_components.append(90)
-        elif knee_separation >= 0.15:
-            score_components.append(80)
-            feedback.append("Open your raised leg knee out to the side more")
-        else:
-            score_components.append(70)
-            feedback.append("Open your raised leg knee out to the side")
-        
-        # 4. REAL body stability analysis
-        left_hip_y = landmarks[LEFT_HIP]['y']
-        right_hip_y = landmarks[RIGHT_HIP]['y']
-        hip_level_diff = abs(left_hip_y - right_hip_y)
-        
-        print(f"🏃 REAL Hip analysis: L_hip_y={left_hip_y:.3f}, R_hip_y={right_hip_y:.3f}, level_diff={hip_level_diff:.3f}")
-        
-        if hip_level_diff <= 0.03:
-            score_components.append(100)
-            print("✅ Perfect hip alignment!")
-        elif hip_level_diff <= 0.05:
-            score_components.append(90)
-        elif hip_level_diff <= 0.08:
-            score_components.append(80)
-            feedback.append("Keep your hips level")
-        else:
-            score_components.append(70)
-            feedback.append("Keep your hips level and torso upright")
-        
-        # 5. Check if this is actually T-Pose (arms extended)
-        if left_arm_angle > 150 and right_arm_angle > 150 and hand_distance > 0.3:
-            score_components = [30]  # Override all scores
-            feedback = ["This is T-Pose, not Tree Pose - bring hands to prayer position"]
-            corrections = [{'joint_index': LEFT_WRIST, 'message': 'Prayer position for Tree Pose', 'type': 'prayer_hands'}]
-            print("❌ Detected T-Pose instead of Tree Pose!")
-            
-    except Exception as e:
-        print(f"❌ Tree Pose REAL analysis error: {e}")
-        import traceback
-        traceback.print_exc()
-        return 0, ["Error analyzing pose - please try again"], []
-    
-    # Calculate REAL overall score
-    if not score_components:
-        print("❌ No score components calculated")
-        return 0, ["Unable to analyze pose"], []
-    
-    overall_score = sum(score_components) / len(score_components)
-    
-    # REAL feedback based on actual score
-    if overall_score >= 95:
-        feedback = ["Perfect Tree Pose! Excellent balance and form!"]
-    elif overall_score >= 85:
-        feedback.insert(0, "Beautiful Tree Pose! Minor adjustments:")
-    elif overall_score >= 75:
-        feedback.insert(0, "Good Tree Pose! Keep improving:")
-    elif overall_score >= 60:
-        feedback.insert(0, "Getting closer to Tree Pose:")
-    elif overall_score >= 40:
-        feedback.insert(0, "This looks like a Tree Pose attempt:")
-    else:
-        feedback.insert(0, "This is not Tree Pose yet. Please:")
-        feedback.append("Stand on one leg with hands in prayer position")
-    
-    print(f"🌳 REAL Tree Pose Analysis Complete: Score={overall_score:.1f}%, Components={score_components}")
-    return overall_score, feedback[:3], corrections[:2]
+def superseded_response(session, session_id=None):
+    """Cheap reply for a frame dropped because a newer frame from the same session arrived
 
-def analyze_goddess_pose(landmarks, left_arm_angle, right_arm_angle):
-    """Analyze Goddess Pose - REAL MediaPipe analysis only"""
-    
-    feedback = []
-    corrections = []
-    score_components = []
-    
-    print(f"👸 REAL Goddess Pose Analysis - L_arm={left_arm_angle:.1f}°, R_arm={right_arm_angle:.1f}°")
-    
-    if not landmarks or len(landmarks) < 33:
-        print("❌ Goddess Pose: Insufficient landmark data")
-        return 0, ["Cannot detect pose - ensure full body is visible"], []
-    
-    try:
-        # Key landmarks - REAL MediaPipe indices
-        LEFT_SHOULDER = 11
-        RIGHT_SHOULDER = 12
-        LEFT_ELBOW = 13
-        RIGHT_ELBOW = 14
-        LEFT_WRIST = 15
-        RIGHT_WRIST = 16
-        LEFT_HIP = 23
-        RIGHT_HIP = 24
-        LEFT_KNEE = 25
-        RIGHT_KNEE = 26
-        LEFT_ANKLE = 27
-        RIGHT_ANKLE = 28
-        
-        print(f"✅ Goddess Pose: Analyzing {len(landmarks)} real landmarks")
-        
-        # 1. REAL squat depth analysis (hips should be low, knees bent)
-        left_hip_y = landmarks[LEFT_HIP]['y']
-        right_hip_y = landmarks[RIGHT_HIP]['y']
-        left_knee_y = landmarks[LEFT_KNEE]['y']
-        right_knee_y = landmarks[RIGHT_KNEE]['y']
-        
-        hip_height = (left_hip_y + right_hip_y) / 2
-        knee_height = (left_knee_y + right_knee_y) / 2
-        squat_depth = hip_height - knee_height  # Positive = hips below knees (good squat)
-        
-        print(f"🏋️ REAL Squat analysis: hip_height={hip_height:.3f}, knee_height={knee_height:.3f}, depth={squat_depth:.3f}")
-        
-        if squat_depth >= 0.08:  # Deep squat
-            score_components.append(100)
-            print("✅ Perfect deep squat!")
-        elif squat_depth >= 0.05:
-            score_components.append(85)
-            feedback.append("Great squat depth!")
-        elif squat_depth >= 0.02:
-            score_components.append(70)
-            feedback.append("Squat deeper - lower your hips more")
-            corrections.append({'joint_index': LEFT_HIP, 'message': 'Squat deeper', 'type': 'squat_deeper'})
-        else:
-            score_components.append(50)
-            feedback.append("Squat much deeper - lower your hips below knee level")
-            corrections.append({'joint_index': LEFT_HIP, 'message': 'Squat deeper', 'type': 'squat_deeper'})
-        
-        # 2. REAL stance width analysis (feet should be very wide)
-        left_ankle_x = landmarks[LEFT_ANKLE]['x']
-        right_ankle_x = landmarks[RIGHT_ANKLE]['x']
-        stance_width = abs(left_ankle_x - right_ankle_x)
-        
-        print(f"🦶 REAL Stance analysis: L_ankle_x={left_ankle_x:.3f}, R_ankle_x={right_ankle_x:.3f}, width={stance_width:.3f}")
-        
-        if stance_width >= 0.35:  # Very wide stance
-            score_components.append(100)
-            print("✅ Perfect wide stance!")
-        elif stance_width >= 0.30:
-            score_components.append(85)
-            feedback.append("Good wide stance!")
-        elif stance_width >= 0.25:
-            score_components.append(70)
-            feedback.append("Widen your stance more")
-            corrections.append({'joint_index': LEFT_ANKLE, 'message': 'Widen stance more', 'type': 'widen_stance'})
-        else:
-            score_components.append(50)
-            feedback.append("Widen your stance much more - feet should be very wide apart")
-            corrections.append({'joint_index': LEFT_ANKLE, 'message': 'Widen stance more', 'type': 'widen_stance'})
-        
-        # 3. REAL knee angles analysis (both knees should be bent significantly)
-        left_knee_angle = calculate_angle(landmarks[LEFT_HIP], landmarks[LEFT_KNEE], landmarks[LEFT_ANKLE])
-        right_knee_angle = calculate_angle(landmarks[RIGHT_HIP], landmarks[RIGHT_KNEE], landmarks[RIGHT_ANKLE])
-        
-        print(f"🦵 REAL Knee analysis: L_knee={left_knee_angle:.1f}°, R_knee={right_knee_angle:.1f}°")
-        
-        avg_knee_angle = (left_knee_angle + right_knee_angle) / 2
-        if avg_knee_angle <= 120:  # Well bent knees
-            score_components.append(100)
-            print("✅ Perfect knee bend!")
-        elif avg_knee_angle <= 140:
-            score_components.append(85)
-            feedback.append("Good knee bend!")
-        elif avg_knee_angle <= 160:
-            score_components.append(70)
-            feedback.append("Bend your knees more - sink deeper")
-            corrections.append({'joint_index': LEFT_KNEE, 'message': 'Bend knees more', 'type': 'bend_knees'})
-        else:
-            score_components.append(50)
-            feedback.append("Bend your knees much more - sink into the squat")
-            corrections.append({'joint_index': LEFT_KNEE, 'message': 'Bend knees more', 'type': 'bend_knees'})
-        
-        # 4. REAL arm position analysis (should be raised up high)
-        left_wrist_y = landmarks[LEFT_WRIST]['y']
-        right_wrist_y = landmarks[RIGHT_WRIST]['y']
-        left_shoulder_y = landmarks[LEFT_SHOULDER]['y']
-        right_shoulder_y = landmarks[RIGHT_SHOULDER]['y']
-        
-        shoulder_height = (left_shoulder_y + right_shoulder_y) / 2
-        wrist_height = (left_wrist_y + right_wrist_y) / 2
-        arm_raise = shoulder_height - wrist_height  # Positive = wrists above shoulders
-        
-        print(f"🙌 REAL Arm analysis: shoulder_height={shoulder_height:.3f}, wrist_height={wrist_height:.3f}, raise={arm_raise:.3f}")
-        
-        if arm_raise >= 0.15:  # Arms well raised
-            score_components.append(100)
-            print("✅ Perfect victory arms!")
-        elif arm_raise >= 0.10:
-            score_components.append(85)
-            feedback.append("Great arm position!")
-        elif arm_raise >= 0.05:
-            score_components.append(70)
-            feedback.append("Raise your arms higher")
-            corrections.append({'joint_index': LEFT_WRIST, 'message': 'Raise arms higher', 'type': 'raise_arms'})
-        else:
-            score_components.append(50)
-            feedback.append("Raise your arms up high like a victory pose")
-            corrections.append({'joint_index': LEFT_WRIST, 'message': 'Raise arms higher', 'type': 'raise_arms'})
-            
-    except Exception as e:
-        print(f"❌ Goddess Pose REAL analysis error: {e}")
-        import traceback
-        traceback.print_exc()
-        return 0, ["Error analyzing pose - please try again"], []
-    
-    # Calculate REAL overall score
-    if not score_components:
-        print("❌ No score components calculated")
-        return 0, ["Unable to analyze pose"], []
-    
-    overall_score = sum(score_components) / len(score_components)
-    
-    # REAL feedback based on actual score
-    if overall_score >= 95:
-        feedback = ["Powerful Goddess Pose! You're a true warrior goddess!"]
-    elif overall_score >= 85:
-        feedback.insert(0, "Excellent Goddess Pose! Minor adjustments:")
-    elif overall_score >= 75:
-        feedback.insert(0, "Strong Goddess Pose! Keep improving:")
-    elif overall_score >= 60:
-        feedback.insert(0, "Getting closer to Goddess Pose:")
+    Args:
+        session: The admitted PoseSession, or None when no frame of it was admitted yet
+        session_id: Session id reported when there is no session object
+    """
+    return {
+        "success": False,
+        "superseded": True,
+        "session_id": session.session_id if session is not None else session_id,
+        "next_frame_interval_ms": suggested_frame_interval_ms(session),
+        "landmarks": []
+    }
+
+def service_load(session=None):
+    """How saturated detection is right now (0 idle - 1 every detector busy)
+
+    The asking session's own in-flight frame is not load: one client alone on
+    an idle service must not be told to slow down.
+    """
+    if inference_workers is not None:
+        load = inference_workers.load
+    elif detector_pool is not None:
+        load = detector_pool.load
     else:
-        feedback.insert(0, "This is not Goddess Pose yet. Please:")
-        feedback.append("Wide squat, arms raised high, knees bent deeply")
-    
-    print(f"👸 REAL Goddess Pose Analysis Complete: Score={overall_score:.1f}%, Components={score_components}")
-    return overall_score, feedback[:3], corrections[:2]
+        load = 0.0
+    # Tracked sessions run on their own detectors, so count admitted frames too
+    in_flight = session_store.in_flight
+    if session is not None and session.in_flight:
+        in_flight -= 1
+    return min(1.0, max(load, max(in_flight, 0) / max(DETECTOR_POOL_SIZE, 1)))
 
-def analyze_downward_dog_pose(landmarks, left_arm_angle, right_arm_angle):
-    """Analyze Downward Facing Dog - REAL MediaPipe analysis only"""
-    
-    feedback = []
-    corrections = []
-    score_components = []
-    
-    print(f"🐕 REAL Downward Dog Analysis - L_arm={left_arm_angle:.1f}°, R_arm={right_arm_angle:.1f}°")
-    
-    if not landmarks or len(landmarks) < 33:
-        print("❌ Downward Dog: Insufficient landmark data")
-        return 0, ["Cannot detect pose - ensure full body is visible"], []
-    
+def suggested_frame_interval_ms(session=None):
+    """Delay the client should leave before its next frame: the session's recent
+    processing time (at least MIN_FRAME_INTERVAL_MS), stretched up to 2x under load"""
+    latency_ms = session.avg_latency_ms if session is not None and session.avg_latency_ms else 0
+    return int(round(max(MIN_FRAME_INTERVAL_MS, latency_ms) * (1 + service_load(session))))
+
+@contextmanager
+def frame_admission(session_id):
+    """Per-session admission: one frame in flight, the newest one waiting.
+
+    Yields (session, outcome). Frames without a session id are always admitted;
+    SUPERSEDED and BUSY frames must not be processed.
+    """
+    session = session_store.get(session_id) if session_id else None
+    if session is None:
+        yield None, None
+        return
+    
+    waiting_since = time.perf_counter()
+    admission = session_store.admit(session, DETECTOR_CHECKOUT_TIMEOUT)
+    observe('admission_wait', time.perf_counter() - waiting_since)
+    if admission in (SUPERSEDED, BUSY):
+        logger.debug("⏭️ Session %s frame %s", session_id, admission)
+        yield session, admission
+        return
+    
+    started = time.monotonic()
     try:
-        # Key landmarks - REAL MediaPipe indices
-        LEFT_SHOULDER = 11
-        RIGHT_SHOULDER = 12
-        LEFT_WRIST = 15
-        RIGHT_WRIST = 16
-        LEFT_HIP = 23
-        RIGHT_HIP = 24
-        LEFT_KNEE = 25
-        RIGHT_KNEE = 26
-        LEFT_ANKLE = 27
-        RIGHT_ANKLE = 28
-        NOSE = 0
-        
-        print(f"✅ Downward Dog: Analyzing {len(landmarks)} real landmarks")
-        
-        # 1. REAL hand position analysis (hands should be on ground - low in frame)
-        left_wrist_y = landmarks[LEFT_WRIST]['y']
-        right_wrist_y = landmarks[RIGHT_WRIST]['y']
-        wrist_height = (left_wrist_y + right_wrist_y) / 2
-        
-        print(f"🖐️ REAL Hand analysis: L_wrist_y={left_wrist_y:.3f}, R_wrist_y={right_wrist_y:.3f}, avg={wrist_height:.3f}")
-        
-        if wrist_height >= 0.80:  # Hands near bottom of frame (on ground)
-            score_components.append(100)
-            print("✅ Perfect hand position on ground!")
-        elif wrist_height >= 0.75:
-            score_components.append(85)
-            feedback.append("Good hand position!")
-        elif wrist_height >= 0.70:
-            score_components.append(70)
-            feedback.append("Lower your hands closer to the ground")
-            corrections.append({'joint_index': LEFT_WRIST, 'message': 'Lower hands to ground', 'type': 'hands_down'})
-        else:
-            score_components.append(50)
-            feedback.append("Place your hands firmly on the ground")
-            corrections.append({'joint_index': LEFT_WRIST, 'message': 'Lower hands to ground', 'type': 'hands_down'})
-        
-        # 2. REAL foot position analysis (feet should be on ground - low in frame)
-        left_ankle_y = landmarks[LEFT_ANKLE]['y']
-        right_ankle_y = landmarks[RIGHT_ANKLE]['y']
-        ankle_height = (left_ankle_y + right_ankle_y) / 2
-        
-        print(f"🦶 REAL Foot analysis: L_ankle_y={left_ankle_y:.3f}, R_ankle_y={right_ankle_y:.3f}, avg={ankle_height:.3f}")
-        
-        if ankle_height >= 0.85:  # Feet near bottom of frame (on ground)
-            score_components.append(100)
-            print("✅ Perfect foot position on ground!")
-        elif ankle_height >= 0.80:
-            score_components.append(85)
-            feedback.append("Good foot position!")
-        elif ankle_height >= 0.75:
-            score_components.append(70)
-            feedback.append("Keep your feet closer to the ground")
-            corrections.append({'joint_index': LEFT_ANKLE, 'message': 'Lower feet to ground', 'type': 'feet_down'})
-        else:
-            score_components.append(50)
-            feedback.append("Keep your feet planted firmly on the ground")
-            corrections.append({'joint_index': LEFT_ANKLE, 'message': 'Lower feet to ground', 'type': 'feet_down'})
-        
-        # 3. REAL inverted V-shape analysis (hips should be highest point)
-        left_hip_y = landmarks[LEFT_HIP]['y']
-        right_hip_y = landmarks[RIGHT_HIP]['y']
-        hip_height = (left_hip_y + right_hip_y) / 2
-        head_height = landmarks[NOSE]['y']
-        
-        print(f"📐 REAL V-shape analysis: hip_height={hip_height:.3f}, head_height={head_height:.3f}, wrist_height={wrist_height:.3f}")
-        
-        # Hips should be higher (lower Y value) than both head and hands
-        hip_elevation = min(head_height, wrist_height) - hip_height  # Positive = hips higher
-        if hip_elevation >= 0.15:  # Hips well elevated
-            score_components.append(100)
-            print("✅ Perfect inverted V-shape!")
-        elif hip_elevation >= 0.10:
-            score_components.append(85)
-            feedback.append("Great V-shape!")
-        elif hip_elevation >= 0.05:
-            score_components.append(70)
-            feedback.append("Lift your hips higher")
-            corrections.append({'joint_index': LEFT_HIP, 'message': 'Lift hips higher', 'type': 'lift_hips'})
-        else:
-            score_components.append(50)
-            feedback.append("Lift your hips up high to form an inverted V-shape")
-            corrections.append({'joint_index': LEFT_HIP, 'message': 'Lift hips higher', 'type': 'lift_hips'})
-        
-        # 4. REAL arm straightness analysis
-        if left_arm_angle >= 170 and right_arm_angle >= 170:
-            score_components.append(100)
-            print("✅ Perfect arm straightness!")
-        elif left_arm_angle >= 160 and right_arm_angle >= 160:
-            score_components.append(85)
-            feedback.append("Good arm strength!")
-        elif left_arm_angle >= 150 and right_arm_angle >= 150:
-            score_components.append(70)
-            feedback.append("Straighten your arms more")
-            corrections.append({'joint_index': LEFT_ELBOW, 'message': 'Straighten arms', 'type': 'straighten_arms'})
-        else:
-            score_components.append(50)
-            feedback.append("Straighten your arms and press firmly into the ground")
-            corrections.append({'joint_index': LEFT_ELBOW, 'message': 'Straighten arms', 'type': 'straighten_arms'})
-        
-        # 5. REAL leg straightness analysis
-        left_leg_angle = calculate_angle(landmarks[LEFT_HIP], landmarks[LEFT_KNEE], landmarks[LEFT_ANKLE])
-        right_leg_angle = calculate_angle(landmarks[RIGHT_HIP], landmarks[RIGHT_KNEE], landmarks[RIGHT_ANKLE])
-        
-        print(f"🦵 REAL Leg analysis: L_leg={left_leg_angle:.1f}°, R_leg={right_leg_angle:.1f}°")
-        
-        avg_leg_angle = (left_leg_angle + right_leg_angle) / 2
-        if avg_leg_angle >= 170:
-            score_components.append(100)
-            print("✅ Perfect leg straightness!")
-        elif avg_leg_angle >= 160:
-            score_components.append(85)
-            feedback.append("Good leg extension!")
-        elif avg_leg_angle >= 150:
-            score_components.append(70)
-            feedback.append("Straighten your legs more")
-        else:
-            score_components.append(60)
-            feedback.append("Straighten your legs and lift your hips higher")
-            
-    except Exception as e:
-        print(f"❌ Downward Dog REAL analysis error: {e}")
-        import traceback
-        traceback.print_exc()
-        return 0, ["Error analyzing pose - please try again"], []
-    
-    # Calculate REAL overall score
-    if not score_components:
-        print("❌ No score components calculated")
-        return 0, ["Unable to analyze pose"], []
-    
-    overall_score = sum(score_components) / len(score_components)
-    
-    # REAL feedback based on actual score
-    if overall_score >= 95:
-        feedback = ["Perfect Downward Dog! Excellent inversion!"]
-    elif overall_score >= 85:
-        feedback.insert(0, "Excellent Downward Dog! Minor adjustments:")
-    elif overall_score >= 75:
-        feedback.insert(0, "Strong Downward Dog! Keep improving:")
-    elif overall_score >= 60:
-        feedback.insert(0, "Getting closer to Downward Dog:")
+        yield session, admission
+    finally:
+        session_store.finish(session, time.monotonic() - started)
+
+def landmarks_from_result(detection_result):
+    """Convert a PoseLandmarker result into a LandmarkFrame (empty if no pose)"""
+    if not detection_result.pose_landmarks:
+        logger.debug("⚠️ MediaPipe 0.10.x: No pose detected in image")
+        return LandmarkFrame.empty()
+    
+    # First person; the Tasks API has no visibility, so the frame uses the default
+    landmarks = LandmarkFrame.from_landmarks(detection_result.pose_landmarks[0])
+    
+    if tracing(logger):
+        logger.debug("✅ REAL MediaPipe 0.10.x detected %d landmarks - nose=(%.3f,%.3f), shoulder=(%.3f,%.3f)",
+                     len(landmarks), landmarks.x(0), landmarks.y(0), landmarks.x(11), landmarks.y(11))
+    return landmarks
+
+def detect_landmarks(image, session=None):
+    """Run MediaPipe on a decoded RGB frame and return its LandmarkFrame (empty if no pose).
+
+    With a tracking session the frame goes to that session's VIDEO-mode detector so
+    MediaPipe reuses the previous frame's pose instead of re-detecting from scratch.
+    """
+    if not MEDIAPIPE_AVAILABLE or detector_pool is None:
+        return LandmarkFrame.empty()
+    
+    # Wrap the frame for MediaPipe before borrowing a detector
+    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image)
+    
+    if session is not None and session.tracking:
+        try:
+            with stage('detect'):
+                result = session.detect(mp_image)
+            return landmarks_from_result(result)
+        except SessionClosed:
+            # Evicted while this frame waited - detect it on a shared detector instead
+            logger.debug("🧹 Session %s was evicted - using the detector pool", session.session_id)
+        except Exception as e:
+            logger.error("❌ Tracked detection failed for session %s: %s", session.session_id, e)
+            return LandmarkFrame.empty()
+    
+    # DetectorPoolTimeout propagates so callers can answer "busy"
+    with detector_pool.checkout() as pose_detector:
+        try:
+            with stage('detect'):
+                result = pose_detector.detect(mp_image)
+            return landmarks_from_result(result)
+        except Exception as e:
+            logger.error("❌ MediaPipe detection failed: %s", e)
+            return LandmarkFrame.empty()
+
+def process_pose_frame(image, pose_type, session=None):
+    """Detect and analyze one decoded RGB frame, returning the detect-pose response dict.
+
+    Shared by the HTTP endpoint and the WebSocket stream so both return the same payload.
+    `session` is the PoseSession frame_admission() admitted; it is never looked up
+    again here, so an eviction in between cannot hand back a fresh session.
+    Session frames that barely differ from the session's last processed frame get
+    that frame's response back, marked `"reused": true`. Session responses also
+    carry the pose hold: `hold_seconds`, `hold_progress` and `pose_completed`.
+    """
+    logger.debug("🖼️ Image decoded: %s", image.shape)
+    
+    signature = None
+    if session is not None and frame_deduplicator.enabled:
+        with stage('dedup'):
+            cached, signature, difference = frame_deduplicator.lookup(session, image, pose_type)
+        if cached is not None:
+            logger.debug("♻️ Frame unchanged for session %s (diff=%.4f) - reusing last result", session.session_id, difference)
+            # A reused result still counts towards the hold
+            return {**cached, **hold_tracker.update(session, cached), "reused": True,
+                    "next_frame_interval_ms": suggested_frame_interval_ms(session)}
+    
+    response = detect_and_analyze(image, pose_type, session)
+    if session is not None:
+        response["session_id"] = session.session_id
+        response["reused"] = False
+        if signature is not None:
+            frame_deduplicator.remember(session, signature, pose_type, dict(response))
+        response.update(hold_tracker.update(session, response))
+    response["next_frame_interval_ms"] = suggested_frame_interval_ms(session)
+    return response
+
+def detect_and_analyze(image, pose_type, session=None):
+    """Run detection plus pose analysis on one frame (no caching).
+
+    Process mode does not track sessions; their frames go to the worker pool.
+    Session landmarks are smoothed over time before they are analyzed.
+    """
+    analysis = None
+    if inference_workers is not None:
+        # Worker already ran detection + analysis; only the compact result came back
+        with stage('worker'):
+            points, analysis = inference_workers.process(image, pose_type)
+        landmarks = LandmarkFrame(points) if points is not None else LandmarkFrame.empty()
     else:
-        feedback.insert(0, "This is not Downward Dog yet. Please:")
-        feedback.append("Hands and feet on ground, hips lifted high")
-    
-    print(f"🐕 REAL Downward Dog Analysis Complete: Score={overall_score:.1f}%, Components={score_components}")
-    return overall_score, feedback[:3], corrections[:2]
+        landmarks = detect_landmarks(image, session)
+    with stage('smoothing'):
+        smoothed = landmark_smoother.smooth(session, landmarks, pose_type)
+    if smoothed is not landmarks:
+        # The worker analyzed the raw landmarks; score the smoothed ones instead
+        landmarks, analysis = smoothed, None
+    return pose_response(landmarks, pose_type, analysis)
+
+def pose_response(landmarks, pose_type, analysis=None):
+    """Build the detect-pose response for detected landmarks.
 
-def analyze_plank_pose(landmarks, left_arm_angle, right_arm_angle):
-    """Analyze Plank Pose - REAL MediaPipe analysis only"""
+    `analysis` is an analyze_frame() result when a worker already analyzed the frame.
+    """
+    # If no landmarks detected, return appropriate response
+    if not landmarks:
+        logger.debug("❌ No landmarks detected - returning no pose detected")
+        response = {
+            "success": True,
+            "pose_detected": False,
+            "landmarks": [],
+            "accuracy_score": 0,
+            "feedback": ["Please ensure your full body is visible in good lighting"],
+            "corrections": [],
+            "pose_name": "No Pose Detected"
+        }
+        return response
     
-    feedback = []
-    corrections = []
-    score_components = []
+    # REAL pose analysis
+    # Add request timestamp for debugging
+    request_time = time.strftime("%H:%M:%S")
+    logger.debug("🎯 Analyzing pose: %s with %d landmarks at %s", pose_type, len(landmarks), request_time)
     
-    print(f"💪 REAL Plank Pose Analysis - L_arm={left_arm_angle:.1f}°, R_arm={right_arm_angle:.1f}°")
+    if analysis is None:
+        with stage('analyze'):
+            analysis = analyze_frame(landmarks, pose_type)
+    analyzed_pose_type, (accuracy_score, feedback, corrections), pose_scores = analysis
     
-    if not landmarks or len(landmarks) < 33:
-        print("❌ Plank Pose: Insufficient landmark data")
-        return 0, ["Cannot detect pose - ensure full body is visible"], []
+    if tracing(logger):
+        logger.debug("📊 Analysis complete: Score=%.1f%%, Feedback=%s, Corrections=%s", accuracy_score, feedback,
+                     [c.get('message', 'Unknown') for c in corrections])
     
+    response = {
+        "success": True,
+        "pose_detected": True,
+        "landmarks": landmarks,  # rendered by response_encoding at the HTTP/WebSocket boundary
+        "accuracy_score": round(accuracy_score, 1),
+        "feedback": feedback,
+        "corrections": corrections,
+        "pose_name": get_pose_name(analyzed_pose_type),
+        "landmarks_count": len(landmarks),
+        "pose_type": analyzed_pose_type,
+        "real_mediapipe": True,
+        "analysis_timestamp": request_time
+    }
+    if pose_scores is not None:
+        # Auto mode: which pose was picked and how every candidate scored
+        response["requested_pose_type"] = pose_type
+        response["pose_scores"] = {candidate: round(score, 1) for candidate, score in pose_scores.items()}
+    return response
+
+def decode_stream_message(message):
+    """Turn one WebSocket message into (encoded frame buffer, control dict).
+
+    Binary messages are raw JPEG/WebP frames. Text messages are JSON: either a
+    control message ({"type": "config", "pose_type": ...}) or a legacy frame
+    with a base64 data-URL in `image`.
+    """
+    if isinstance(message, (bytes, bytearray)):
+        return np.frombuffer(message, np.uint8), {}
+    
+    data = json.loads(message)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    image_data = data.get('image')
+    if not image_data:
+        return None, data
+    if not isinstance(image_data, str):
+        raise ValueError("image must be a base64 string or data URL")
+    if image_data.startswith('data:image'):
+        image_data = image_data.split(',')[1]
+    return np.frombuffer(base64.b64decode(image_data), np.uint8), data
+
+def stream_message_frame_id(message):
+    """Best-effort frame_id of a JSON message that could not be decoded (None if there is none)"""
+    if isinstance(message, (bytes, bytearray)):
+        return None
     try:
-        # Key landmarks - REAL MediaPipe indices
-        LEFT_SHOULDER = 11
-        RIGHT_SHOULDER = 12
-        LEFT_ELBOW = 13
-        RIGHT_ELBOW = 14
-        LEFT_WRIST = 15
-        RIGHT_WRIST = 16
-        LEFT_HIP = 23
-        RIGHT_HIP = 24
-        LEFT_KNEE = 25
-        RIGHT_KNEE = 26
-        LEFT_ANKLE = 27
-        RIGHT_ANKLE = 28
-        NOSE = 0
-        
-        print(f"✅ Plank Pose: Analyzing {len(landmarks)} real landmarks")
-        
-        # 1. REAL body alignment analysis (head, shoulders, hips, ankles should be in straight line)
-        head_y = landmarks[NOSE]['y']
-        left_shoulder_y = landmarks[LEFT_SHOULDER]['y']
-        right_shoulder_y = landmarks[RIGHT_SHOULDER]['y']
-        left_hip_y = landmarks[LEFT_HIP]['y']
-        right_hip_y = landmarks[RIGHT_HIP]['y']
-        left_ankle_y = landmarks[LEFT_ANKLE]['y']
-        right_ankle_y = landmarks[RIGHT_ANKLE]['y']
-        
-        shoulder_height = (left_shoulder_y + right_shoulder_y) / 2
-        hip_height = (left_hip_y + right_hip_y) / 2
-        ankle_height = (left_ankle_y + right_ankle_y) / 2
-        
-        print(f"📏 REAL Body alignment: head={head_y:.3f}, shoulders={shoulder_height:.3f}, hips={hip_height:.3f}, ankles={ankle_height:.3f}")
-        
-        # Check if body is straight (minimal height variation between key points)
-        body_points = [shoulder_height, hip_height, ankle_height]
-        height_variation = max(body_points) - min(body_points)
-        
-        print(f"📐 REAL Height variation: {height_variation:.3f}")
-        
-        if height_variation <= 0.05:  # Very straight body
-            score_components.append(100)
-            print("✅ Perfect straight body alignment!")
-        elif height_variation <= 0.08:
-            score_components.append(85)
-            feedback.append("Excellent body alignment!")
-        elif height_variation <= 0.12:
-            score_components.append(70)
-            if hip_height > shoulder_height + 0.05:  # Hips sagging
-                feedback.append("Engage your core - don't let your hips sag")
-                corrections.append({'joint_index': LEFT_HIP, 'message': 'Lift hips up', 'type': 'lift_hips'})
-            elif hip_height < shoulder_height - 0.05:  # Hips too high
-                feedback.append("Lower your hips - keep body in straight line")
-                corrections.append({'joint_index': LEFT_HIP, 'message': 'Lower hips', 'type': 'lower_hips'})
-            else:
-                feedback.append("Keep your body straighter")
-        else:
-            score_components.append(50)
-            feedback.append("Keep your body in a straight line like a plank")
-            corrections.append({'joint_index': LEFT_HIP, 'message': 'Align body straight', 'type': 'align_body'})
-        
-        # 2. REAL arm position analysis (should be straight down from shoulders)
-        if left_arm_angle >= 170 and right_arm_angle >= 170:
-            score_components.append(100)
-            print("✅ Perfect arm strength!")
-        elif left_arm_angle >= 160 and right_arm_angle >= 160:
-            score_components.append(85)
-            feedback.append("Great arm strength!")
-        elif left_arm_angle >= 150 and right_arm_angle >= 150:
-            score_components.append(70)
-            feedback.append("Keep your arms straighter")
-            corrections.append({'joint_index': LEFT_ELBOW, 'message': 'Straighten arms', 'type': 'straighten_arms'})
-        else:
-            score_components.append(50)
-            feedback.append("Keep your arms straight and strong")
-            corrections.append({'joint_index': LEFT_ELBOW, 'message': 'Straighten arms', 'type': 'straighten_arms'})
-        
-        # 3. REAL plank position check (not standing or downward dog)
-        left_wrist_y = landmarks[LEFT_WRIST]['y']
-        right_wrist_y = landmarks[RIGHT_WRIST]['y']
-        wrist_height = (left_wrist_y + right_wrist_y) / 2
-        
-        print(f"🖐️ REAL Hand position: wrist_height={wrist_height:.3f}")
-        
-        if 0.60 <= wrist_height <= 0.80:  # Good plank range
-            score_components.append(100)
-            print("✅ Perfect plank position!")
-        elif 0.50 <= wrist_height <= 0.85:
-            score_components.append(85)
-            feedback.append("Good plank position!")
-        elif wrist_height > 0.85:  # Too high, probably standing
-            score_components.append(40)
-            feedback.append("Get into plank position - hands on ground, body straight")
-            corrections.append({'joint_index': LEFT_WRIST, 'message': 'Lower to plank position', 'type': 'plank_position'})
-        elif wrist_height < 0.40:  # Too low, might be downward dog
-            score_components.append(50)
-            feedback.append("This looks like Downward Dog - lower your hips for Plank")
-            corrections.append({'joint_index': LEFT_HIP, 'message': 'Lower hips for plank', 'type': 'lower_hips'})
-        else:
-            score_components.append(60)
-            feedback.append("Adjust to proper plank position")
-        
-        # 4. REAL shoulder alignment analysis (shoulders should be over wrists)
-        left_shoulder_x = landmarks[LEFT_SHOULDER]['x']
-        right_shoulder_x = landmarks[RIGHT_SHOULDER]['x']
-        left_wrist_x = landmarks[LEFT_WRIST]['x']
-        right_wrist_x = landmarks[RIGHT_WRIST]['x']
-        
-        shoulder_wrist_alignment = abs((left_shoulder_x - left_wrist_x) + (right_shoulder_x - right_wrist_x)) / 2
-        
-        print(f"💪 REAL Shoulder alignment: alignment_diff={shoulder_wrist_alignment:.3f}")
-        
-        if shoulder_wrist_alignment <= 0.05:
-            score_components.append(100)
-            print("✅ Perfect shoulder alignment!")
-        elif shoulder_wrist_alignment <= 0.08:
-            score_components.append(85)
-            feedback.append("Good shoulder alignment!")
-        elif shoulder_wrist_alignment <= 0.12:
-            score_components.append(70)
-            feedback.append("Align your shoulders over your wrists")
-        else:
-            score_components.append(60)
-            feedback.append("Align your shoulders directly over your wrists")
-        
-        # 5. REAL leg position analysis (legs should be straight)
-        left_leg_angle = calculate_angle(landmarks[LEFT_HIP], landmarks[LEFT_KNEE], landmarks[LEFT_ANKLE])
-        right_leg_angle = calculate_angle(landmarks[RIGHT_HIP], landmarks[RIGHT_KNEE], landmarks[RIGHT_ANKLE])
-        
-        print(f"🦵 REAL Leg analysis: L_leg={left_leg_angle:.1f}°, R_leg={right_leg_angle:.1f}°")
-        
-        avg_leg_angle = (left_leg_angle + right_leg_angle) / 2
-        if avg_leg_angle >= 170:
-            score_components.append(100)
-            print("✅ Perfect leg straightness!")
-        elif avg_leg_angle >= 160:
-            score_components.append(85)
-            feedback.append("Great leg extension!")
-        elif avg_leg_angle >= 150:
-            score_components.append(70)
-            feedback.append("Straighten your legs more")
-        else:
-            score_components.append(60)
-            feedback.append("Straighten your legs and engage your core")
-            
-    except Exception as e:
-        print(f"❌ Plank Pose REAL analysis error: {e}")
-        import traceback
-        traceback.print_exc()
-        return 0, ["Error analyzing pose - please try again"], []
-    
-    # Calculate REAL overall score
-    if not score_components:
-        print("❌ No score components calculated")
-        return 0, ["Unable to analyze pose"], []
-    
-    overall_score = sum(score_components) / len(score_components)
-    
-    # REAL feedback based on actual score
-    if overall_score >= 95:
-        feedback = ["Solid Plank! Excellent core strength and form!"]
-    elif overall_score >= 85:
-        feedback.insert(0, "Excellent Plank! Minor adjustments:")
-    elif overall_score >= 75:
-        feedback.insert(0, "Strong Plank! Keep improving:")
-    elif overall_score >= 60:
-        feedback.insert(0, "Getting closer to perfect Plank:")
-    else:
-        feedback.insert(0, "This is not a proper Plank yet. Please:")
-        feedback.append("Straight body line, hands under shoulders, core engaged")
-    
-    print(f"💪 REAL Plank Pose Analysis Complete: Score={overall_score:.1f}%, Components={score_components}")
-    return overall_score, feedback[:3], corrections[:2]
+        data = json.loads(message)
+    except ValueError:
+        return None
+    return data.get('frame_id') if isinstance(data, dict) else None
+
+def send_stream(ws, response, encoding):
+    """Send one stream reply; MessagePack replies go out as binary frames"""
+    with stage('encode'):
+        body, _ = encode_response(response, encoding)
+    ws.send(body)
 
-def analyze_generic_pose(left_arm_angle, right_arm_angle, left_shoulder_angle, right_shoulder_angle):
-    """Generic pose analysis for unknown poses"""
-    feedback = ["Pose detected - maintain good form"]
-    corrections = []
-    score = 65  # Moderate default score
-    return score, feedback, corrections
+if SOCK_AVAILABLE:
+    @sock.route('/api/ml/stream')
+    def stream_pose(ws):
+        """Persistent live-coaching session: one socket, many frames, one result per frame"""
+        # Per-session state lives here for the life of the socket
+        # Streams without a client session id still get tracking under a generated one
+        generated_session_id = None if request.args.get('session_id') else f"ws-{uuid.uuid4().hex}"
+        stream_session = {
+            "pose_type": request.args.get('pose_type', 'yog2'),
+            "session_id": request.args.get('session_id') or generated_session_id,
+            "encoding": choose_encoding(request.headers.get('Accept'), request.args.get('compact'), request.args.get('format')),
+            "timing": timing_requested(request.args.get(TIMING_ARG)),
+            "frames_received": 0,
+            "started_at": time.time()
+        }
+        logger.info("🔌 Stream opened: pose=%s, session=%s", stream_session['pose_type'], stream_session['session_id'])
+        # Session admitted for the last processed frame (None until one is, or after a session switch)
+        admitted_session = None
+        
+        try:
+            while True:
+                message = ws.receive()
+                if message is None:
+                    break
+                
+                # Latest frame wins: take every message already queued on the socket and
+                # answer frames overtaken by a newer one with a cheap "superseded" reply
+                latest = None
+                while message is not None:
+                    try:
+                        nparr, control = decode_stream_message(message)
+                    except Exception as e:
+                        logger.warning("❌ Invalid stream message: %s", e)
+                        error = {"success": False, "error": f"Invalid message: {e}"}
+                        frame_id = stream_message_frame_id(message)
+                        if frame_id is not None:
+                            error["frame_id"] = frame_id
+                        send_stream(ws, error, stream_session["encoding"])
+                        nparr, control = None, None
+                    
+                    if control is not None:
+                        if control.get('pose_type'):
+                            stream_session["pose_type"] = control['pose_type']
+                        if control.get('session_id') and control['session_id'] != stream_session["session_id"]:
+                            stream_session["session_id"] = control['session_id']
+                            admitted_session = None
+                        if TIMING_ARG in control:
+                            stream_session["timing"] = timing_requested(control[TIMING_ARG])
+                        if control.get('format') or 'compact' in control:
+                            stream_session["encoding"] = choose_encoding(compact=control.get('compact'),
+                                                                         format_name=control.get('format'))
+                        if nparr is None:
+                            send_stream(ws, {"success": True, "type": "config", **stream_session}, stream_session["encoding"])
+                        else:
+                            stream_session["frames_received"] += 1
+                            frame_id = control.get('frame_id', stream_session["frames_received"])
+                            if latest is not None:
+                                dropped = superseded_response(admitted_session, stream_session["session_id"])
+                                dropped["frame_id"] = latest[1]
+                                count_response(stream_session["pose_type"], dropped)
+                                send_stream(ws, dropped, stream_session["encoding"])
+                            latest = (nparr, frame_id)
+                    message = ws.receive(timeout=0)
+                
+                if latest is None:
+                    continue
+                nparr, frame_id = latest
+                
+                with request_timer(stream_session["timing"]) as timer, frame_in_flight(), \
+                        frame_trace(stream_session["session_id"]), \
+                        frame_admission(stream_session["session_id"]) as (session, admission):
+                    admitted_session = session
+                    if admission == SUPERSEDED:
+                        response = superseded_response(session)
+                    elif admission == BUSY:
+                        response = busy_response(session)
+                    else:
+                        # A failing frame gets an error reply like /detect-pose; the stream stays open
+                        try:
+                            image = decode_frame_for_pose(nparr, stream_session["pose_type"])
+                            if image is None:
+                                response = {"success": False, "error": "Invalid image"}
+                            else:
+                                response = process_pose_frame(image, stream_session["pose_type"], session)
+                        except DetectorPoolTimeout:
+                            response = busy_response(session)
+                        except Exception as e:
+                            logger.exception("❌ Stream frame %s failed: %s", frame_id, e)
+                            response = {"success": False, "error": str(e), "landmarks": []}
+                response["frame_id"] = frame_id
+                if timer is not None:
+                    # No headers on a socket: the frame's stage breakdown travels in the reply
+                    response["server_timing"] = timer.as_dict()
+                count_response(stream_session["pose_type"], response)
+                send_stream(ws, response, stream_session["encoding"])
+        finally:
+            # Generated sessions cannot be resumed - free their detector now
+            if generated_session_id:
+                session_store.discard(generated_session_id)
+            duration = time.time() - stream_session["started_at"]
+            logger.info("🔌 Stream closed: %d frames in %.1fs", stream_session['frames_received'], duration)
 
 if __name__ == '__main__':
     port = 5000  # Force ML service to use port 5000
-    print(f"\n🚀 Starting Yoga AI Pose Detection API on port {port}")
-    print(f"🔗 Health Check: http://localhost:{port}/health")
-    print(f"🧘 Available Poses: http://localhost:{port}/api/ml/available-poses")
-    print(f"🔗 MediaPipe Available: {MEDIAPIPE_AVAILABLE}")
-    print("=" * 60)
+    
+    def profile_on_signal(signum, frame):
+        """kill -USR1 <pid>: sample every thread's stack for ML_PROFILE_SIGNAL_SECONDS"""
+        try:
+            profiler_control.start(SAMPLE, PROFILE_SIGNAL_SECONDS)
+        except ProfilerBusy as e:
+            logger.warning("⚠️ %s", e)
+    
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, profile_on_signal)
+    logger.info("🚀 Starting Yoga AI Pose Detection API on port %d", port)
+    logger.info("🔗 Health Check: http://localhost:%d/health", port)
+    logger.info("🧘 Available Poses: http://localhost:%d/api/ml/available-poses", port)
+    logger.info("🔗 MediaPipe Available: %s, execution mode: %s, detectors: %d",
+                MEDIAPIPE_AVAILABLE, EXECUTION_MODE, DETECTOR_POOL_SIZE)
     
     app.run(host='0.0.0.0', port=port, debug=False, threaded=True)  # Debug=False for stability
\ No newline at end of file
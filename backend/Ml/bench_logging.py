@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Logging Overhead Benchmark
+Detects the Video/TEST images once, then replays the landmarks through the
+post-detection request path (analysis, response building and default JSON
+encoding, every per-frame log call included) under several logging setups:
+
+    sync      every trace line formatted and written in the request thread
+              (what the old per-frame print() calls did)
+    debug     DEBUG through the queue handler
+    sampled   DEBUG through the queue, traces kept for --sample of sessions
+    info      the default: INFO through the queue, traces skipped
+
+Usage:
+    python bench_logging.py
+    python bench_logging.py --limit 20 --repeats 5 --log-file /tmp/bench.log
+    python bench_logging.py --json logging.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# Benchmark only needs one in-process detector
+os.environ.setdefault('ML_DETECTOR_POOL_SIZE', '1')
+
+import service_logging
+from bench_resolution import load_test_set
+from detector_pool import MODEL_ASSET_PATH, create_pose_detector
+from frame_preprocessing import MAX_INPUT_SIDE, decode_frame
+from landmark_frame import LandmarkFrame
+from response_encoding import VERBOSE, encode_response
+
+MODES = ('sync', 'debug', 'sampled', 'info')
+
+
+def use_logging_mode(mode, stream, sample_rate):
+    """Install the logging setup for one benchmark mode"""
+    if mode == 'sync':
+        service_logging.shutdown_logging()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(service_logging.TEXT_FORMAT))
+        logging.basicConfig(level=logging.DEBUG, handlers=[handler], force=True)
+        service_logging.TRACE_SAMPLE_RATE = 1.0
+        return
+    level = 'INFO' if mode == 'info' else 'DEBUG'
+    rate = sample_rate if mode == 'sampled' else 1.0
+    service_logging.configure_logging(level=level, stream=stream, sample_rate=rate, force=True)
+
+
+def detect_all(samples, model_path):
+    """Run real detection once per image; returns [(LandmarkFrame, pose_type)], mean detection ms"""
+    import mediapipe as mp
+
+    detector = create_pose_detector(model_path)
+    frames, detect_ms = [], []
+    try:
+        for path, _, pose_type in samples:
+            with open(path, 'rb') as f:
+                rgb = decode_frame(np.frombuffer(f.read(), np.uint8), MAX_INPUT_SIDE)
+            if rgb is None:
+                continue
+            start = time.perf_counter()
+            result = detector.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb))
+            detect_ms.append((time.perf_counter() - start) * 1000)
+            if result.pose_landmarks:
+                frames.append((LandmarkFrame.from_landmarks(result.pose_landmarks[0]), pose_type))
+    finally:
+        detector.close()
+    return frames, float(np.mean(detect_ms)) if detect_ms else None
+
+
+def benchmark(frames, modes, log_path, sample_rate, sessions, repeats):
+    """Time the post-detection path per frame for each logging mode"""
+    import app
+
+    summary = {}
+    for mode in modes:
+        with open(log_path, 'a', encoding='utf-8') as stream:
+            use_logging_mode(mode, stream, sample_rate)
+            size_before = os.path.getsize(log_path)
+            latencies = []
+            for repeat in range(repeats):
+                for i, (landmarks, pose_type) in enumerate(frames):
+                    session_id = f"bench-{i % sessions}"
+                    start = time.perf_counter()
+                    with service_logging.frame_trace(session_id):
+                        encode_response(app.pose_response(landmarks, pose_type), VERBOSE)
+                    latencies.append((time.perf_counter() - start) * 1e6)
+            # Flush queued records so the written size is complete
+            service_logging.shutdown_logging()
+            stream.flush()
+        latencies = np.array(latencies)
+        summary[mode] = {
+            'frames': len(latencies),
+            'mean_us': round(float(latencies.mean()), 1),
+            'p95_us': round(float(np.percentile(latencies, 95)), 1),
+            'log_bytes_per_frame': round((os.path.getsize(log_path) - size_before) / max(len(latencies), 1), 1)
+        }
+    return summary
+
+
+def print_summary(summary, detect_ms):
+    baseline = summary.get('sync', {}).get('mean_us')
+    print(f"\n{'mode':>8} {'frames':>7} {'mean µs':>9} {'p95 µs':>9} {'log B/frame':>12} {'vs sync':>8}")
+    for mode, row in summary.items():
+        ratio = f"{baseline / row['mean_us']:.1f}x" if baseline and row['mean_us'] else '-'
+        print(f"{mode:>8} {row['frames']:>7} {row['mean_us']:>9.1f} {row['p95_us']:>9.1f} "
+              f"{row['log_bytes_per_frame']:>12.1f} {ratio:>8}")
+    if detect_ms is not None:
+        print(f"\n(detection itself: {detect_ms:.1f} ms per frame)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-frame logging overhead on the detect-pose path")
+    parser.add_argument('--test-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Video', 'TEST'))
+    parser.add_argument('--limit', type=int, default=10, help="Max images per pose folder")
+    parser.add_argument('--repeats', type=int, default=20, help="Replays of the detected frames per mode")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--sample', type=float, default=0.05, help="Trace sample rate for the 'sampled' mode")
+    parser.add_argument('--sessions', type=int, default=20, help="Simulated sessions the frames are spread over")
+    parser.add_argument('--log-file', help="Where log output goes (default: a temporary file)")
+    parser.add_argument('--model', default=MODEL_ASSET_PATH)
+    parser.add_argument('--json', dest='json_path', help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    samples = load_test_set(args.test_dir, args.limit)
+    if not samples:
+        raise SystemExit(f"No test images found under {args.test_dir}")
+    frames, detect_ms = detect_all(samples, args.model)
+    if not frames:
+        raise SystemExit("No poses detected in the test images")
+    print(f"🧪 {len(frames)} detected frames x {args.repeats} repeats per mode")
+
+    log_path = args.log_file or tempfile.mkstemp(prefix='bench_logging_', suffix='.log')[1]
+    summary = benchmark(frames, args.modes, log_path, args.sample, args.sessions, args.repeats)
+    print_summary(summary, detect_ms)
+    if not args.log_file:
+        os.remove(log_path)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'detect_ms': detect_ms, 'modes': summary}, f, indent=2)
+        print(f"💾 Wrote {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
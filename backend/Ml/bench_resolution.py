@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Input Resolution Benchmark
+Runs the Video/TEST images through decode (reduced + RGB) -> detection ->
+analysis at several max long sides and compares latency and accuracy scores
+against full resolution, to pick ML_MAX_INPUT_SIDE / ML_POSE_INPUT_SIDES.
+
+Usage:
+    python bench_resolution.py                      # default sides
+    python bench_resolution.py --sides 0 960 640 480 --limit 40
+    python bench_resolution.py --json results.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from detector_pool import MODEL_ASSET_PATH, create_pose_detector
+from frame_preprocessing import decode_frame
+from landmark_frame import LandmarkFrame
+from pose_analysis import analyze_pose_accuracy
+
+# Video/TEST folder -> pose_type used by the API
+FOLDER_POSE_TYPES = {
+    'warrior2': 'yog1',
+    'tree': 'yog3',
+    'goddess': 'yog4',
+    'downdog': 'yog5',
+    'plank': 'yog6'
+}
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_test_set(root, limit=None):
+    """Collect (path, folder, pose_type) for every image in the test folders"""
+    samples = []
+    for folder, pose_type in sorted(FOLDER_POSE_TYPES.items()):
+        folder_path = os.path.join(root, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        files = sorted(f for f in os.listdir(folder_path) if f.lower().endswith(IMAGE_EXTENSIONS))
+        if limit:
+            files = files[:limit]
+        samples.extend((os.path.join(folder_path, f), folder, pose_type) for f in files)
+    return samples
+
+
+def run_frame(detector, encoded, pose_type, max_side):
+    """Time the request-path stages for one frame; returns (latency_ms, input pixels, points or None, score)"""
+    import mediapipe as mp
+
+    start = time.perf_counter()
+    rgb = decode_frame(encoded, max_side)
+    result = detector.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb))
+    latency_ms = (time.perf_counter() - start) * 1000
+    input_pixels = rgb.shape[0] * rgb.shape[1]
+
+    if not result.pose_landmarks:
+        return latency_ms, input_pixels, None, 0.0
+    landmarks = LandmarkFrame.from_landmarks(result.pose_landmarks[0])
+    points = landmarks.data[:, :2].astype(np.float64)
+    score, _, _ = analyze_pose_accuracy(landmarks, pose_type)
+    return latency_ms, input_pixels, points, float(score)
+
+
+def benchmark(samples, sides, model_path, repeats=1):
+    """Evaluate every side on every sample; side 0 (full resolution) is the baseline"""
+    sides = [0] + [s for s in sides if s != 0]
+    detector = create_pose_detector(model_path)
+    results = {side: {"latency": [], "detected": 0, "score_delta": [], "drift": [], "input_pixels": []}
+               for side in sides}
+    baseline = {}
+
+    try:
+        for path, folder, pose_type in samples:
+            encoded = np.fromfile(path, dtype=np.uint8)
+            if decode_frame(encoded, 0) is None:
+                continue
+            for side in sides:
+                latencies = []
+                for _ in range(repeats):
+                    latency_ms, input_pixels, points, score = run_frame(detector, encoded, pose_type, side)
+                    latencies.append(latency_ms)
+                stats = results[side]
+                stats["latency"].append(min(latencies))
+                stats["input_pixels"].append(input_pixels)
+                if points is None:
+                    continue
+                stats["detected"] += 1
+                if side == 0:
+                    baseline[path] = (points, score)
+                elif path in baseline:
+                    base_points, base_score = baseline[path]
+                    stats["score_delta"].append(abs(score - base_score))
+                    stats["drift"].append(float(np.linalg.norm(points - base_points, axis=1).mean()))
+    finally:
+        detector.close()
+
+    summary = []
+    for side in sides:
+        stats = results[side]
+        latency = np.array(stats["latency"]) if stats["latency"] else np.zeros(1)
+        summary.append({
+            "max_side": side,
+            "frames": len(stats["latency"]),
+            "avg_megapixels": round(float(np.mean(stats["input_pixels"] or [0])) / 1e6, 3),
+            "latency_mean_ms": round(float(latency.mean()), 2),
+            "latency_p95_ms": round(float(np.percentile(latency, 95)), 2),
+            "detection_rate": round(stats["detected"] / max(len(stats["latency"]), 1), 3),
+            "score_delta_mean": round(float(np.mean(stats["score_delta"])), 2) if stats["score_delta"] else 0.0,
+            "score_delta_max": round(float(np.max(stats["score_delta"])), 2) if stats["score_delta"] else 0.0,
+            "landmark_drift": round(float(np.mean(stats["drift"])), 4) if stats["drift"] else 0.0
+        })
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'max_side':>9} {'frames':>6} {'MPix':>6} {'mean ms':>8} {'p95 ms':>8} {'detect':>7} {'|dScore|':>9} {'max':>6} {'drift':>7}")
+    for row in summary:
+        side = 'full' if row["max_side"] == 0 else row["max_side"]
+        print(f"{side:>9} {row['frames']:>6} {row['avg_megapixels']:>6} {row['latency_mean_ms']:>8} "
+              f"{row['latency_p95_ms']:>8} {row['detection_rate']:>7} {row['score_delta_mean']:>9} "
+              f"{row['score_delta_max']:>6} {row['landmark_drift']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detect-pose latency and accuracy by input resolution")
+    parser.add_argument('--test-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Video', 'TEST'))
+    parser.add_argument('--sides', type=int, nargs='+', default=[1280, 960, 640, 480, 320],
+                        help="Max long sides to compare (full resolution is always included)")
+    parser.add_argument('--limit', type=int, default=None, help="Max images per pose folder")
+    parser.add_argument('--repeats', type=int, default=1, help="Runs per frame; the fastest is kept")
+    parser.add_argument('--model', default=MODEL_ASSET_PATH)
+    parser.add_argument('--json', dest='json_path', help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    samples = load_test_set(args.test_dir, args.limit)
+    print(f"🧪 Benchmarking {len(samples)} images at sides {args.sides} (+ full resolution)")
+    summary = benchmark(samples, args.sides, args.model, args.repeats)
+    print_summary(summary)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Summary written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
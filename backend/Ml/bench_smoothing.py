@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Landmark Smoothing Benchmark
+Detects the Video/TEST images once, then simulates holding each pose still:
+every frame is the detected pose plus Gaussian landmark jitter, streamed at
+several client frame rates. Scores are compared raw and through the session
+One Euro filter:
+
+    score sd      standard deviation of the accuracy score during the hold
+    flips/s       crossings of the hold threshold per second
+    holds kept    for poses scoring >= threshold without jitter, the share of
+                  holds never dropping below the threshold (the frontend
+                  resets its hold timer on any such frame)
+
+Usage:
+    python bench_smoothing.py
+    python bench_smoothing.py --fps 5 8 20 --jitter 0.006 --seconds 4
+    python bench_smoothing.py --json smoothing.json
+"""
+
+import argparse
+import json
+import os
+import types
+
+import numpy as np
+
+# Benchmark only needs one in-process detector
+os.environ.setdefault('ML_DETECTOR_POOL_SIZE', '1')
+
+from bench_logging import detect_all
+from bench_resolution import load_test_set
+from detector_pool import MODEL_ASSET_PATH
+from landmark_filter import FilterSettings, LandmarkSmoother
+from landmark_frame import LandmarkFrame
+from pose_analysis import analyze_pose_accuracy
+
+# Frontend hold rule (POSE_HOLD_30SEC_UPDATE.md)
+HOLD_THRESHOLD = 90.0
+
+
+def simulate_hold(landmarks, pose_type, fps, seconds, jitter, smoother, rng):
+    """Score one jittered hold; returns the raw and smoothed score arrays"""
+    session = types.SimpleNamespace(landmark_filter=None)
+    frames = max(int(fps * seconds), 2)
+    raw_scores, smoothed_scores = [], []
+    for i in range(frames):
+        data = landmarks.data.copy()
+        data[:, :3] += rng.normal(0, jitter, size=(len(data), 3))
+        noisy = LandmarkFrame(data)
+        raw_scores.append(analyze_pose_accuracy(noisy, pose_type)[0])
+        smoothed = smoother.smooth(session, noisy, pose_type, timestamp=i / fps)
+        smoothed_scores.append(analyze_pose_accuracy(smoothed, pose_type)[0])
+    return np.array(raw_scores), np.array(smoothed_scores)
+
+
+def hold_metrics(scores, clean_score, fps):
+    above = scores >= HOLD_THRESHOLD
+    return {
+        'sd': float(scores.std()),
+        'flips_per_s': float(np.count_nonzero(above[1:] != above[:-1]) * fps / len(scores)),
+        'kept': bool(above.all()) if clean_score >= HOLD_THRESHOLD else None
+    }
+
+
+def summarize(rows):
+    kept = [row['kept'] for row in rows if row['kept'] is not None]
+    return {
+        'score_sd': round(float(np.mean([row['sd'] for row in rows])), 2),
+        'flips_per_s': round(float(np.mean([row['flips_per_s'] for row in rows])), 3),
+        'holds_kept': round(float(np.mean(kept)), 3) if kept else None
+    }
+
+
+def benchmark(frames, fps_values, seconds, jitter, settings, seed):
+    smoother = LandmarkSmoother(settings)
+    summary = {}
+    for fps in fps_values:
+        rng = np.random.default_rng(seed)
+        raw_rows, smoothed_rows = [], []
+        for landmarks, pose_type in frames:
+            clean_score = analyze_pose_accuracy(landmarks, pose_type)[0]
+            raw, smoothed = simulate_hold(landmarks, pose_type, fps, seconds, jitter, smoother, rng)
+            # First frame of a run is unfiltered; judge the settled part like the frontend would
+            raw_rows.append(hold_metrics(raw[1:], clean_score, fps))
+            smoothed_rows.append(hold_metrics(smoothed[1:], clean_score, fps))
+        summary[fps] = {'raw': summarize(raw_rows), 'smoothed': summarize(smoothed_rows)}
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n{'fps':>4} {'':>9} {'score sd':>9} {'flips/s':>8} {'holds kept':>11}")
+    for fps, variants in summary.items():
+        for name, row in variants.items():
+            kept = f"{row['holds_kept'] * 100:.0f}%" if row['holds_kept'] is not None else '-'
+            print(f"{fps:>4} {name:>9} {row['score_sd']:>9.2f} {row['flips_per_s']:>8.3f} {kept:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark score stability with and without landmark smoothing")
+    parser.add_argument('--test-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Video', 'TEST'))
+    parser.add_argument('--limit', type=int, default=10, help="Max images per pose folder")
+    parser.add_argument('--fps', type=float, nargs='+', default=[5, 8, 20], help="Client frame rates to simulate")
+    parser.add_argument('--seconds', type=float, default=3.0, help="Length of each simulated hold")
+    parser.add_argument('--jitter', type=float, default=0.005, help="Landmark noise sd (normalized coordinates)")
+    parser.add_argument('--min-cutoff', type=float, default=FilterSettings().min_cutoff)
+    parser.add_argument('--beta', type=float, default=FilterSettings().beta)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--model', default=MODEL_ASSET_PATH)
+    parser.add_argument('--json', dest='json_path', help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    samples = load_test_set(args.test_dir, args.limit)
+    if not samples:
+        raise SystemExit(f"No test images found under {args.test_dir}")
+    frames, _ = detect_all(samples, args.model)
+    if not frames:
+        raise SystemExit("No poses detected in the test images")
+    print(f"🧪 {len(frames)} detected poses, {args.seconds:g}s holds, jitter sd {args.jitter:g}")
+
+    settings = FilterSettings(args.min_cutoff, args.beta)
+    summary = benchmark(frames, args.fps, args.seconds, args.jitter, settings, args.seed)
+    print_summary(summary)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'settings': vars(args), 'fps': summary}, f, indent=2)
+        print(f"💾 Wrote {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
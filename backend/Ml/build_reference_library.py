@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Build the Reference Pose Library
+Detects every reference image of reference_library.REFERENCE_IMAGES once and
+writes reference_library.npy: one record per image (landmarks, normalized
+keypoints, joint angles, skeleton thumbnail) plus one measured target per
+pose - the median joint angles over that pose's reference images and its
+Video/TRAIN folder, shown by the image closest to the median. Detections go
+through the landmark cache, so a rebuild only detects new or changed images.
+
+Usage:
+    python build_reference_library.py
+    python build_reference_library.py --no-train          # reference images only
+    python build_reference_library.py --train-limit 50 --output /tmp/reference_library.npy
+"""
+
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+from detector_pool import MODEL_ASSET_PATH, create_pose_detector
+from evaluate_dataset import IMAGE_EXTENSIONS, read_image
+from joint_angles import (ANGLE_NAMES, LEFT_ANKLE, LEFT_ELBOW, LEFT_HIP, LEFT_KNEE, LEFT_SHOULDER, LEFT_WRIST,
+                          RIGHT_ANKLE, RIGHT_ELBOW, RIGHT_HIP, RIGHT_KNEE, RIGHT_SHOULDER, RIGHT_WRIST,
+                          compute_joint_angles)
+from landmark_cache import DEFAULT_CACHE_DIR, LandmarkCache, file_hash, model_version
+from landmark_frame import LandmarkFrame
+from reference_library import (DEFAULT_LIBRARY_PATH, LIBRARY_VERSION, ML_DIR, REFERENCE, REFERENCE_DTYPE,
+                               REFERENCE_IMAGES, TARGET, THUMBNAIL_SIZE, TRAIN_POSE_KEYS, ReferenceLibrary,
+                               normalize_keypoints)
+
+# Limb segments drawn on thumbnails
+SKELETON_EDGES = (
+    (LEFT_SHOULDER, RIGHT_SHOULDER), (LEFT_HIP, RIGHT_HIP),
+    (LEFT_SHOULDER, LEFT_HIP), (RIGHT_SHOULDER, RIGHT_HIP),
+    (LEFT_SHOULDER, LEFT_ELBOW), (LEFT_ELBOW, LEFT_WRIST),
+    (RIGHT_SHOULDER, RIGHT_ELBOW), (RIGHT_ELBOW, RIGHT_WRIST),
+    (LEFT_HIP, LEFT_KNEE), (LEFT_KNEE, LEFT_ANKLE),
+    (RIGHT_HIP, RIGHT_KNEE), (RIGHT_KNEE, RIGHT_ANKLE)
+)
+
+
+class Detector:
+    def __init__(self, model_path, cache):
+        """Full-resolution detection through the landmark cache; the detector is created on the first miss"""
+        self.model_path = model_path
+        self.cache = cache
+        self._detector = None
+        self.detected = 0
+
+    def landmarks(self, path):
+        """(33, 4) landmarks of an image, or None (no pose / unreadable)"""
+        import mediapipe as mp
+
+        key = file_hash(path)
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            return cached.landmarks.data if cached.detected else None
+
+        rgb = read_image(path, 0)
+        if rgb is None:
+            return None
+        if self._detector is None:
+            self._detector = create_pose_detector(self.model_path)
+        result = self._detector.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb)))
+        self.detected += 1
+        data = LandmarkFrame.from_landmarks(result.pose_landmarks[0]).data if result.pose_landmarks else None
+        if self.cache is not None:
+            self.cache.put(key, data)
+        return data
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.flush()
+        if self._detector is not None:
+            self._detector.close()
+
+
+def make_thumbnail(path, landmarks):
+    """Image resized to THUMBNAIL_SIZE with the skeleton drawn on it"""
+    image = cv2.imread(path)
+    if image is None:
+        rgb = read_image(path, 0)
+        image = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR) if rgb is not None else np.zeros((1, 1, 3), np.uint8)
+    width, height = THUMBNAIL_SIZE
+    thumbnail = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    points = np.round(landmarks[:, :2] * (width, height)).astype(int)
+    for a, b in SKELETON_EDGES:
+        cv2.line(thumbnail, tuple(points[a]), tuple(points[b]), (0, 255, 0), 2, cv2.LINE_AA)
+    for index in {i for edge in SKELETON_EDGES for i in edge}:
+        cv2.circle(thumbnail, tuple(points[index]), 3, (0, 0, 255), -1, cv2.LINE_AA)
+    return thumbnail
+
+
+def make_record(kind, name, pose, selector, source, content_hash, model, samples, landmarks, angles, thumbnail):
+    record = np.zeros((), dtype=REFERENCE_DTYPE)
+    record['version'] = LIBRARY_VERSION
+    record['kind'] = kind
+    record['name'] = name
+    record['pose'] = pose
+    record['selector'] = selector
+    record['source'] = source
+    record['content_hash'] = content_hash
+    record['model'] = model
+    record['samples'] = samples
+    record['landmarks'] = landmarks
+    record['keypoints'] = normalize_keypoints(landmarks)
+    record['angles'] = angles
+    record['thumbnail'] = thumbnail
+    return record
+
+
+def train_images(train_dir, folder, limit):
+    folder_path = os.path.join(train_dir, folder)
+    if not os.path.isdir(folder_path):
+        return []
+    files = sorted(f for f in os.listdir(folder_path) if f.lower().endswith(IMAGE_EXTENSIONS))
+    return [os.path.join(folder_path, f) for f in files[:limit or None]]
+
+
+def build(detector, version, train_dir=None, train_limit=None):
+    """All library records: reference images first, then one target per pose"""
+    records = []
+    measured = {}  # pose -> [(landmarks, angles, path)]
+
+    for name, image, pose, selector in REFERENCE_IMAGES:
+        path = os.path.join(ML_DIR, image)
+        landmarks = detector.landmarks(path) if os.path.isfile(path) else None
+        if landmarks is None:
+            print(f"⚠️ No pose in reference image {image} - skipped")
+            continue
+        angles = compute_joint_angles(landmarks)
+        records.append(make_record(REFERENCE, name, pose, selector, image, file_hash(path), version, 1,
+                                   landmarks, angles, make_thumbnail(path, landmarks)))
+        if pose:
+            measured.setdefault(pose, []).append((landmarks, angles, path))
+
+    sources = {pose: ['reference images'] for pose in measured}
+    if train_dir:
+        for folder, pose in sorted(TRAIN_POSE_KEYS.items()):
+            paths = train_images(train_dir, folder, train_limit)
+            for path in paths:
+                landmarks = detector.landmarks(path)
+                if landmarks is not None:
+                    measured.setdefault(pose, []).append((landmarks, compute_joint_angles(landmarks), path))
+            if paths:
+                sources.setdefault(pose, []).append(f"TRAIN/{folder}")
+
+    for pose, samples in sorted(measured.items()):
+        angles = np.array([sample[1] for sample in samples])
+        median = np.median(angles, axis=0)
+        # The sample closest to the median angles stands in for the pose's keypoints and thumbnail
+        landmarks, _, path = samples[int(np.argmin(np.abs(angles - median).sum(axis=1)))]
+        records.append(make_record(TARGET, pose, pose, 0, ', '.join(sources[pose]), '', version, len(samples),
+                                   landmarks, median, make_thumbnail(path, landmarks)))
+    return np.array(records, dtype=REFERENCE_DTYPE)
+
+
+def print_library(library):
+    print(f"\n{'kind':>9} {'name':>14} {'pose':>13} {'sel':>3} {'n':>4}  angles ({', '.join(ANGLE_NAMES)})")
+    for reference in library:
+        print(f"{reference.kind:>9} {reference.name:>14} {reference.pose or '-':>13} {reference.selector or '-':>3} "
+              f"{reference.samples:>4}  {reference.target_angles()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the reference poses into reference_library.npy")
+    parser.add_argument('--output', default=DEFAULT_LIBRARY_PATH)
+    parser.add_argument('--model', default=MODEL_ASSET_PATH)
+    parser.add_argument('--train-dir', default=os.path.join(ML_DIR, 'Video', 'TRAIN'),
+                        help="Labeled folders measured into the per-pose targets")
+    parser.add_argument('--no-train', action='store_true', help="Measure targets from the reference images only")
+    parser.add_argument('--train-limit', type=int, default=None, help="Max images per training folder")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Landmark cache location")
+    parser.add_argument('--no-cache', action='store_true', help="Detect every image again")
+    args = parser.parse_args()
+
+    version = model_version(args.model, 'tasks-side0')
+    cache = None if args.no_cache else LandmarkCache(version, args.cache_dir)
+    detector = Detector(args.model, cache)
+    try:
+        records = build(detector, version, None if args.no_train else args.train_dir, args.train_limit)
+    finally:
+        detector.close()
+    if not len(records):
+        raise SystemExit("❌ No reference pose detected - nothing written")
+
+    tmp_path = args.output + '.tmp.npy'
+    np.save(tmp_path, records)
+    os.replace(tmp_path, args.output)
+    print(f"💾 Wrote {len(records)} records to {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB, "
+          f"{detector.detected} images detected, the rest from the landmark cache)")
+    print_library(ReferenceLibrary.load(args.output))
+
+
+if __name__ == '__main__':
+    main()
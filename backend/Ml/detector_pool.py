@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Pose Detector Pool
+Keeps N independent PoseLandmarker instances so concurrent requests
+can run detection in parallel instead of queueing on one global lock
+"""
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from service_metrics import record_checkout
+
+logger = logging.getLogger(__name__)
+
+# MediaPipe Tasks model bundle, resolved relative to the working directory like before
+MODEL_ASSET_PATH = 'pose_landmarker.task'
+
+
+def create_pose_detector(model_path=MODEL_ASSET_PATH, running_mode='IMAGE'):
+    """Create one MediaPipe 0.10.x pose landmarker ('IMAGE' for stills, 'VIDEO' for tracked sessions)"""
+    from mediapipe.tasks import python as mp_tasks
+    from mediapipe.tasks.python import vision
+
+    base_options = mp_tasks.BaseOptions(model_asset_path=model_path)
+    options = vision.PoseLandmarkerOptions(
+        base_options=base_options,
+        running_mode=vision.RunningMode[running_mode],
+        output_segmentation_masks=False)
+    return vision.PoseLandmarker.create_from_options(options)
+
+
+class DetectorPoolTimeout(Exception):
+    """Raised when no detector became free within the checkout timeout"""
+
+
+class DetectorPool:
+    def __init__(self, factory, size, checkout_timeout=2.0):
+        """
+        Create `size` detectors up front using `factory()`
+        Args:
+            factory: Zero-argument callable returning a new detector
+            size: Number of detector instances to keep
+            checkout_timeout: Default seconds to wait for a free detector
+        """
+        self.size = max(1, int(size))
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.LifoQueue()
+        self._detectors = []
+        self._stats_lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._busy_time = 0.0
+        self._created_at = time.monotonic()
+
+        for _ in range(self.size):
+            detector = factory()
+            self._detectors.append(detector)
+            self._idle.put(detector)
+
+    @property
+    def load(self):
+        """Fraction of detectors currently checked out (0-1)"""
+        return self._in_use / self.size
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """Borrow a detector for the duration of a `with` block"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        wait_start = time.monotonic()
+        try:
+            detector = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._stats_lock:
+                self._timeouts += 1
+            record_checkout(timeout, timed_out=True)
+            raise DetectorPoolTimeout(f"No pose detector free after {timeout:.1f}s")
+
+        acquired_at = time.monotonic()
+        waited = acquired_at - wait_start
+        with self._stats_lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        record_checkout(waited)
+
+        try:
+            yield detector
+        finally:
+            with self._stats_lock:
+                self._in_use -= 1
+                self._busy_time += time.monotonic() - acquired_at
+            self._idle.put(detector)
+
+    def stats(self):
+        """Snapshot of pool utilization and checkout wait times"""
+        with self._stats_lock:
+            uptime = max(time.monotonic() - self._created_at, 1e-9)
+            checkouts = self._checkouts
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "utilization": round(self._in_use / self.size, 3),
+                "busy_ratio": round(self._busy_time / (uptime * self.size), 3),
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._total_wait / checkouts * 1000, 2) if checkouts else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 2)
+            }
+
+    def close(self):
+        """Close every detector owned by the pool"""
+        for detector in self._detectors:
+            try:
+                detector.close()
+            except Exception as e:
+                logger.warning("⚠️ Error closing pose detector: %s", e)
+        self._detectors = []
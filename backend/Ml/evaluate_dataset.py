@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Offline Dataset Evaluation
+Runs every labeled image under Video/TRAIN and Video/TEST through the real
+pipeline (decode -> PoseLandmarker -> analyze_pose_accuracy for the folder's
+pose, plus recognize_pose) on a process pool with one detector per worker.
+Writes per-image scores and timings as CSV and prints accuracy and
+throughput per split and pose. Detections are kept in the landmark cache, so
+a repeat run over unchanged images with the same model only re-scores them.
+
+Files are decoded by content, not extension (the folders mix jpg/JPG/jpeg,
+png, bmp and jfif, and some extensions lie); what OpenCV cannot decode is
+retried with Pillow, and unreadable files are reported instead of failing
+the run.
+
+Usage:
+    python evaluate_dataset.py
+    python evaluate_dataset.py --splits TEST --workers 4 --csv scores.csv
+    python evaluate_dataset.py --limit 20 --max-side 0 --json summary.json
+    python evaluate_dataset.py --no-cache       # detect everything again
+"""
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from bench_resolution import FOLDER_POSE_TYPES
+from detector_pool import MODEL_ASSET_PATH, create_pose_detector
+from frame_preprocessing import MAX_INPUT_SIDE, decode_frame, fit_to_max_side
+from landmark_cache import DEFAULT_CACHE_DIR, LandmarkCache, file_hash, model_version
+from landmark_frame import LandmarkFrame
+from pose_analysis import analyze_pose_accuracy, recognize_pose
+
+# Pillow is optional - without it files OpenCV cannot decode are reported as unreadable
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+VIDEO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Video')
+SPLITS = ('TRAIN', 'TEST')
+
+# Matched case-insensitively; the decoder sniffs the real format
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.jpe', '.jfif', '.png', '.bmp', '.webp', '.gif', '.tif', '.tiff')
+
+# Per-image outcomes
+SCORED, NO_POSE, UNREADABLE, ERROR = 'scored', 'no_pose', 'unreadable', 'error'
+
+CSV_FIELDS = ('split', 'folder', 'pose_type', 'file', 'status', 'cached', 'score', 'recognized',
+              'recognized_score', 'width', 'height', 'decode_ms', 'detect_ms', 'analyze_ms', 'error')
+
+# Per-worker state, set by init_worker
+_detector = None
+_max_side = MAX_INPUT_SIDE
+
+
+def collect_images(video_dir, splits, limit=None):
+    """[(split, folder, pose_type, path)] for every image in the labeled pose folders"""
+    samples = []
+    for split in splits:
+        for folder, pose_type in sorted(FOLDER_POSE_TYPES.items()):
+            folder_path = os.path.join(video_dir, split, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            files = sorted(f for f in os.listdir(folder_path)
+                           if not f.startswith('.') and f.lower().endswith(IMAGE_EXTENSIONS))
+            if limit:
+                files = files[:limit]
+            samples.extend((split, folder, pose_type, os.path.join(folder_path, f)) for f in files)
+    return samples
+
+
+def decode_with_pillow(data, max_side):
+    """Fallback decode (GIF, CMYK/16-bit oddities, ...); EXIF orientation applied like OpenCV does"""
+    with Image.open(io.BytesIO(data)) as image:
+        rgb = np.ascontiguousarray(ImageOps.exif_transpose(image).convert('RGB'))
+    return fit_to_max_side(rgb, max_side)
+
+
+def read_image(path, max_side):
+    """RGB image of a file whatever its extension says, or None if neither decoder can read it"""
+    data = np.fromfile(path, dtype=np.uint8)
+    if data.size == 0:
+        return None
+    rgb = decode_frame(data, max_side)
+    if rgb is None and PIL_AVAILABLE:
+        try:
+            rgb = decode_with_pillow(data.tobytes(), max_side)
+        except Exception:
+            return None
+    return rgb
+
+
+def init_worker(model_path, max_side):
+    """Process pool initializer: one detector per worker, reused for every image it gets"""
+    global _detector, _max_side
+    _detector = create_pose_detector(model_path)
+    _max_side = max_side
+
+
+def new_row(sample, cached=False):
+    split, folder, pose_type, path = sample
+    return {'split': split, 'folder': folder, 'pose_type': pose_type, 'file': os.path.basename(path),
+            'status': ERROR, 'cached': int(cached), 'score': '', 'recognized': '', 'recognized_score': '',
+            'width': '', 'height': '', 'decode_ms': '', 'detect_ms': '', 'analyze_ms': '', 'error': ''}
+
+
+def score_row(row, landmarks):
+    """Fill in the scores of a detected pose"""
+    start = time.perf_counter()
+    score, _, _ = analyze_pose_accuracy(landmarks, row['pose_type'])
+    recognized, (recognized_score, _, _), _ = recognize_pose(landmarks)
+    row['analyze_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    row.update(status=SCORED, score=round(float(score), 1), recognized=recognized,
+               recognized_score=round(float(recognized_score), 1))
+
+
+def evaluate_cached(sample, cached):
+    """Score one image from its cached detection (no decode, no detector)"""
+    row = new_row(sample, cached=True)
+    if not cached.detected:
+        row['status'] = NO_POSE
+        return row
+    try:
+        score_row(row, cached.landmarks)
+    except Exception as e:
+        row.update(status=ERROR, error=f"{type(e).__name__}: {e}")
+    return row
+
+
+def evaluate_image(sample):
+    """
+    Decode, detect and score one image in a worker
+    Returns:
+        (CSV row, (33, 4) landmark array or None for the cache)
+    """
+    import mediapipe as mp
+
+    row = new_row(sample)
+    landmarks = None
+    try:
+        start = time.perf_counter()
+        rgb = read_image(sample[3], _max_side)
+        row['decode_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        if rgb is None:
+            row['status'] = UNREADABLE
+            return row, None
+        row['height'], row['width'] = rgb.shape[:2]
+
+        start = time.perf_counter()
+        result = _detector.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb))
+        row['detect_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        if not result.pose_landmarks:
+            row['status'] = NO_POSE
+            return row, None
+
+        landmarks = LandmarkFrame.from_landmarks(result.pose_landmarks[0])
+        score_row(row, landmarks)
+    except Exception as e:
+        row.update(status=ERROR, error=f"{type(e).__name__}: {e}")
+    return row, landmarks.data if landmarks is not None else None
+
+
+def evaluate(samples, model_path, workers, max_side, cache=None, chunksize=8, progress_every=100):
+    """
+    Evaluate all samples: cached detections in this process, the rest on a
+    spawn-context process pool (only started if anything is left to detect)
+    Returns:
+        CSV rows in sample order
+    """
+    rows = [None] * len(samples)
+    misses = []
+    for i, sample in enumerate(samples):
+        cached = cache.get(file_hash(sample[3])) if cache is not None else None
+        if cached is None:
+            misses.append(i)
+        else:
+            rows[i] = evaluate_cached(sample, cached)
+    if cache is not None:
+        print(f"   {len(samples) - len(misses)} cached, {len(misses)} to detect")
+    if not misses:
+        return rows
+
+    ctx = multiprocessing.get_context('spawn')  # MediaPipe is not fork-safe
+    with ProcessPoolExecutor(max_workers=min(workers, len(misses)), mp_context=ctx, initializer=init_worker,
+                             initargs=(model_path, max_side)) as executor:
+        results = executor.map(evaluate_image, [samples[i] for i in misses], chunksize=chunksize)
+        for done, (i, (row, landmarks)) in enumerate(zip(misses, results), 1):
+            rows[i] = row
+            if cache is not None and row['status'] in (SCORED, NO_POSE):
+                cache.put(file_hash(samples[i][3]), landmarks)
+            if progress_every and done % progress_every == 0:
+                print(f"   {done}/{len(misses)} images detected")
+    if cache is not None:
+        cache.flush()
+    return rows
+
+
+def summarize(rows, pass_score):
+    """Accuracy and timing per (split, folder), plus an overall row"""
+    groups = {}
+    for row in rows:
+        groups.setdefault((row['split'], row['folder']), []).append(row)
+    groups[('ALL', 'all')] = rows
+
+    summary = []
+    for (split, folder), group in groups.items():
+        scored = [r for r in group if r['status'] == SCORED]
+        scores = np.array([r['score'] for r in scored], dtype=np.float64)
+        detect_ms = np.array([r['detect_ms'] for r in group if r['detect_ms'] != ''], dtype=np.float64)
+        total_ms = [sum(r[k] for k in ('decode_ms', 'detect_ms', 'analyze_ms') if r[k] != '') for r in group]
+        summary.append({
+            'split': split,
+            'folder': folder,
+            'images': len(group),
+            'unreadable': sum(1 for r in group if r['status'] == UNREADABLE),
+            'errors': sum(1 for r in group if r['status'] == ERROR),
+            'detection_rate': round(len(scored) / max(len(group), 1), 3),
+            'score_mean': round(float(scores.mean()), 1) if len(scores) else None,
+            'score_median': round(float(np.median(scores)), 1) if len(scores) else None,
+            'pass_rate': round(float((scores >= pass_score).mean()), 3) if len(scores) else None,
+            'recognition_accuracy': round(sum(1 for r in scored if r['recognized'] == r['pose_type'])
+                                          / len(scored), 3) if scored else None,
+            'detect_mean_ms': round(float(detect_ms.mean()), 1) if len(detect_ms) else None,
+            'detect_p95_ms': round(float(np.percentile(detect_ms, 95)), 1) if len(detect_ms) else None,
+            # Images per second one worker sustains on this group
+            'images_per_s_per_worker': round(1000 * len(group) / sum(total_ms), 1) if sum(total_ms) else None
+        })
+    return summary
+
+
+def print_summary(summary, wall_s, workers, pass_score):
+    print(f"\n{'split':>5} {'pose':>9} {'images':>6} {'bad':>4} {'detect':>7} {'score':>6} {'median':>7} "
+          f"{f'>={pass_score:g}':>6} {'recog':>6} {'det ms':>7} {'p95':>7} {'img/s/w':>8}")
+    for row in summary:
+        cells = [row[k] if row[k] is not None else '-' for k in
+                 ('score_mean', 'score_median', 'pass_rate', 'recognition_accuracy', 'detect_mean_ms',
+                  'detect_p95_ms', 'images_per_s_per_worker')]
+        print(f"{row['split']:>5} {row['folder']:>9} {row['images']:>6} {row['unreadable'] + row['errors']:>4} "
+              f"{row['detection_rate']:>7} {cells[0]:>6} {cells[1]:>7} {cells[2]:>6} {cells[3]:>6} "
+              f"{cells[4]:>7} {cells[5]:>7} {cells[6]:>8}")
+    images = summary[-1]['images']
+    print(f"\n⏱️ {images} images in {wall_s:.1f}s with {workers} workers ({images / max(wall_s, 1e-9):.1f} images/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every labeled Video/TRAIN and Video/TEST image")
+    parser.add_argument('--video-dir', default=VIDEO_DIR)
+    parser.add_argument('--splits', nargs='+', choices=SPLITS, default=list(SPLITS))
+    parser.add_argument('--limit', type=int, default=None, help="Max images per split and pose folder")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processes, one detector each")
+    parser.add_argument('--max-side', type=int, default=MAX_INPUT_SIDE,
+                        help="Max long side fed to the detector, like the service (0 = full resolution)")
+    parser.add_argument('--pass-score', type=float, default=70.0, help="Score counted as a correct pose")
+    parser.add_argument('--model', default=MODEL_ASSET_PATH)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Landmark cache location")
+    parser.add_argument('--no-cache', action='store_true', help="Detect every image, ignoring the landmark cache")
+    parser.add_argument('--csv', dest='csv_path', default='evaluation.csv', help="Per-image scores and timings")
+    parser.add_argument('--json', dest='json_path', help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    samples = collect_images(args.video_dir, args.splits, args.limit)
+    if not samples:
+        raise SystemExit(f"No labeled images found under {args.video_dir}")
+    workers = max(1, min(args.workers, len(samples)))
+    print(f"🧪 Evaluating {len(samples)} images from {', '.join(args.splits)} with {workers} workers")
+
+    # Detections depend on the model file and the input size
+    cache = None
+    if not args.no_cache:
+        cache = LandmarkCache(model_version(args.model, f"tasks-side{args.max_side}"), args.cache_dir)
+
+    start = time.perf_counter()
+    try:
+        rows = evaluate(samples, args.model, workers, args.max_side, cache)
+    except BrokenProcessPool:
+        raise SystemExit(f"❌ A worker died - check that the model loads: {args.model}")
+    wall_s = time.perf_counter() - start
+
+    with open(args.csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"💾 Per-image results written to {args.csv_path}")
+
+    summary = summarize(rows, args.pass_score)
+    print_summary(summary, wall_s, workers, args.pass_score)
+    for row in rows:
+        if row['status'] in (UNREADABLE, ERROR):
+            print(f"⚠️ {row['split']}/{row['folder']}/{row['file']}: {row['status']} {row['error']}".rstrip())
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'wall_s': round(wall_s, 2), 'workers': workers, 'max_side': args.max_side,
+                       'groups': summary}, f, indent=2)
+        print(f"💾 Summary written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
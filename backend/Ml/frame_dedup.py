@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Frame Skipping
+While a user holds a pose, consecutive frames barely change. Each session
+remembers a tiny grayscale thumbnail of the last frame that went through
+detection; when a new frame is within the threshold of it, the cached
+response is returned instead of running the detector and analyzer again.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+# Thumbnail edge used for the comparison (pixels)
+SIGNATURE_SIZE = 32
+
+
+class DedupState:
+    def __init__(self, signature, pose_type, response):
+        """Last processed frame of one session"""
+        self.signature = signature
+        self.pose_type = pose_type
+        self.response = response
+        self.reuse_streak = 0
+
+
+class FrameDeduplicator:
+    def __init__(self, threshold=0.01, max_reuse=10):
+        """
+        Args:
+            threshold: Max mean absolute grayscale difference (0-1) counted as unchanged; 0 disables
+            max_reuse: Consecutive reuses allowed before a frame is processed anyway
+        """
+        self.threshold = threshold
+        self.max_reuse = max(0, int(max_reuse))
+        self._lock = threading.Lock()
+        self._frames = 0
+        self._reused = 0
+
+    @property
+    def enabled(self):
+        return self.threshold > 0 and self.max_reuse > 0
+
+    def signature(self, image):
+        """Downsample an RGB frame to a SIGNATURE_SIZE x SIGNATURE_SIZE grayscale thumbnail"""
+        thumbnail = cv2.resize(image, (SIGNATURE_SIZE, SIGNATURE_SIZE), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(thumbnail, cv2.COLOR_RGB2GRAY).astype(np.int16)
+
+    def lookup(self, session, image, pose_type):
+        """
+        Compare a frame with the session's last processed frame
+        Returns:
+            (cached response or None, signature of this frame, difference 0-1 or None)
+        """
+        signature = self.signature(image)
+        state = session.dedup
+        difference = None
+        cached = None
+        if state is not None and state.pose_type == pose_type:
+            difference = float(np.abs(signature - state.signature).mean()) / 255.0
+            if difference <= self.threshold and state.reuse_streak < self.max_reuse:
+                state.reuse_streak += 1
+                cached = state.response
+
+        with self._lock:
+            self._frames += 1
+            if cached is not None:
+                self._reused += 1
+        return cached, signature, difference
+
+    def remember(self, session, signature, pose_type, response):
+        """Store a freshly processed frame as the new comparison reference"""
+        session.dedup = DedupState(signature, pose_type, response)
+
+    def stats(self):
+        """Skip rate across all sessions"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                "max_reuse": self.max_reuse,
+                "frames": self._frames,
+                "reused": self._reused,
+                "skip_rate": round(self._reused / self._frames, 3) if self._frames else 0.0
+            }
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Frame Preprocessing
+Decodes uploaded frames straight to a model-sized RGB image. The pose
+landmarker works on a 256x256 crop internally, so pixels beyond a modest
+long side only add decode/convert/copy cost. Landmarks are normalized to
+the frame, so downscaling does not change their coordinate space.
+"""
+
+import logging
+import os
+import struct
+import threading
+
+import cv2
+import numpy as np
+
+from service_metrics import stage
+
+logger = logging.getLogger(__name__)
+
+# Default max long side (pixels); 0 disables resizing
+DEFAULT_MAX_INPUT_SIDE = 640
+
+# OpenCV >= 4.10 can decode to RGB directly; older builds convert into a reused buffer
+IMREAD_COLOR_RGB = getattr(cv2, 'IMREAD_COLOR_RGB', None)
+
+# cv2 reduced-decode flags by downscale factor (JPEG decodes at 1/2, 1/4, 1/8 scale natively)
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2)
+)
+
+# JPEG start-of-frame markers (excluding DHT 0xC4, JPG 0xC8, DAC 0xCC)
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def parse_pose_profiles(spec):
+    """
+    Parse a per-pose resolution profile such as "yog5:960,yog6:800"
+    Args:
+        spec: Comma-separated pose_type:max_side pairs
+    Returns:
+        dict mapping pose_type to max long side
+    """
+    profiles = {}
+    for item in (spec or '').split(','):
+        if ':' not in item:
+            continue
+        pose_type, side = item.split(':', 1)
+        try:
+            profiles[pose_type.strip()] = int(side)
+        except ValueError:
+            logger.warning("⚠️ Ignoring invalid resolution profile entry: %s", item)
+    return profiles
+
+
+MAX_INPUT_SIDE = int(os.environ.get('ML_MAX_INPUT_SIDE', DEFAULT_MAX_INPUT_SIDE))
+POSE_INPUT_SIDES = parse_pose_profiles(os.environ.get('ML_POSE_INPUT_SIDES', ''))
+
+# Per-thread output buffers, reused while the frame size stays the same
+_buffers = threading.local()
+
+
+def max_side_for_pose(pose_type):
+    """Max long side to use for a pose (per-pose profile, else the global setting)"""
+    return POSE_INPUT_SIDES.get(pose_type, MAX_INPUT_SIDE)
+
+
+def read_image_size(data):
+    """
+    Read (width, height) from a JPEG, PNG or WebP header without decoding
+    Args:
+        data: Encoded image bytes (bytes or uint8 array)
+    Returns:
+        (width, height), or None if the format is not recognized
+    """
+    header = bytes(data[:64]) if not isinstance(data, bytes) else data[:64]
+
+    if header[:8] == b'\x89PNG\r\n\x1a\n' and len(header) >= 24:
+        return struct.unpack('>II', header[16:24])
+
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP' and len(header) >= 30:
+        chunk = header[12:16]
+        if chunk == b'VP8X':
+            width = int.from_bytes(header[24:27], 'little') + 1
+            height = int.from_bytes(header[27:30], 'little') + 1
+            return width, height
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', header[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(header[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        return None
+
+    if header[:2] == b'\xff\xd8':
+        return _read_jpeg_size(data)
+    return None
+
+
+def _read_jpeg_size(data):
+    """Walk JPEG segments up to the first start-of-frame marker"""
+    view = memoryview(data).cast('B') if not isinstance(data, bytes) else memoryview(data)
+    offset, end = 2, len(view)
+    while offset + 9 < end:
+        if view[offset] != 0xFF:
+            return None
+        marker = view[offset + 1]
+        if marker == 0xFF:  # Fill byte
+            offset += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:  # Standalone markers carry no length
+            offset += 2
+            continue
+        length = (view[offset + 2] << 8) | view[offset + 3]
+        if marker in JPEG_SOF_MARKERS:
+            height = (view[offset + 5] << 8) | view[offset + 6]
+            width = (view[offset + 7] << 8) | view[offset + 8]
+            return width, height
+        offset += 2 + length
+    return None
+
+
+def reduced_decode_flag(size, max_side):
+    """Pick the strongest reduced-decode flag that still leaves at least `max_side` pixels"""
+    if size is None or not max_side or max_side <= 0:
+        return cv2.IMREAD_COLOR
+    long_side = max(size)
+    for factor, flag in REDUCED_DECODE_FLAGS:
+        if long_side // factor >= max_side:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def _reusable_buffer(name, shape):
+    """Return a per-thread uint8 buffer of `shape`, reallocating only when the shape changes"""
+    buffer = getattr(_buffers, name, None)
+    if buffer is None or buffer.shape != shape:
+        buffer = np.empty(shape, dtype=np.uint8)
+        setattr(_buffers, name, buffer)
+    return buffer
+
+
+def fit_to_max_side(image, max_side, dst=None):
+    """
+    Downscale a frame so its longer side is at most `max_side`
+    Args:
+        image: Decoded frame
+        max_side: Target long side in pixels (0 or less keeps the frame as-is)
+        dst: Optional callable(shape) returning the output buffer
+    Returns:
+        The original frame if it already fits, otherwise the resized frame
+    """
+    if not max_side or max_side <= 0:
+        return image
+    height, width = image.shape[:2]
+    long_side = max(height, width)
+    if long_side <= max_side:
+        return image
+    scale = max_side / float(long_side)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    if dst is None:
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    out = dst((size[1], size[0]) + image.shape[2:])
+    cv2.resize(image, size, dst=out, interpolation=cv2.INTER_AREA)
+    return out
+
+
+def decode_frame(data, max_side=MAX_INPUT_SIDE):
+    """
+    Decode an encoded frame to an RGB image no larger than `max_side`
+    Args:
+        data: Encoded JPEG/PNG/WebP bytes as a uint8 array
+        max_side: Max long side of the result (0 keeps full resolution)
+    Returns:
+        RGB uint8 image, or None if the data could not be decoded. The array
+        may be a per-thread buffer reused by the next decode on this thread.
+    """
+    flags = reduced_decode_flag(read_image_size(data), max_side)
+    if IMREAD_COLOR_RGB is not None:
+        # Swap the BGR bit for RGB, keeping any reduced-size bits
+        with stage('imdecode'):
+            image = cv2.imdecode(data, (flags & ~cv2.IMREAD_COLOR) | IMREAD_COLOR_RGB)
+        if image is None:
+            return None
+        with stage('resize'):
+            return fit_to_max_side(image, max_side, dst=lambda shape: _reusable_buffer('resized', shape))
+
+    with stage('imdecode'):
+        image = cv2.imdecode(data, flags)
+    if image is None:
+        return None
+    with stage('resize'):
+        image = fit_to_max_side(image, max_side, dst=lambda shape: _reusable_buffer('resized', shape))
+    with stage('cvtcolor'):
+        rgb = _reusable_buffer('rgb', image.shape)
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb)
+    return rgb
+
+
+def decode_frame_for_pose(data, pose_type):
+    """Decode a frame using the configured resolution profile for `pose_type`"""
+    return decode_frame(data, max_side_for_pose(pose_type))
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Process-Pool Inference Workers
+Optional execution mode: the HTTP front end copies decoded RGB frames into a
+shared-memory ring and worker processes (one PoseLandmarker each) run
+detection plus analyze_pose_accuracy outside the front end's GIL. Each
+worker has its own task queue, so the front end knows which frames a worker
+holds: a worker that dies fails those frames, gives back their slots and is
+restarted with a fresh queue.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from detector_pool import DetectorPoolTimeout, MODEL_ASSET_PATH
+
+logger = logging.getLogger(__name__)
+
+# Worker -> front end result layout: LandmarkFrame.data, (33, 4) float32 x/y/z/visibility
+LANDMARK_COUNT = 33
+
+# Seconds between worker liveness checks, and the minimum delay before restarting a dead worker
+WATCH_INTERVAL = 0.5
+RESPAWN_DELAY = 1.0
+
+
+class SharedFrameRing:
+    def __init__(self, slots, slot_bytes):
+        """
+        Fixed-size ring of frame slots in one shared-memory block
+        Args:
+            slots: Number of frames that can be in flight at once
+            slot_bytes: Capacity of one slot (max height * width * 3)
+        """
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def in_use(self):
+        return self.slots - self._free.qsize()
+
+    def write(self, image, timeout):
+        """Copy an RGB frame into a free slot and return the slot index"""
+        try:
+            slot = self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise DetectorPoolTimeout(f"No shared frame slot free after {timeout:.1f}s")
+        view = np.ndarray(image.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        np.copyto(view, image)
+        return slot
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _worker_main(shm_name, slot_bytes, task_queue, result_queue, model_path, worker_index=0):
+    """Worker process loop: read a frame from shared memory, detect, analyze, return compact result"""
+    import mediapipe as mp
+    from detector_pool import create_pose_detector
+    from landmark_frame import LandmarkFrame
+    from pose_analysis import analyze_frame
+    from service_logging import configure_logging, frame_trace
+
+    # Each worker has its own queue listener; process mode has no sessions, so traces sample per frame
+    configure_logging()
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        detector = create_pose_detector(model_path)
+    except Exception as e:
+        result_queue.put(("failed", None, str(e), worker_index))
+        shm.close()
+        return
+    result_queue.put(("ready", None, None, worker_index))
+
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            request_id, slot, height, width, pose_type = task
+
+            try:
+                frame = np.ndarray((height, width, 3), dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
+                del frame  # mp.Image holds its own copy - the slot can be reused now
+                result_queue.put(("released", request_id, slot))
+
+                detection_result = detector.detect(mp_image)
+                if not detection_result.pose_landmarks:
+                    result_queue.put(("done", request_id, None, None))
+                    continue
+
+                landmarks = LandmarkFrame.from_landmarks(detection_result.pose_landmarks[0])
+                with frame_trace():
+                    analysis = analyze_frame(landmarks, pose_type)
+                result_queue.put(("done", request_id, landmarks.data, analysis))
+            except Exception as e:
+                result_queue.put(("error", request_id, slot, str(e)))
+    finally:
+        detector.close()
+        shm.close()
+
+
+class InferenceWorkerPool:
+    def __init__(self, workers, slots=None, max_frame_pixels=1920 * 1080, timeout=2.0, model_path=MODEL_ASSET_PATH,
+                 startup_timeout=60.0):
+        """
+        Start `workers` detector processes sharing one frame ring
+        Args:
+            workers: Number of worker processes (one PoseLandmarker each)
+            slots: Frames that can be queued at once (default 2 per worker)
+            max_frame_pixels: Largest frame stored as-is; bigger frames are downscaled
+            timeout: Seconds to wait for a free slot and for the result
+            startup_timeout: Seconds to wait for every worker to load its model
+        """
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.max_frame_pixels = max_frame_pixels
+        self.ring = SharedFrameRing(slots or self.workers * 2, max_frame_pixels * 3)
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._model_path = model_path
+        self._result_queue = self._ctx.Queue()
+        self._pending = {}
+        self._slots_held = {}
+        self._assigned = {}                   # request id -> worker index
+        self._outstanding = [0] * self.workers
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._errors = 0
+        self._respawned = 0
+        self._total_latency = 0.0
+        self._closing = False
+
+        # A queue whose reader dies can stay locked, so every worker reads its own
+        self._task_queues = [self._ctx.Queue() for _ in range(self.workers)]
+        self._processes = [self._start_worker(index) for index in range(self.workers)]
+        self._died_at = [None] * self.workers
+        self._wait_until_ready(startup_timeout)
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+
+    @property
+    def load(self):
+        """Fraction of ring slots holding queued or in-progress frames (0-1)"""
+        return self.ring.in_use / self.ring.slots
+
+    def _start_worker(self, index):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.ring.name, self.ring.slot_bytes, self._task_queues[index], self._result_queue,
+                  self._model_path, index),
+            daemon=True)
+        process.start()
+        return process
+
+    def _wait_until_ready(self, startup_timeout):
+        """Block until every worker has created its detector; fail fast otherwise"""
+        deadline = time.monotonic() + startup_timeout
+        ready = 0
+        while ready < self.workers:
+            try:
+                message = self._result_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                self.close()
+                raise RuntimeError(f"Only {ready}/{self.workers} inference workers started")
+            if message[0] == "failed":
+                self.close()
+                raise RuntimeError(f"Inference worker failed to start: {message[2]}")
+            ready += 1
+
+    def _fit_frame(self, image):
+        """Downscale frames that do not fit in one ring slot"""
+        height, width = image.shape[:2]
+        if height * width <= self.max_frame_pixels:
+            return image
+        scale = (self.max_frame_pixels / float(height * width)) ** 0.5
+        return cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+    def _collect_results(self):
+        """Background thread resolving futures as worker results arrive and restarting dead workers"""
+        while True:
+            try:
+                message = self._result_queue.get(timeout=WATCH_INTERVAL)
+            except queue.Empty:
+                message = ()
+            if message is None:
+                break
+            self._check_workers()
+            if not message:
+                continue
+            kind, request_id = message[0], message[1]
+
+            if kind == "released":
+                self._release_slot(request_id)
+                continue
+            if kind == "ready":
+                logger.info("✅ Inference worker %d ready", message[3])
+                continue
+            if kind == "failed":
+                logger.error("❌ Inference worker %d failed to start: %s", message[3], message[2])
+                continue
+
+            with self._lock:
+                future, submitted_at = self._pending.pop(request_id, (None, None))
+                self._unassign(request_id)
+            self._release_slot(request_id)
+            if future is None:
+                continue
+
+            if kind == "error":
+                with self._lock:
+                    self._errors += 1
+                future.set_exception(RuntimeError(message[3]))
+            else:
+                with self._lock:
+                    self._completed += 1
+                    self._total_latency += time.monotonic() - submitted_at
+                future.set_result((message[2], message[3]))
+
+    def _check_workers(self):
+        """Fail the frames of workers that died, free their slots and start replacements"""
+        now = time.monotonic()
+        for index, process in enumerate(self._processes):
+            if self._closing or process.is_alive():
+                continue
+            if self._died_at[index] is None:
+                self._died_at[index] = now
+                self._fail_assigned(index, process.exitcode)
+            # A worker that cannot even start (e.g. a missing model) is retried, but not in a tight loop
+            if now - self._died_at[index] < RESPAWN_DELAY:
+                continue
+            process.join(timeout=0)
+            old_queue = self._task_queues[index]
+            with self._lock:
+                if self._closing:
+                    return
+                self._task_queues[index] = self._ctx.Queue()
+                self._processes[index] = self._start_worker(index)
+                self._died_at[index] = None
+                self._respawned += 1
+            old_queue.cancel_join_thread()
+            old_queue.close()
+            logger.warning("🔁 Restarted inference worker %d", index)
+
+    def _fail_assigned(self, index, exitcode):
+        """Fail every frame queued at or running on a dead worker"""
+        with self._lock:
+            lost = [request_id for request_id, worker in self._assigned.items() if worker == index]
+            futures = [self._pending.pop(request_id, (None, None))[0] for request_id in lost]
+            for request_id in lost:
+                self._unassign(request_id)
+            self._errors += len(lost)
+        logger.error("❌ Inference worker %d exited (code %s) with %d frames assigned", index, exitcode, len(lost))
+        for request_id, future in zip(lost, futures):
+            self._release_slot(request_id)
+            if future is not None:
+                future.set_exception(RuntimeError(f"Inference worker exited (code {exitcode})"))
+
+    def _unassign(self, request_id):
+        """Drop a frame from its worker's count (caller holds the lock)"""
+        index = self._assigned.pop(request_id, None)
+        if index is not None:
+            self._outstanding[index] -= 1
+
+    def _abandon(self, request_id):
+        """Forget a frame nobody waits for any more; a late reply is ignored.
+
+        The frame may still be queued at its worker, which will read the slot
+        later, so the slot and the assignment stay until the worker reports
+        "released" / "error" or dies.
+        """
+        with self._lock:
+            self._pending.pop(request_id, None)
+
+    def _release_slot(self, request_id):
+        with self._lock:
+            slot = self._slots_held.pop(request_id, None)
+        if slot is not None:
+            self.ring.release(slot)
+
+    def submit(self, image, pose_type):
+        """Queue an RGB frame; the future resolves to (LandmarkFrame data or None, analyze_frame() result or None)"""
+        return self._submit(image, pose_type)[1]
+
+    def _submit(self, image, pose_type):
+        image = np.ascontiguousarray(self._fit_frame(image))
+        slot = self.ring.write(image, self.timeout)
+        request_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            # Least busy live worker; a dead one only gets frames if every worker is down
+            index = min(range(self.workers), key=lambda i: (self._died_at[i] is not None, self._outstanding[i]))
+            self._pending[request_id] = (future, time.monotonic())
+            self._slots_held[request_id] = slot
+            self._assigned[request_id] = index
+            self._outstanding[index] += 1
+            task_queue = self._task_queues[index]
+        task_queue.put((request_id, slot, image.shape[0], image.shape[1], pose_type))
+        return request_id, future
+
+    def process(self, image, pose_type):
+        """Run one frame through a worker and wait for (points, (score, feedback, corrections))"""
+        request_id, future = self._submit(image, pose_type)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Nobody waits for the reply any more; the slot comes back once the worker lets go of it
+            self._abandon(request_id)
+            raise DetectorPoolTimeout(f"Inference worker did not answer within {self.timeout:.1f}s")
+
+    def stats(self):
+        """Snapshot of worker pool throughput and ring occupancy"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "alive_workers": sum(1 for p in self._processes if p.is_alive()),
+                "ring_slots": self.ring.slots,
+                "ring_in_use": self.ring.in_use,
+                "pending": len(self._pending),
+                "completed": self._completed,
+                "errors": self._errors,
+                "respawned": self._respawned,
+                "avg_latency_ms": round(self._total_latency / self._completed * 1000, 2) if self._completed else 0.0
+            }
+
+    def close(self):
+        """Stop the workers and free the shared memory"""
+        with self._lock:
+            self._closing = True
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._result_queue.put(None)
+        self.ring.close()
+
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Joint Angle Engine
+Computes every joint angle the analyzers use in one vectorized pass over a
+(33, 3) float32 landmark array, from precomputed index triplets, instead of
+building three small arrays per angle.
+"""
+
+import numpy as np
+
+# MediaPipe Pose landmark indices
+NOSE = 0
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+
+LANDMARK_COUNT = 33
+
+# (name, first point, vertex, last point) in the classic 8-angle order used by
+# the target-pose tables: right/left elbow, shoulder, hip, knee
+JOINT_ANGLES = (
+    ('right_elbow', RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+    ('left_elbow', LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    ('right_shoulder', RIGHT_ELBOW, RIGHT_SHOULDER, RIGHT_HIP),
+    ('left_shoulder', LEFT_ELBOW, LEFT_SHOULDER, LEFT_HIP),
+    ('right_hip', RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+    ('left_hip', LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+    ('right_knee', RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+    ('left_knee', LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+)
+
+ANGLE_NAMES = tuple(name for name, _, _, _ in JOINT_ANGLES)
+ANGLE_INDEX = {name: i for i, name in enumerate(ANGLE_NAMES)}
+
+_FIRST = np.array([a for _, a, _, _ in JOINT_ANGLES], dtype=np.intp)
+_VERTEX = np.array([b for _, _, b, _ in JOINT_ANGLES], dtype=np.intp)
+_LAST = np.array([c for _, _, _, c in JOINT_ANGLES], dtype=np.intp)
+
+
+def landmarks_to_array(landmarks):
+    """
+    Pack landmarks into one (N, 3) float32 x/y/z array
+    Args:
+        landmarks: API landmark dicts, MediaPipe landmark objects, (x, y[, z])
+            sequences, or an existing array (returned as-is)
+    Returns:
+        np.ndarray of shape (N, 3), dtype float32
+    """
+    if isinstance(landmarks, np.ndarray):
+        return landmarks
+    if not len(landmarks):
+        return np.zeros((0, 3), dtype=np.float32)
+
+    first = landmarks[0]
+    if isinstance(first, dict):
+        rows = [(lm['x'], lm['y'], lm.get('z', 0.0)) for lm in landmarks]
+    elif hasattr(first, 'x'):
+        rows = [(lm.x, lm.y, lm.z) for lm in landmarks]
+    else:
+        rows = [(p[0], p[1], p[2] if len(p) > 2 else 0.0) for p in landmarks]
+    return np.array(rows, dtype=np.float32)
+
+
+def angles_for_triplets(points, first, vertex, last):
+    """
+    Angle at `vertex` between `first` and `last` for many index triplets at once
+    Args:
+        points: (N, 2+) landmark array (any coordinate space; only x/y are used)
+        first, vertex, last: Equal-length index arrays into `points`
+    Returns:
+        float64 array of angles in degrees (0-180)
+    """
+    xy = np.asarray(points)[:, :2].astype(np.float64)
+    a = xy[first]
+    b = xy[vertex]
+    c = xy[last]
+    radians = np.arctan2(c[:, 1] - b[:, 1], c[:, 0] - b[:, 0]) - np.arctan2(a[:, 1] - b[:, 1], a[:, 0] - b[:, 0])
+    angles = np.abs(radians * 180.0 / np.pi)
+    return np.where(angles > 180.0, 360 - angles, angles)
+
+
+def compute_joint_angles(points):
+    """All JOINT_ANGLES for a (33, 2+) landmark array, ordered like ANGLE_NAMES"""
+    return angles_for_triplets(points, _FIRST, _VERTEX, _LAST)
+
+
+def joint_angle_dict(points):
+    """Joint angles keyed by name (plain floats)"""
+    return dict(zip(ANGLE_NAMES, compute_joint_angles(points).tolist()))
+
+
+def angle_between(a, b, c):
+    """Angle in degrees at vertex `b` for three ad-hoc (x, y) points"""
+    return float(angles_for_triplets(np.array([a[:2], b[:2], c[:2]], dtype=np.float64), [0], [1], [2])[0])
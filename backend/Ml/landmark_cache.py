@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Landmark Cache
+On-disk cache of pose detections for still images (target images, dataset
+passes), keyed by the image's content hash under a model version. Each
+version has its own directory of .npz shards - keys, (N, 33, 4) landmarks
+and (N, 8) joint angles - plus index.json mapping a key to its shard and row.
+The version is derived from the model file's content, so a changed model
+starts an empty cache; prune() deletes the stale versions. Images without a
+detected pose are cached as well, so repeat runs never reach MediaPipe.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import types
+
+import numpy as np
+
+from joint_angles import ANGLE_NAMES, LANDMARK_COUNT, compute_joint_angles
+from landmark_frame import LandmarkFrame
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'ML_LANDMARK_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'landmark_cache'))
+CACHE_ENABLED = os.environ.get('ML_LANDMARK_CACHE', '1') != '0'
+
+INDEX_FILE = 'index.json'
+# Entries buffered in memory before they are written as one shard
+SHARD_SIZE = 256
+
+# (absolute path, size, mtime) -> content hash, so unchanged files are hashed once per process
+_file_hashes = {}
+
+
+def content_hash(data):
+    """Cache key of encoded image bytes"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_hash(path):
+    """Content hash of a file, memoized while its size and mtime stay the same"""
+    stat = os.stat(path)
+    memo = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    key = _file_hashes.get(memo)
+    if key is None:
+        with open(path, 'rb') as f:
+            key = _file_hashes[memo] = content_hash(f.read())
+    return key
+
+
+def _mediapipe_version():
+    try:
+        import mediapipe as mp
+        return mp.__version__
+    except Exception:
+        return 'none'
+
+
+def model_version(model_paths, variant=''):
+    """
+    Cache version for detections made with the given model files
+    Args:
+        model_paths: Model file path(s); missing files fall back to the MediaPipe version
+        variant: Settings that also change the output (API, confidence, input size)
+    Returns:
+        Directory-safe version string; changes whenever a model file's content does
+    """
+    if isinstance(model_paths, str):
+        model_paths = [model_paths]
+    parts = [file_hash(path)[:12] for path in model_paths if os.path.isfile(path)]
+    if len(parts) < len(model_paths) or not parts:
+        parts.append(f"mp{_mediapipe_version()}")
+    if variant:
+        parts.append(variant)
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', '-'.join(parts))
+
+
+def solutions_model_paths(model_complexity=1):
+    """Model files behind mp.solutions.pose (person detector + landmark model)"""
+    try:
+        import mediapipe as mp
+    except Exception:
+        return []
+    root = os.path.dirname(mp.__file__)
+    name = ('lite', 'full', 'heavy')[model_complexity]
+    return [os.path.join(root, 'modules', 'pose_detection', 'pose_detection.tflite'),
+            os.path.join(root, 'modules', 'pose_landmark', f'pose_landmark_{name}.tflite')]
+
+
+class CachedDetection:
+    __slots__ = ('landmarks', 'angles')
+
+    def __init__(self, landmarks, angles):
+        """
+        One cached detection
+        Args:
+            landmarks: LandmarkFrame, or None when no pose was detected
+            angles: (8,) joint angles in ANGLE_NAMES order, or None
+        """
+        self.landmarks = landmarks
+        self.angles = angles
+
+    @property
+    def detected(self):
+        return self.landmarks is not None
+
+    @property
+    def keypoints(self):
+        """[{'X', 'Y', 'Z'}] per landmark, the layout ProfessionalPoseDetector compares"""
+        if self.landmarks is None:
+            return None
+        return [{'X': x, 'Y': y, 'Z': z} for x, y, z in self.landmarks.points.tolist()]
+
+    def to_proto(self):
+        """Landmarks as a Solutions-API NormalizedLandmarkList (for `results.pose_landmarks`)"""
+        if self.landmarks is None:
+            return None
+        rows = self.landmarks.data.tolist()
+        try:
+            from mediapipe.framework.formats import landmark_pb2
+        except ImportError:
+            # Builds without the protobuf formats: plain objects with the same fields
+            return types.SimpleNamespace(landmark=[types.SimpleNamespace(x=x, y=y, z=z, visibility=visibility)
+                                                   for x, y, z, visibility in rows])
+
+        proto = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z, visibility in rows:
+            proto.landmark.add(x=x, y=y, z=z, visibility=visibility)
+        return proto
+
+
+class LandmarkCache:
+    def __init__(self, version, cache_dir=DEFAULT_CACHE_DIR, shard_size=SHARD_SIZE):
+        """
+        Args:
+            version: Model version from model_version(); entries of other versions are never read
+            cache_dir: Root directory holding one subdirectory per version
+            shard_size: Pending entries that trigger writing a shard
+        """
+        self.version = version
+        self.cache_dir = cache_dir
+        self.directory = os.path.join(cache_dir, version)
+        self.shard_size = max(1, int(shard_size))
+        self._lock = threading.Lock()
+        self._index = None     # key -> (shard file, row)
+        self._shards = {}      # shard file -> {'landmarks', 'angles', 'detected'}
+        self._pending = {}     # key -> (33, 4) landmarks or None
+        self.hits = 0
+        self.misses = 0
+
+    def _read_index(self):
+        """Load index.json and add any shard it does not list yet (written by a concurrent run)"""
+        index = {}
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('version') == self.version:
+                index = {key: tuple(entry) for key, entry in stored.get('entries', {}).items()}
+        except (OSError, ValueError):
+            pass
+
+        listed = {shard for shard, _ in index.values()}
+        unlisted = []
+        if os.path.isdir(self.directory):
+            unlisted = sorted(name for name in os.listdir(self.directory)
+                              if name.endswith('.npz') and name not in listed)
+        for shard in unlisted:
+            try:
+                with np.load(os.path.join(self.directory, shard)) as arrays:
+                    keys = arrays['keys'].tolist()
+            except (OSError, ValueError, KeyError):
+                logger.warning("⚠️ Skipping unreadable landmark cache shard %s", shard)
+                continue
+            index.update((key, (shard, row)) for row, key in enumerate(keys))
+        self._index = index
+        if unlisted:
+            self._write_index()
+
+    def _write_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'entries': self._index}, f)
+        os.replace(tmp_path, path)
+
+    def _shard(self, name):
+        shard = self._shards.get(name)
+        if shard is None:
+            with np.load(os.path.join(self.directory, name)) as arrays:
+                shard = {field: arrays[field] for field in ('landmarks', 'angles', 'detected')}
+            self._shards[name] = shard
+        return shard
+
+    def get(self, key):
+        """
+        Cached detection for `key`
+        Returns:
+            CachedDetection (possibly with no pose), or None on a cache miss
+        """
+        with self._lock:
+            if key in self._pending:
+                data = self._pending[key]
+                self.hits += 1
+                if data is None:
+                    return CachedDetection(None, None)
+                return CachedDetection(LandmarkFrame(data), compute_joint_angles(data).astype(np.float32))
+            if self._index is None:
+                self._read_index()
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            try:
+                shard = self._shard(entry[0])
+            except (OSError, ValueError, KeyError):
+                # Shard deleted or damaged since the index was written
+                self._index.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            row = entry[1]
+            if not shard['detected'][row]:
+                return CachedDetection(None, None)
+            return CachedDetection(LandmarkFrame(shard['landmarks'][row]), shard['angles'][row])
+
+    def put(self, key, landmarks):
+        """
+        Remember a detection (written with the next shard)
+        Args:
+            key: Image content hash
+            landmarks: LandmarkFrame / (33, 4) array, or None when no pose was detected
+        """
+        data = None
+        if landmarks is not None:
+            data = np.asarray(getattr(landmarks, 'data', landmarks), dtype=np.float32)
+            if data.shape != (LANDMARK_COUNT, 4):
+                raise ValueError(f"expected ({LANDMARK_COUNT}, 4) landmarks, got {data.shape}")
+        with self._lock:
+            self._pending[key] = data
+            full = len(self._pending) >= self.shard_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write pending entries as a new shard and update the index"""
+        with self._lock:
+            if not self._pending:
+                return
+            if self._index is None:
+                self._read_index()
+            keys = list(self._pending)
+            detected = np.array([self._pending[key] is not None for key in keys])
+            landmarks = np.zeros((len(keys), LANDMARK_COUNT, 4), dtype=np.float32)
+            for row, key in enumerate(keys):
+                if detected[row]:
+                    landmarks[row] = self._pending[key]
+            angles = np.zeros((len(keys), len(ANGLE_NAMES)), dtype=np.float32)
+            for row in np.flatnonzero(detected):
+                angles[row] = compute_joint_angles(landmarks[row])
+
+            os.makedirs(self.directory, exist_ok=True)
+            name = f"shard-{time.time_ns()}-{os.getpid()}.npz"
+            tmp_path = os.path.join(self.directory, name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, keys=np.array(keys), landmarks=landmarks, angles=angles, detected=detected)
+            os.replace(tmp_path, os.path.join(self.directory, name))
+
+            self._index.update((key, (name, row)) for row, key in enumerate(keys))
+            self._shards[name] = {'landmarks': landmarks, 'angles': angles, 'detected': detected}
+            self._pending.clear()
+            self._write_index()
+        logger.info("💾 Cached %d detections in %s", len(keys), name)
+
+    def prune(self):
+        """Delete the cached detections of every other model version; returns the versions removed"""
+        removed = []
+        if not os.path.isdir(self.cache_dir):
+            return removed
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name != self.version and os.path.isfile(os.path.join(path, INDEX_FILE)):
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(name)
+        return removed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._index or {}) + len(self._pending),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+
+class CachedPose:
+    def __init__(self, factory, cache=None, variant='solutions-c1-d0.5'):
+        """
+        Stand-in for `with mp_pose.Pose(...) as pose:` over still images. The
+        real detector is only created on the first cache miss.
+        Args:
+            factory: Zero-argument callable creating the Solutions-API Pose
+            cache: LandmarkCache to use (default: one for the Solutions pose model)
+            variant: Settings part of the default cache's version
+        """
+        self.factory = factory
+        self.cache = cache
+        if self.cache is None and CACHE_ENABLED:
+            self.cache = LandmarkCache(model_version(solutions_model_paths(), variant))
+        self._pose = None
+
+    def process(self, image, path):
+        """
+        Like Pose.process() for the RGB `image` decoded from `path`
+        Returns:
+            Object with `pose_landmarks` (NormalizedLandmarkList or None)
+        """
+        key = file_hash(path) if self.cache is not None else None
+        cached = self.cache.get(key) if key is not None else None
+        if cached is not None:
+            return types.SimpleNamespace(pose_landmarks=cached.to_proto())
+
+        if self._pose is None:
+            self._pose = self.factory()
+        results = self._pose.process(image)
+        if key is not None:
+            landmarks = results.pose_landmarks
+            self.cache.put(key, LandmarkFrame.from_landmarks(landmarks.landmark) if landmarks else None)
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.cache is not None:
+            self.cache.flush()
+        if self._pose is not None:
+            self._pose.close()
+            self._pose = None
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Temporal Landmark Smoothing
+MediaPipe landmarks jitter by a few thousandths from frame to frame, which
+makes the accuracy score flicker around the hold threshold. Each session runs
+a One Euro filter (Casiez et al., CHI 2012) over the x/y/z landmark array:
+heavy smoothing while the user holds still, little lag once they move.
+Because the filter works on real timestamps it behaves the same at 5 FPS as at 20.
+"""
+
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+
+from landmark_frame import LandmarkFrame
+
+logger = logging.getLogger(__name__)
+
+# Defaults for normalized image coordinates: cutoff in Hz, beta per (unit/second)
+DEFAULT_MIN_CUTOFF = 1.0
+DEFAULT_BETA = 10.0
+DEFAULT_DERIVATIVE_CUTOFF = 1.0
+
+
+class FilterSettings:
+    __slots__ = ('min_cutoff', 'beta', 'derivative_cutoff')
+
+    def __init__(self, min_cutoff=DEFAULT_MIN_CUTOFF, beta=DEFAULT_BETA, derivative_cutoff=DEFAULT_DERIVATIVE_CUTOFF):
+        """
+        Args:
+            min_cutoff: Cutoff frequency (Hz) while still - lower is smoother
+            beta: How fast the cutoff rises with speed - higher means less lag when moving
+            derivative_cutoff: Cutoff (Hz) for the speed estimate
+        """
+        self.min_cutoff = float(min_cutoff)
+        self.beta = float(beta)
+        self.derivative_cutoff = float(derivative_cutoff)
+
+    def __repr__(self):
+        return f"FilterSettings(min_cutoff={self.min_cutoff}, beta={self.beta})"
+
+
+def parse_pose_settings(spec, default):
+    """
+    Parse per-pose filter settings such as "yog3:0.5:5,yog6:2,yog1:off"
+    Args:
+        spec: Comma-separated pose_type:min_cutoff[:beta] entries ("off" disables smoothing)
+        default: FilterSettings supplying the unspecified values
+    Returns:
+        dict mapping pose_type to FilterSettings, or None for "off"
+    """
+    settings = {}
+    for item in (spec or '').split(','):
+        parts = [part.strip() for part in item.split(':')]
+        if len(parts) < 2 or not parts[0]:
+            continue
+        if parts[1].lower() == 'off':
+            settings[parts[0]] = None
+            continue
+        try:
+            settings[parts[0]] = FilterSettings(float(parts[1]),
+                                                float(parts[2]) if len(parts) > 2 else default.beta,
+                                                default.derivative_cutoff)
+        except ValueError:
+            logger.warning("⚠️ Ignoring invalid smoothing entry: %s", item)
+    return settings
+
+
+def smoothing_factor(elapsed, cutoff):
+    """Exponential smoothing weight of a new sample for a low-pass filter at `cutoff` Hz"""
+    r = 2 * math.pi * cutoff * elapsed
+    return r / (r + 1)
+
+
+class OneEuroState:
+    def __init__(self, values, timestamp, pose_type):
+        """Filter state of one session: last filtered values, their speed and the pose it belongs to"""
+        self.values = values
+        self.derivative = np.zeros_like(values)
+        self.timestamp = timestamp
+        self.pose_type = pose_type
+
+    def step(self, values, timestamp, settings):
+        """
+        Filter one frame
+        Args:
+            values: (N, 3) float64 raw x/y/z
+            timestamp: Frame time in seconds
+            settings: FilterSettings
+        Returns:
+            (N, 3) filtered values
+        """
+        elapsed = max(timestamp - self.timestamp, 1e-3)
+        speed = (values - self.values) / elapsed
+        alpha = smoothing_factor(elapsed, settings.derivative_cutoff)
+        self.derivative += alpha * (speed - self.derivative)
+
+        # Per coordinate cutoff: still landmarks are smoothed hard, moving ones follow quickly
+        cutoff = settings.min_cutoff + settings.beta * np.abs(self.derivative)
+        r = (2 * math.pi * elapsed) * cutoff
+        self.values += (r / (r + 1)) * (values - self.values)
+        self.timestamp = timestamp
+        return self.values
+
+
+class LandmarkSmoother:
+    def __init__(self, settings=None, pose_settings=None, reset_after=1.0, enabled=True):
+        """
+        Args:
+            settings: Default FilterSettings
+            pose_settings: Per-pose FilterSettings (None entries disable smoothing for that pose)
+            reset_after: Seconds between frames after which the filter restarts from the new frame
+            enabled: False passes landmarks through untouched
+        """
+        self.settings = settings or FilterSettings()
+        self.pose_settings = dict(pose_settings or {})
+        self.reset_after = reset_after
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._frames = 0
+        self._resets = 0
+
+    def settings_for(self, pose_type):
+        """FilterSettings for a pose, or None when it is not smoothed"""
+        if not self.enabled:
+            return None
+        return self.pose_settings.get(pose_type, self.settings)
+
+    def smooth(self, session, landmarks, pose_type, timestamp=None):
+        """
+        Filter a session's newly detected landmarks
+        Args:
+            session: PoseSession holding the filter state
+            landmarks: LandmarkFrame (empty frames reset the filter)
+            pose_type: Requested pose; switching poses restarts the filter
+            timestamp: Frame time in seconds (defaults to now)
+        Returns:
+            LandmarkFrame with smoothed x/y/z (visibility unchanged)
+        """
+        settings = self.settings_for(pose_type)
+        if settings is None or session is None:
+            return landmarks
+        if not landmarks:
+            session.landmark_filter = None
+            return landmarks
+
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        points = landmarks.data[:, :3].astype(np.float64)
+        state = session.landmark_filter
+        restart = (state is None or state.pose_type != pose_type or state.values.shape != points.shape
+                   or timestamp - state.timestamp > self.reset_after)
+        with self._lock:
+            self._frames += 1
+            if restart:
+                self._resets += 1
+        if restart:
+            # First frame of a run is its own estimate
+            session.landmark_filter = OneEuroState(points, timestamp, pose_type)
+            return landmarks
+
+        filtered = state.step(points, timestamp, settings)
+        data = landmarks.data.copy()
+        data[:, :3] = filtered
+        return LandmarkFrame(data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "min_cutoff": self.settings.min_cutoff,
+                "beta": self.settings.beta,
+                "pose_overrides": {pose: (s.min_cutoff, s.beta) if s else 'off' for pose, s in self.pose_settings.items()},
+                "frames": self._frames,
+                "resets": self._resets
+            }
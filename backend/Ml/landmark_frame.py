@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Landmark Frame
+One detected pose as a contiguous (33, 4) float32 array of x/y/z/visibility.
+Detection, analysis and the worker hand-off all pass this around; the list
+of landmark dicts the API returns is only built at the response boundary.
+"""
+
+import numpy as np
+
+# Column layout of LandmarkFrame.data
+X, Y, Z, VISIBILITY = 0, 1, 2, 3
+
+# The Tasks API does not report visibility; detected landmarks get this value
+DEFAULT_VISIBILITY = 0.8
+
+LANDMARK_NAMES = (
+    'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer',
+    'right_eye_inner', 'right_eye', 'right_eye_outer',
+    'left_ear', 'right_ear', 'mouth_left', 'mouth_right',
+    'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist', 'left_pinky', 'right_pinky',
+    'left_index', 'right_index', 'left_thumb', 'right_thumb',
+    'left_hip', 'right_hip', 'left_knee', 'right_knee',
+    'left_ankle', 'right_ankle', 'left_heel', 'right_heel',
+    'left_foot_index', 'right_foot_index'
+)
+
+
+class LandmarkFrame:
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        """
+        Args:
+            data: (N, 4) x/y/z/visibility array, or (N, 3) x/y/z (visibility defaults)
+        """
+        data = np.asarray(data, dtype=np.float32)
+        if data.ndim != 2 or data.shape[1] not in (3, 4):
+            raise ValueError(f"expected an (N, 3) or (N, 4) landmark array, got {data.shape}")
+        if data.shape[1] == 3:
+            padded = np.empty((len(data), 4), dtype=np.float32)
+            padded[:, :3] = data
+            padded[:, VISIBILITY] = DEFAULT_VISIBILITY
+            data = padded
+        self.data = data
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, 4), dtype=np.float32))
+
+    @classmethod
+    def from_landmarks(cls, landmarks):
+        """Pack MediaPipe landmark objects (Tasks or solutions API)"""
+        data = np.empty((len(landmarks), 4), dtype=np.float32)
+        for i, lm in enumerate(landmarks):
+            visibility = getattr(lm, 'visibility', None)
+            data[i] = (lm.x, lm.y, lm.z, DEFAULT_VISIBILITY if visibility is None else visibility)
+        return cls(data)
+
+    @classmethod
+    def from_dicts(cls, landmarks):
+        """Pack API-style landmark dicts (x/y and optional z/visibility keys)"""
+        return cls(np.array([
+            (lm['x'], lm['y'], lm.get('z', 0.0), lm.get('visibility', DEFAULT_VISIBILITY))
+            for lm in landmarks
+        ], dtype=np.float32).reshape(-1, 4))
+
+    @classmethod
+    def coerce(cls, landmarks):
+        """Return `landmarks` as a LandmarkFrame, converting dict lists and raw arrays"""
+        if isinstance(landmarks, cls):
+            return landmarks
+        if isinstance(landmarks, np.ndarray):
+            return cls(landmarks)
+        if not landmarks:
+            return cls.empty()
+        if isinstance(landmarks[0], dict):
+            return cls.from_dicts(landmarks)
+        return cls.from_landmarks(landmarks)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __bool__(self):
+        return len(self.data) > 0
+
+    def __repr__(self):
+        return f"LandmarkFrame({len(self.data)} landmarks)"
+
+    def x(self, index):
+        return float(self.data[index, X])
+
+    def y(self, index):
+        return float(self.data[index, Y])
+
+    def z(self, index):
+        return float(self.data[index, Z])
+
+    def visibility(self, index):
+        return float(self.data[index, VISIBILITY])
+
+    @property
+    def points(self):
+        """(N, 3) x/y/z view"""
+        return self.data[:, :3]
+
+    def to_json(self, names=False, min_visibility=None):
+        """
+        Build the API landmark list
+        Args:
+            names: Add each landmark's name
+            min_visibility: Leave out landmarks at or below this visibility
+        Returns:
+            list of {"x", "y", "z", "visibility"[, "name"], "index"} dicts
+        """
+        landmarks = []
+        for i, (x, y, z, visibility) in enumerate(self.data.tolist()):
+            if min_visibility is not None and visibility <= min_visibility:
+                continue
+            # Visibility is a confidence - drop the float32 noise (0.8 -> 0.800000011920929)
+            landmark = {'x': x, 'y': y, 'z': z, 'visibility': round(visibility, 4)}
+            if names:
+                landmark['name'] = LANDMARK_NAMES[i] if i < len(LANDMARK_NAMES) else f"landmark_{i}"
+            landmark['index'] = i
+            landmarks.append(landmark)
+        return landmarks
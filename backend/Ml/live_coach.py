@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Live Pose Coach
+Webcam coaching against a reference pose: the joints off by more than the
+tolerance are circled and the correction is listed, next to a similarity
+score. Replaces main1.py-main6.py, which differed only in their `bike`
+number; the reference is now chosen on the command line.
+
+Capture, inference and display run in separate threads connected by
+single-slot latest-frame queues, so a slow detector drops stale frames
+instead of delaying the picture. Each inference produces an Overlay (score
+panel, skeleton, circled joints) that is drawn onto every camera frame until
+the next inference replaces it: the display runs at camera rate, the
+detector at whatever rate the CPU allows.
+
+Usage:
+    python live_coach.py --list
+    python live_coach.py --reference warrior2
+    python live_coach.py --reference 7 --camera 1          # old `bike` numbers work too
+    python live_coach.py --reference tree_pose             # measured per-pose target
+    python live_coach.py --camera Video/a.mp4 --no-window --duration 20 --json coach.json
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from build_reference_library import SKELETON_EDGES, Detector, make_record, make_thumbnail
+from detector_pool import MODEL_ASSET_PATH, create_pose_detector
+from frame_preprocessing import MAX_INPUT_SIDE, fit_to_max_side
+from joint_angles import JOINT_ANGLES, compute_joint_angles
+from landmark_cache import DEFAULT_CACHE_DIR, LandmarkCache, file_hash, model_version
+from landmark_frame import LandmarkFrame
+from reference_library import (DEFAULT_LIBRARY_PATH, ML_DIR, REFERENCE, REFERENCE_IMAGES, ReferencePose,
+                               load_reference_library)
+
+logger = logging.getLogger(__name__)
+
+FEED_WINDOW = 'MediaPipe Feed'
+TARGET_WINDOW = 'target'
+TARGET_WINDOW_SIZE = (560, 360)
+
+# Reference image used for selector numbers without their own image (the scripts' `else` branch)
+FALLBACK_REFERENCE = 'side_plank'
+
+# Degrees a joint may differ from the target before it is corrected
+DEFAULT_TOLERANCE = 15
+
+# (too small, too large) correction per joint, in JOINT_ANGLES order
+CORRECTIONS = (
+    ("Extend the right arm at elbow", "Fold the right arm at elbow"),
+    ("Extend the left arm at elbow", "Fold the left arm at elbow"),
+    ("Lift your right arm", "Put your arm down a little"),
+    ("Lift your left arm", "Put your arm down a little"),
+    ("Extend the angle at right hip", "Reduce the angle at right hip"),
+    ("Extend the angle at left hip", "Reduce the angle at left hip"),
+    ("Extend the angle of right knee", "Reduce the angle at right knee"),
+    ("Extend the angle at left knee", "Reduce the angle at left knee")
+)
+JOINT_VERTICES = tuple(vertex for _, _, vertex, _ in JOINT_ANGLES)
+
+# Score panel (BGR), laid out like the old scripts: 370x370 in the top-left corner
+PANEL_SIZE = (370, 370)
+TEXT_COLOR = (0, 153, 0)
+ALERT_COLOR = (0, 0, 255)
+SKELETON_COLOR = (0, 255, 0)
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+SKELETON_POINTS = tuple(sorted({index for edge in SKELETON_EDGES for index in edge}))
+
+
+class LatestSlot:
+    def __init__(self):
+        """Bounded queue of one item: put() replaces an unread item, so readers always get the newest"""
+        self._condition = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self.put_count += 1
+            self._condition.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Take the newest item
+        Args:
+            timeout: Seconds to wait for one (0 polls)
+        Returns:
+            The item, or None on timeout or once the slot is closed
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+def keypoint_distance(points, target):
+    """
+    The scripts' dif_compare: sqrt(2 * (1 - mean cosine similarity)) over the per-landmark x/y/z vectors
+    Args:
+        points, target: (33, 3) landmark arrays
+    """
+    dots = np.einsum('ij,ij->i', points, target)
+    norms = np.linalg.norm(points, axis=1) * np.linalg.norm(target, axis=1)
+    similarity = float(np.mean(dots / np.maximum(norms, 1e-12)))
+    return math.sqrt(max(0.0, 2 * (1 - round(similarity, 2))))
+
+
+def angle_distance(angles, target):
+    """The scripts' diff_compare_angle: mean of |angle - target| relative to their mean"""
+    angles = np.asarray(angles, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    mean = (angles + target) / 2
+    return float(np.mean(np.abs(angles - target) / np.where(mean > 0, mean, 1.0)))
+
+
+def pose_corrections(angles, target, tolerance=DEFAULT_TOLERANCE):
+    """
+    Joints outside the tolerance
+    Returns:
+        [(row, joint index, message)] where row orders the messages on the panel
+    """
+    corrections = []
+    for joint, (angle, goal) in enumerate(zip(angles, target)):
+        if angle < goal - tolerance:
+            corrections.append((2 * joint, joint, CORRECTIONS[joint][0]))
+        elif angle > goal + tolerance:
+            corrections.append((2 * joint + 1, joint, CORRECTIONS[joint][1]))
+    return corrections
+
+
+def render_panel(corrections, score):
+    """Score panel with one line per correction, rendered once per inference"""
+    width, height = PANEL_SIZE
+    panel = np.full((height, width, 3), 255, dtype=np.uint8)
+    cv2.putText(panel, "Score:", (10, 30), FONT, 0.7, TEXT_COLOR, 2, cv2.LINE_AA)
+    cv2.putText(panel, str(score), (80, 30), FONT, 1, ALERT_COLOR, 2, cv2.LINE_AA)
+    cv2.putText(panel, "FIGHTING!" if corrections else "PERFECT", (170, 30), FONT, 1, ALERT_COLOR, 2, cv2.LINE_AA)
+    for row, _, message in corrections:
+        cv2.putText(panel, message, (10, 60 + 20 * row), FONT, 0.7, TEXT_COLOR, 2, cv2.LINE_AA)
+    return panel
+
+
+class Overlay:
+    def __init__(self, frame_id, captured_at, points=None, corrections=(), score=None):
+        """
+        What one inference adds to the picture, reused for every displayed frame until the next one
+        Args:
+            frame_id: Camera frame the inference ran on
+            captured_at: time.monotonic() when that frame was captured
+            points: (33, 2) normalized landmark x/y, None when no pose was detected
+            corrections: pose_corrections() result
+            score: Similarity score 0-100
+        """
+        self.frame_id = frame_id
+        self.captured_at = captured_at
+        self.points = points
+        self.corrections = corrections
+        self.score = score
+        self.panel = render_panel(corrections, score) if points is not None else None
+
+    def draw(self, image):
+        """Draw onto a BGR frame in place: a panel copy plus a few lines and circles"""
+        if self.points is None:
+            return image
+        height, width = image.shape[:2]
+        panel_height, panel_width = min(height, self.panel.shape[0]), min(width, self.panel.shape[1])
+        image[:panel_height, :panel_width] = self.panel[:panel_height, :panel_width]
+
+        pixels = np.round(self.points * (width, height)).astype(int)
+        for a, b in SKELETON_EDGES:
+            cv2.line(image, tuple(pixels[a]), tuple(pixels[b]), SKELETON_COLOR, 3, cv2.LINE_AA)
+        for index in SKELETON_POINTS:
+            cv2.circle(image, tuple(pixels[index]), 4, ALERT_COLOR, -1, cv2.LINE_AA)
+        for _, joint, _ in self.corrections:
+            cv2.circle(image, tuple(pixels[JOINT_VERTICES[joint]]), 30, ALERT_COLOR, 5)
+        return image
+
+
+class Coach:
+    def __init__(self, reference, tolerance=DEFAULT_TOLERANCE):
+        """Scores detections against one reference pose"""
+        self.reference = reference
+        self.tolerance = tolerance
+        self.target_angles = reference.target_angles()
+        self.target_points = np.asarray(reference.landmarks[:, :3], dtype=np.float32)
+
+    def overlay(self, frame_id, captured_at, landmarks):
+        """Overlay for a detection (LandmarkFrame, or None when no pose was found)"""
+        if landmarks is None:
+            return Overlay(frame_id, captured_at)
+        angles = [int(angle) for angle in compute_joint_angles(landmarks.data)]
+        # The score follows whichever measure is closer to the target, as before
+        distance = min(keypoint_distance(landmarks.points, self.target_points),
+                       angle_distance(angles, self.target_angles))
+        return Overlay(frame_id, captured_at, landmarks.data[:, :2].copy(),
+                       pose_corrections(angles, self.target_angles, self.tolerance), int((1 - distance) * 100))
+
+
+def reference_choices(library):
+    """[(name, description)] of everything --reference accepts"""
+    choices = [(name, f"{image} (selector {selector})") for name, image, _, selector in REFERENCE_IMAGES]
+    if library is not None:
+        choices += [(pose.name, f"target measured over {pose.samples} images")
+                    for pose in library if pose.kind != REFERENCE]
+    return choices
+
+
+def detect_reference(name, image, pose, selector, model_path, cache_dir):
+    """Reference record for an image the library lacks (or holds an older version of), detected now"""
+    path = os.path.join(ML_DIR, image)
+    if not os.path.isfile(path):
+        raise SystemExit(f"❌ Reference image {image} not found")
+    if not os.path.isfile(model_path):
+        raise SystemExit(f"❌ Model {model_path} not found - needed to detect reference image {image}")
+    version = model_version(model_path, 'tasks-side0')
+    detector = Detector(model_path, LandmarkCache(version, cache_dir) if cache_dir else None)
+    try:
+        landmarks = detector.landmarks(path)
+    finally:
+        detector.close()
+    if landmarks is None:
+        raise SystemExit(f"❌ No pose detected in reference image {image}")
+    return ReferencePose(make_record(REFERENCE, name, pose, selector, image, file_hash(path), version, 1,
+                                     landmarks, compute_joint_angles(landmarks), make_thumbnail(path, landmarks)))
+
+
+def resolve_reference(choice, library_path=DEFAULT_LIBRARY_PATH, model_path=MODEL_ASSET_PATH,
+                      cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Reference pose for a --reference value
+    Args:
+        choice: Reference image name, old `bike` selector number, or pose_configs key of a measured target
+    Returns:
+        ReferencePose from the library, or detected from the reference image when the library lacks it
+    """
+    library = load_reference_library(library_path)
+    images = {name: entry for entry in REFERENCE_IMAGES for name in (entry[0], str(entry[3]))}
+    if choice.isdigit() and choice not in images:
+        choice = FALLBACK_REFERENCE
+    entry = images.get(choice)
+    if entry is None:
+        target = library.target(choice) if library is not None else None
+        if target is None:
+            raise SystemExit(f"❌ Unknown reference {choice!r} - see --list")
+        return target
+
+    reference = library.for_image(entry[1]) if library is not None else None
+    if reference is None:
+        logger.info("📚 %s is not in the reference library - detecting %s", entry[0], entry[1])
+        reference = detect_reference(*entry, model_path, cache_dir)
+    return reference
+
+
+def open_capture(source):
+    """VideoCapture for a camera index or a video file; file frames are paced at the file's FPS"""
+    capture = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not capture.isOpened():
+        raise SystemExit(f"❌ Cannot open camera/video {source}")
+    interval = 0.0
+    if not source.isdigit():
+        interval = 1.0 / (capture.get(cv2.CAP_PROP_FPS) or 30.0)
+    return capture, interval
+
+
+class LiveCoach:
+    def __init__(self, capture, detector, coach, interval=0.0, max_side=MAX_INPUT_SIDE):
+        """
+        Three-stage pipeline; the caller runs the render loop on its own (main) thread, which
+        cv2.imshow needs on some platforms
+        Args:
+            capture: Opened cv2.VideoCapture
+            detector: PoseLandmarker in VIDEO running mode
+            coach: Coach scoring each detection
+            interval: Seconds between frames for video files (0 for cameras, which pace themselves)
+            max_side: Long side frames are downscaled to before detection
+        """
+        self.capture = capture
+        self.detector = detector
+        self.coach = coach
+        self.interval = interval
+        self.max_side = max_side
+        self.inference_frames = LatestSlot()
+        self.display_frames = LatestSlot()
+        self.overlays = LatestSlot()
+        self.stop_event = threading.Event()
+        self.error = None
+        self.inference_ms = []
+        # Kept on the instance so an interrupted render() still reports them
+        self.displayed = 0
+        self.overlay_age_ms = []
+        self._threads = []
+
+    def start(self):
+        for name, target in (('capture', self._capture_loop), ('inference', self._inference_loop)):
+            thread = threading.Thread(target=target, name=f"coach-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self.stop_event.set()
+        for slot in (self.inference_frames, self.display_frames, self.overlays):
+            slot.close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def _capture_loop(self):
+        """Read frames as fast as the camera delivers them and hand each to both consumers"""
+        frame_id = 0
+        next_frame = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                ok, frame = self.capture.read()
+                if not ok:
+                    break
+                # Consumers never write into `frame`, so both share it
+                item = (frame_id, time.monotonic(), frame)
+                self.inference_frames.put(item)
+                self.display_frames.put(item)
+                frame_id += 1
+                if self.interval:
+                    next_frame += self.interval
+                    time.sleep(max(0.0, next_frame - time.monotonic()))
+        finally:
+            self.stop_event.set()
+            self.display_frames.close()
+
+    def _inference_loop(self):
+        """Detect on the newest frame only and publish its overlay"""
+        last_timestamp = -1
+        try:
+            while not self.stop_event.is_set():
+                item = self.inference_frames.get(timeout=0.1)
+                if item is None:
+                    continue
+                frame_id, captured_at, frame = item
+                rgb = cv2.cvtColor(fit_to_max_side(frame, self.max_side), cv2.COLOR_BGR2RGB)
+                # VIDEO mode needs strictly increasing timestamps
+                timestamp = last_timestamp = max(last_timestamp + 1, int(captured_at * 1000))
+                started = time.perf_counter()
+                result = self.detector.detect_for_video(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb),
+                                                        timestamp)
+                landmarks = LandmarkFrame.from_landmarks(result.pose_landmarks[0]) if result.pose_landmarks else None
+                self.overlays.put(self.coach.overlay(frame_id, captured_at, landmarks))
+                self.inference_ms.append((time.perf_counter() - started) * 1000)
+        except Exception as e:
+            logger.exception("❌ Inference failed")
+            self.error = e
+            self.stop_event.set()
+            self.display_frames.close()
+
+    def render(self, height, window=True, duration=None):
+        """
+        Display loop: newest frame, resized, with the newest overlay drawn on it
+        Args:
+            height: Display height in pixels (0 keeps the camera size)
+            window: Show the frames; False only measures
+            duration: Seconds to run (None until 'q' or the end of the video)
+        Returns:
+            Frames displayed and the overlay age (ms) per displayed frame
+        """
+        overlay = None
+        deadline = time.monotonic() + duration if duration else None
+        while not self.stop_event.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            item = self.display_frames.get(timeout=0.5)
+            if item is None:
+                continue
+            _, captured_at, frame = item
+            overlay = self.overlays.get(timeout=0) or overlay
+
+            if height and frame.shape[0] != height:
+                width = int(frame.shape[1] * height / frame.shape[0])
+                image = cv2.resize(frame, (width, height))
+            else:
+                image = frame.copy()
+            if overlay is not None:
+                overlay.draw(image)
+                self.overlay_age_ms.append((captured_at - overlay.captured_at) * 1000)
+            self.displayed += 1
+
+            if window:
+                cv2.imshow(FEED_WINDOW, image)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+        return self.displayed, self.overlay_age_ms
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 1) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live yoga pose coaching against a reference pose")
+    parser.add_argument('--reference', default='warrior2',
+                        help="Reference image name, old `bike` selector number, or measured pose target")
+    parser.add_argument('--list', action='store_true', help="List the references and exit")
+    parser.add_argument('--camera', default='0', help="Camera index or video file")
+    parser.add_argument('--model', default=MODEL_ASSET_PATH)
+    parser.add_argument('--library', default=DEFAULT_LIBRARY_PATH, help="Reference library file")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="Landmark cache for reference images missing from the library")
+    parser.add_argument('--tolerance', type=int, default=DEFAULT_TOLERANCE, help="Degrees before a joint is corrected")
+    parser.add_argument('--height', type=int, default=860, help="Display height (0 keeps the camera size)")
+    parser.add_argument('--max-side', type=int, default=MAX_INPUT_SIDE, help="Detector input long side (0 = full)")
+    parser.add_argument('--no-window', action='store_true', help="Run headless and only report the rates")
+    parser.add_argument('--duration', type=float, default=None, help="Seconds to run")
+    parser.add_argument('--json', default=None, help="Write the run statistics to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.list:
+        for name, description in reference_choices(load_reference_library(args.library)):
+            print(f"{name:>16}  {description}")
+        return
+
+    # Checked first: a reference missing from the library is detected with this model too
+    if not os.path.isfile(args.model):
+        raise SystemExit(f"❌ Model {args.model} not found")
+    reference = resolve_reference(args.reference, args.library, args.model, args.cache_dir)
+    print(f"🎯 Reference: {reference.name} ({reference.source}), target angles {reference.target_angles()}")
+
+    capture, interval = open_capture(args.camera)
+    detector = create_pose_detector(args.model, 'VIDEO')
+    coach = LiveCoach(capture, detector, Coach(reference, args.tolerance), interval, args.max_side)
+    window = not args.no_window
+    if window:
+        cv2.imshow(TARGET_WINDOW, cv2.resize(reference.thumbnail, TARGET_WINDOW_SIZE, interpolation=cv2.INTER_AREA))
+
+    started = time.monotonic()
+    coach.start()
+    try:
+        coach.render(args.height, window, args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        elapsed = time.monotonic() - started
+        coach.stop()
+        capture.release()
+        detector.close()
+        if window:
+            cv2.destroyAllWindows()
+    if coach.error is not None:
+        raise SystemExit(f"❌ Inference failed: {coach.error}")
+
+    captured = coach.display_frames.put_count
+    inferred = len(coach.inference_ms)
+    stats = {
+        "reference": reference.name,
+        "seconds": round(elapsed, 2),
+        "camera_fps": round(captured / elapsed, 1) if elapsed else 0.0,
+        "display_fps": round(coach.displayed / elapsed, 1) if elapsed else 0.0,
+        "inference_fps": round(inferred / elapsed, 1) if elapsed else 0.0,
+        "inference_ms_p50": percentile(coach.inference_ms, 50),
+        "inference_ms_p95": percentile(coach.inference_ms, 95),
+        "frames_skipped_by_inference": coach.inference_frames.dropped,
+        "overlay_age_ms_p50": percentile(coach.overlay_age_ms, 50),
+        "overlay_age_ms_p95": percentile(coach.overlay_age_ms, 95)
+    }
+    print(f"\n📊 {elapsed:.1f}s: camera {stats['camera_fps']} FPS, display {stats['display_fps']} FPS, "
+          f"inference {stats['inference_fps']} FPS (p50 {stats['inference_ms_p50']} ms, "
+          f"p95 {stats['inference_ms_p95']} ms)")
+    print(f"   {stats['frames_skipped_by_inference']} frames skipped by inference, overlay age "
+          f"p50 {stats['overlay_age_ms_p50']} ms / p95 {stats['overlay_age_ms_p95']} ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+        print(f"💾 Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
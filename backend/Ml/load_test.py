@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Detect-Pose Load Test
+Simulates N concurrent live sessions against /api/ml/detect-pose. Each
+session keeps one HTTP connection and, like the web client, sends its next
+frame once the previous one is answered and the frame interval has passed.
+Frames come from Video/TEST/<pose>/ images or from a video file, re-encoded
+the way the web client captures them (640x480 JPEG).
+
+Reports throughput, p50/p95/p99 latency, busy/superseded/reused/error rates,
+how many sessions kept up with the target frame rate, and CPU use of this
+client and (with --spawn or --server-pid) of the server and its workers.
+
+Usage:
+    python load_test.py --spawn --sessions 4 --fps 20 --duration 30
+    python load_test.py --url http://127.0.0.1:5000 --sessions 8 --fps 8 --upload raw
+    python load_test.py --video Video/a.mp4 --pose yog3 --sessions 2 --json load.json
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+
+import cv2
+import numpy as np
+
+from bench_resolution import load_test_set
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+UPLOAD_MODES = ('json', 'raw')
+
+# Outcomes a frame can end in
+OK, REUSED, SUPERSEDED, BUSY, ERROR = 'ok', 'reused', 'superseded', 'busy', 'error'
+
+
+def encode_frame(image, width, height, quality):
+    """Re-encode a BGR image the way the web client captures webcam frames"""
+    resized = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode('.jpg', resized, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes() if ok else None
+
+
+def load_image_frames(test_dir, limit, pose, args):
+    """[(jpeg bytes, pose_type)] from the labeled test images"""
+    frames = []
+    for path, _, pose_type in load_test_set(test_dir, limit):
+        if pose and pose != pose_type:
+            continue
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        encoded = encode_frame(image, args.width, args.height, args.jpeg_quality)
+        if encoded:
+            frames.append((encoded, pose_type))
+    return frames
+
+
+def load_video_frames(path, pose_type, max_frames, args):
+    """[(jpeg bytes, pose_type)] from evenly spaced frames of a video"""
+    capture = cv2.VideoCapture(path)
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or max_frames
+    step = max(total // max_frames, 1)
+    frames = []
+    index = 0
+    while len(frames) < max_frames:
+        ok, image = capture.read()
+        if not ok:
+            break
+        if index % step == 0:
+            encoded = encode_frame(image, args.width, args.height, args.jpeg_quality)
+            if encoded:
+                frames.append((encoded, pose_type))
+        index += 1
+    capture.release()
+    return frames
+
+
+def request_body(frame, pose_type, session_id, upload):
+    """(body, headers) for one detect-pose request"""
+    if upload == 'raw':
+        return frame, {'Content-Type': 'image/jpeg', 'X-Pose-Type': pose_type, 'X-Session-Id': session_id}
+    payload = {
+        'image': 'data:image/jpeg;base64,' + base64.b64encode(frame).decode('ascii'),
+        'pose_type': pose_type,
+        'session_id': session_id,
+        'user_name': 'LoadTest'
+    }
+    return json.dumps(payload).encode('utf-8'), {'Content-Type': 'application/json'}
+
+
+def classify(status, body):
+    """Outcome of one response"""
+    if status == 503:
+        return BUSY
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return ERROR
+    if data.get('superseded'):
+        return SUPERSEDED
+    if status != 200 or not data.get('success'):
+        return ERROR
+    return REUSED if data.get('reused') else OK
+
+
+class Session(threading.Thread):
+    def __init__(self, index, url, frames, args, start_at, stop_at):
+        """One simulated client: sends frames at the target rate until stop_at"""
+        super().__init__(name=f"session-{index}", daemon=True)
+        self.index = index
+        self.url = url
+        self.frames = frames
+        self.args = args
+        self.start_at = start_at
+        self.stop_at = stop_at
+        self.session_id = f"load-{index}-{uuid.uuid4().hex[:8]}"
+        # (sent at, latency seconds, outcome)
+        self.records = []
+
+    def connect(self):
+        return http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=self.args.timeout)
+
+    def run(self):
+        interval = 1.0 / self.args.fps
+        connection = self.connect()
+        position = self.index * 7  # Sessions start at different frames
+        # Spread session starts over one frame interval
+        next_send = self.start_at + interval * self.index / max(self.args.sessions, 1)
+        while True:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sent = time.perf_counter()
+            if sent >= self.stop_at:
+                break
+            frame, pose_type = self.frames[position % len(self.frames)]
+            position += 1
+            body, headers = request_body(frame, self.args.pose or pose_type, self.session_id, self.args.upload)
+            hint_ms = None
+            try:
+                connection.request('POST', self.url.path or '/api/ml/detect-pose', body=body, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+                outcome = classify(response.status, payload)
+                if self.args.honor_hints and outcome != ERROR:
+                    hint_ms = json.loads(payload).get('next_frame_interval_ms')
+            except (OSError, http.client.HTTPException):
+                outcome = ERROR
+                connection.close()
+                connection = self.connect()
+            self.records.append((sent, time.perf_counter() - sent, outcome))
+
+            # Closed loop like the web client: never more than one frame in flight, no catching up
+            next_send = max(sent + interval, time.perf_counter())
+            if hint_ms:
+                next_send = max(next_send, sent + hint_ms / 1000)
+        connection.close()
+
+
+def process_cpu_seconds(pid):
+    """User + system CPU seconds of a process and its direct children (Linux /proc), or None"""
+    ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+    total = 0.0
+    found = False
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        # Fields after the command: state ppid ... utime(12) stime(13)
+        if int(entry) == pid or int(fields[1]) == pid:
+            total += (int(fields[11]) + int(fields[12])) / ticks
+            found = found or int(entry) == pid
+    return total if found else None
+
+
+def wait_for_health(base_url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/health', timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def spawn_server(base_url, log_path):
+    """Start app.py (it always listens on port 5000) and wait until /health answers"""
+    log = open(log_path, 'w') if log_path else subprocess.DEVNULL
+    process = subprocess.Popen([sys.executable, 'app.py'], cwd=ML_DIR, stdout=log, stderr=subprocess.STDOUT)
+    if not wait_for_health(base_url, 120):
+        process.terminate()
+        raise SystemExit("❌ Spawned server did not become healthy within 120s")
+    return process
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 1) if len(values) else None
+
+
+def summarize(sessions, args, measure_from, measure_to, client_cpu, server_cpu):
+    """Aggregate the measured window (after warm-up) of every session"""
+    window = max(measure_to - measure_from, 1e-9)
+    records = [r for s in sessions for r in s.records if measure_from <= r[0] < measure_to]
+    outcomes = {name: sum(1 for r in records if r[2] == name) for name in (OK, REUSED, SUPERSEDED, BUSY, ERROR)}
+    answered = [r[1] for r in records if r[2] in (OK, REUSED)]
+    total = len(records)
+
+    session_fps = []
+    for session in sessions:
+        served = sum(1 for r in session.records if measure_from <= r[0] < measure_to and r[2] in (OK, REUSED))
+        session_fps.append(served / window)
+    keeping_up = sum(1 for fps in session_fps if fps >= 0.9 * args.fps)
+
+    return {
+        'sessions': args.sessions,
+        'target_fps_per_session': args.fps,
+        'upload': args.upload,
+        'window_s': round(window, 1),
+        'requests': total,
+        'throughput_fps': round(total / window, 1),
+        'served_fps': round(len(answered) / window, 1),
+        'latency_ms': {
+            'p50': percentile(answered, 50),
+            'p95': percentile(answered, 95),
+            'p99': percentile(answered, 99),
+            'max': percentile(answered, 100)
+        },
+        'rates': {name: round(count / total, 4) if total else 0.0 for name, count in outcomes.items()},
+        'session_fps': {
+            'min': round(min(session_fps), 1) if session_fps else None,
+            'median': round(float(np.median(session_fps)), 1) if session_fps else None
+        },
+        'sessions_keeping_up': keeping_up,
+        'cpu': {
+            'client_cores': round(client_cpu / window, 2),
+            'server_cores': round(server_cpu / window, 2) if server_cpu is not None else None,
+            'machine_cores': os.cpu_count()
+        }
+    }
+
+
+def print_summary(summary):
+    latency = summary['latency_ms']
+    rates = summary['rates']
+    cpu = summary['cpu']
+    print(f"\n📊 {summary['sessions']} sessions x {summary['target_fps_per_session']:g} FPS "
+          f"({summary['upload']} uploads) over {summary['window_s']}s")
+    print(f"   requests: {summary['requests']}  throughput: {summary['throughput_fps']} req/s  "
+          f"served: {summary['served_fps']} frames/s")
+    print(f"   latency ms: p50={latency['p50']}  p95={latency['p95']}  p99={latency['p99']}  max={latency['max']}")
+    print(f"   rates: reused={rates[REUSED]:.1%}  superseded={rates[SUPERSEDED]:.1%}  "
+          f"busy={rates[BUSY]:.1%}  error={rates[ERROR]:.1%}")
+    print(f"   per-session FPS: min={summary['session_fps']['min']}  median={summary['session_fps']['median']}  "
+          f"keeping up (>=90% of target): {summary['sessions_keeping_up']}/{summary['sessions']}")
+    server = f"{cpu['server_cores']} cores" if cpu['server_cores'] is not None else "n/a (use --spawn or --server-pid)"
+    print(f"   CPU: server {server}, client {cpu['client_cores']} cores, machine has {cpu['machine_cores']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /api/ml/detect-pose with concurrent simulated sessions")
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="Base URL of the ML service")
+    parser.add_argument('--spawn', action='store_true', help="Start app.py locally for the run (port 5000)")
+    parser.add_argument('--server-log', help="With --spawn: write the server output here")
+    parser.add_argument('--server-pid', type=int, help="Measure CPU of an already running server")
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--fps', type=float, default=20.0, help="Target frames per second per session")
+    parser.add_argument('--duration', type=float, default=30.0, help="Measured seconds (after warm-up)")
+    parser.add_argument('--warmup', type=float, default=5.0, help="Seconds excluded from the results")
+    parser.add_argument('--upload', choices=UPLOAD_MODES, default='json',
+                        help="json = base64 data URL like the web client, raw = image/jpeg body")
+    parser.add_argument('--honor-hints', action='store_true', help="Wait next_frame_interval_ms between frames")
+    parser.add_argument('--test-dir', default=os.path.join(ML_DIR, 'Video', 'TEST'))
+    parser.add_argument('--limit', type=int, default=20, help="Max images per pose folder")
+    parser.add_argument('--video', help="Take frames from this video instead of the test images")
+    parser.add_argument('--max-frames', type=int, default=200, help="Frames taken from --video")
+    parser.add_argument('--pose', help="Send this pose_type for every frame (required with --video)")
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--jpeg-quality', type=int, default=60)
+    parser.add_argument('--timeout', type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument('--json', dest='json_path', help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    if args.video:
+        if not args.pose:
+            parser.error("--video needs --pose")
+        frames = load_video_frames(args.video, args.pose, args.max_frames, args)
+    else:
+        frames = load_image_frames(args.test_dir, args.limit, args.pose, args)
+    if not frames:
+        raise SystemExit("❌ No frames to send")
+    sizes = [len(frame) for frame, _ in frames]
+    print(f"🧪 {len(frames)} frames, {np.mean(sizes) / 1024:.1f} KB mean JPEG")
+
+    base_url = args.url.rstrip('/')
+    server = spawn_server(base_url, args.server_log) if args.spawn else None
+    server_pid = server.pid if server is not None else args.server_pid
+    endpoint = urllib.parse.urlsplit(base_url + '/api/ml/detect-pose')
+
+    try:
+        if not args.spawn and not wait_for_health(base_url, 5):
+            raise SystemExit(f"❌ No ML service answering at {base_url}/health")
+        start_at = time.perf_counter() + 0.5
+        measure_from = start_at + args.warmup
+        measure_to = measure_from + args.duration
+        sessions = [Session(i, endpoint, frames, args, start_at, measure_to) for i in range(args.sessions)]
+        for session in sessions:
+            session.start()
+
+        # CPU is sampled over the measured window only
+        time.sleep(max(measure_from - time.perf_counter(), 0))
+        client_start = sum(os.times()[:2])
+        server_start = process_cpu_seconds(server_pid) if server_pid else None
+        time.sleep(max(measure_to - time.perf_counter(), 0))
+        client_cpu = sum(os.times()[:2]) - client_start
+        server_end = process_cpu_seconds(server_pid) if server_pid else None
+        server_cpu = server_end - server_start if server_start is not None and server_end is not None else None
+
+        for session in sessions:
+            session.join(args.timeout + 1)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    summary = summarize(sessions, args, measure_from, measure_to, client_cpu, server_cpu)
+    print_summary(summary)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Wrote {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Pose Accuracy Analysis
+Entry point shared by the API and the inference workers. Per-pose scoring
+rules live in pose_rules.json and are compiled by pose_rules at import.
+"""
+
+import logging
+
+from joint_angles import ANGLE_INDEX, compute_joint_angles
+from landmark_frame import LandmarkFrame
+from pose_rules import POSE_RULES_PATH, PoseRuleSet, load_pose_rules
+
+logger = logging.getLogger(__name__)
+
+# Compiled once at startup; ML_POSE_RULES points at a custom rules file
+POSE_RULES = load_pose_rules(POSE_RULES_PATH)
+POSE_RULE_SET = PoseRuleSet(POSE_RULES)
+
+# pose_type that scores the frame against every pose and reports the best match
+AUTO_POSE_TYPE = 'auto'
+
+def get_pose_name(pose_type):
+    """Get pose name from pose type"""
+    if pose_type == AUTO_POSE_TYPE:
+        return 'Auto Detect'
+    rules = POSE_RULES.get(pose_type)
+    return rules.name if rules is not None else 'Unknown Pose'
+
+def analyze_pose_accuracy(landmarks, pose_type):
+    """Analyze pose accuracy with REAL feedback for every pose in the rules file.
+
+    `landmarks` is a LandmarkFrame; lists of landmark dicts are converted once up front.
+    """
+    
+    try:
+        landmarks = LandmarkFrame.coerce(landmarks)
+        # Calculate every joint angle in one vectorized pass
+        angles = compute_joint_angles(landmarks.data)
+        left_arm_angle = angles[ANGLE_INDEX['left_elbow']]
+        right_arm_angle = angles[ANGLE_INDEX['right_elbow']]
+        left_shoulder_angle = angles[ANGLE_INDEX['left_shoulder']]
+        right_shoulder_angle = angles[ANGLE_INDEX['right_shoulder']]
+        
+        logger.debug("🔍 Pose Analysis (%s): L_arm=%.1f°, R_arm=%.1f°, L_shoulder=%.1f°, R_shoulder=%.1f°",
+                     pose_type, left_arm_angle, right_arm_angle, left_shoulder_angle, right_shoulder_angle)
+        
+        rules = POSE_RULES.get(pose_type)
+        if rules is not None:
+            return rules.evaluate(landmarks, angles)
+        return analyze_generic_pose(left_arm_angle, right_arm_angle, left_shoulder_angle, right_shoulder_angle)
+            
+    except Exception as e:
+        logger.error("❌ Pose analysis error: %s", e)
+        return 30, ["Unable to analyze pose properly"], []
+
+def recognize_pose(landmarks):
+    """Score a frame against every pose in one pass.
+
+    Returns:
+        (best pose_type, its (score, feedback, corrections), {pose_type: score})
+    """
+    try:
+        landmarks = LandmarkFrame.coerce(landmarks)
+        pose_type, analysis, pose_scores = POSE_RULE_SET.recognize(landmarks)
+        if pose_type is None:
+            return AUTO_POSE_TYPE, analysis, pose_scores
+        logger.debug("🧭 Best match: %s (%s) - %.1f%%", pose_type, get_pose_name(pose_type), analysis[0])
+        return pose_type, analysis, pose_scores
+    except Exception as e:
+        logger.error("❌ Pose recognition error: %s", e)
+        return AUTO_POSE_TYPE, (30, ["Unable to analyze pose properly"], []), {}
+
+def analyze_frame(landmarks, pose_type):
+    """Analyze a frame for the requested pose, or for the best match when pose_type is "auto".
+
+    Returns:
+        (analyzed pose_type, (score, feedback, corrections), {pose_type: score} or None)
+    """
+    if pose_type == AUTO_POSE_TYPE:
+        return recognize_pose(landmarks)
+    return pose_type, analyze_pose_accuracy(landmarks, pose_type), None
+
+def analyze_generic_pose(left_arm_angle, right_arm_angle, left_shoulder_angle, right_shoulder_angle):
+    """Generic pose analysis for unknown poses"""
+    feedback = ["Pose detected - maintain good form"]
+    corrections = []
+    score = 65  # Moderate default score
+    return score, feedback, corrections
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Pose Hold Tracking
+A pose counts as completed once its accuracy stays at or above the threshold
+for the hold duration. Hold time is measured from frame arrival times, not
+frame counts, so clients can send frames at any (or a varying) rate. Any frame
+below the threshold, a pose change or a gap too long to vouch for restarts the hold.
+"""
+
+import threading
+import time
+
+
+class HoldState:
+    def __init__(self, pose_type, started_at):
+        """Current hold of one session"""
+        self.pose_type = pose_type
+        self.started_at = started_at
+        self.last_seen = started_at
+        self.completed = False
+
+
+class PoseHoldTracker:
+    def __init__(self, threshold=90.0, duration=2.0, max_gap=1.0):
+        """
+        Args:
+            threshold: Minimum accuracy score (0-100) that counts as holding the pose
+            duration: Seconds the pose must be held to complete it
+            max_gap: Longest gap between frames (seconds) that still continues a hold
+        """
+        self.threshold = threshold
+        self.duration = duration
+        self.max_gap = max_gap
+        self._lock = threading.Lock()
+        self._holds_started = 0
+        self._completed = 0
+
+    def update(self, session, response, timestamp=None):
+        """
+        Advance a session's hold with one frame result
+        Args:
+            session: PoseSession holding the hold state
+            response: detect-pose response dict (accuracy_score, pose_type, pose_detected)
+            timestamp: Frame time in seconds (defaults to now)
+        Returns:
+            dict with hold_seconds, hold_progress (0-1) and pose_completed
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        pose_type = response.get("pose_type")
+        holding = response.get("pose_detected") and response.get("accuracy_score", 0) >= self.threshold
+
+        state = session.hold
+        started = completed = False
+        if not holding:
+            state = session.hold = None
+        elif state is None or state.pose_type != pose_type or timestamp - state.last_seen > self.max_gap:
+            state = session.hold = HoldState(pose_type, timestamp)
+            started = True
+        else:
+            state.last_seen = timestamp
+
+        held = timestamp - state.started_at if state is not None else 0.0
+        if state is not None and not state.completed and held >= self.duration:
+            state.completed = completed = True
+
+        with self._lock:
+            self._holds_started += started
+            self._completed += completed
+        return {
+            "hold_seconds": round(held, 2),
+            "hold_progress": round(min(held / self.duration, 1.0), 3) if self.duration > 0 else 1.0,
+            "pose_completed": state is not None and state.completed
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "duration_s": self.duration,
+                "max_gap_s": self.max_gap,
+                "holds_started": self._holds_started,
+                "completed": self._completed
+            }
@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Pose Rule Engine
+Per-pose scoring is data, not code: pose_rules.json lists each pose's derived
+features, threshold buckets (score, feedback, correction), gates that end the
+analysis early, overrides and the summary tiers. Every pose is compiled once
+into index arrays, so scoring a frame is a few vectorized array operations
+plus assembling the chosen buckets' messages.
+
+Table format (per pose_type):
+    name            Display name
+    min_landmarks   Fewer landmarks -> "Cannot detect pose" (0 disables the check)
+    features        name -> expression; expressions are leaves ("angle.left_knee",
+                    "x.left_wrist", "y.nose", an earlier feature, a number) or
+                    [op, args...] with op in abs/add/sub/div/mean/min/max
+    gates           First matching gate returns its score/feedback/corrections as-is
+    rules           Each rule scores one aspect; its first bucket whose "when"
+                    clauses all hold is chosen (the last bucket has no "when")
+    overrides       First matching override replaces all rule results
+    summary         Score tiers adding a headline to the feedback
+Clauses are [lhs, op, rhs] with op in >=, >, <=, < and rhs a number or feature.
+
+PoseRuleSet merges every compiled pose into one program over a shared leaf
+buffer, so a frame can be scored against all poses in a single pass.
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+
+from joint_angles import ANGLE_NAMES, compute_joint_angles
+from landmark_frame import LANDMARK_NAMES
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pose_rules.json')
+POSE_RULES_PATH = os.environ.get('ML_POSE_RULES', DEFAULT_RULES_PATH)
+
+COMPARISONS = ('>=', '>', '<=', '<')
+OPERATORS = {'abs': 1, 'add': 2, 'sub': 2, 'div': 2, 'min': None, 'max': None}
+
+# Value buffer layout: joint angles, then x/y of every landmark, then constants and features
+ANGLE_OFFSET = 0
+XY_OFFSET = len(ANGLE_NAMES)
+LEAF_COUNT = XY_OFFSET + 2 * len(LANDMARK_NAMES)
+
+logger = logging.getLogger(__name__)
+
+LANDMARK_INDEX = {name: i for i, name in enumerate(LANDMARK_NAMES)}
+ANGLE_SLOTS = {name: ANGLE_OFFSET + i for i, name in enumerate(ANGLE_NAMES)}
+
+INCOMPLETE_RESULT = (0, ["Cannot detect pose - ensure full body is visible"], [])
+EMPTY_RESULT = (0, ["Unable to analyze pose"], [])
+
+
+class PoseRuleError(ValueError):
+    """Raised when a rule table cannot be compiled"""
+
+
+def _leaf_slot(name):
+    """Buffer slot of a leaf such as "angle.left_knee" or "y.nose" (None if not a leaf)"""
+    kind, _, target = name.partition('.')
+    if kind == 'angle' and target in ANGLE_SLOTS:
+        return ANGLE_SLOTS[target]
+    if kind in ('x', 'y') and target in LANDMARK_INDEX:
+        return XY_OFFSET + 2 * LANDMARK_INDEX[target] + (kind == 'y')
+    return None
+
+
+def _correction(spec):
+    """Turn {"joint", "message", "type"} into the API correction dict"""
+    joint = spec['joint']
+    return {
+        'joint_index': LANDMARK_INDEX[joint] if isinstance(joint, str) else int(joint),
+        'message': spec['message'],
+        'type': spec['type']
+    }
+
+
+class RuleProgram:
+    def __init__(self, template, nodes, clauses, bucket_clauses):
+        """
+        Freeze features and clauses into the arrays used per frame
+        Args:
+            template: Value buffer with constants filled in (NaN elsewhere)
+            nodes: (depth, op, out slot, argument slots) feature nodes
+            clauses: (lhs slot, comparison code, rhs slot) triples
+            bucket_clauses: Clause ids per bucket; a bucket holds when all of them do
+        """
+        self.template = template
+
+        # Feature nodes grouped by depth and op -> one numpy op per group. sub is an add of
+        # the negated operand (exact in IEEE arithmetic) and min/max argument lists are
+        # padded with their first argument, which never changes the builtin-style selection.
+        groups = {}
+        for depth, op, out, args in nodes:
+            kind = 'add' if op == 'sub' else op
+            groups.setdefault((depth, kind), []).append((out, args, -1.0 if op == 'sub' else 1.0))
+        self.programs = []
+        for (depth, op), items in sorted(groups.items(), key=lambda item: item[0][0]):
+            width = max(len(args) for _, args, _ in items)
+            self.programs.append((
+                op,
+                np.array([out for out, _, _ in items], dtype=np.intp),
+                # (arity, nodes) so one take() gathers every operand of the group
+                np.array([args + (args[0],) * (width - len(args)) for _, args, _ in items], dtype=np.intp).T.copy(),
+                np.array([sign for _, _, sign in items])
+            ))
+
+        # a <= b is b >= a and a < b is b > a, so only two comparisons run per frame
+        inclusive = [i for i, (_, code, _) in enumerate(clauses) if COMPARISONS[code] in ('>=', '<=')]
+        strict = [i for i, (_, code, _) in enumerate(clauses) if COMPARISONS[code] in ('>', '<')]
+        oriented = [(lhs, rhs) if COMPARISONS[code][0] == '>' else (rhs, lhs) for lhs, code, rhs in clauses]
+        self.clause_count = len(clauses)
+        self.inclusive = np.array(inclusive, dtype=np.intp)
+        self.strict = np.array(strict, dtype=np.intp)
+        self.inclusive_slots = np.array([oriented[i] for i in inclusive], dtype=np.intp).reshape(-1, 2).T.copy()
+        self.strict_slots = np.array([oriented[i] for i in strict], dtype=np.intp).reshape(-1, 2).T.copy()
+
+        # A bucket holds when none of its clauses is false. Each bucket's clauses are one
+        # contiguous run, so failures are counted with a single cumulative sum.
+        self.bucket_count = len(bucket_clauses)
+        self.bucket_start = np.empty(self.bucket_count, dtype=np.intp)
+        self.bucket_end = np.empty(self.bucket_count, dtype=np.intp)
+        for bucket, clause_ids in enumerate(bucket_clauses):
+            clause_ids = list(clause_ids)
+            if clause_ids and clause_ids != list(range(clause_ids[0], clause_ids[0] + len(clause_ids))):
+                raise PoseRuleError("bucket clauses must be consecutive")
+            self.bucket_start[bucket] = clause_ids[0] if clause_ids else 0
+            self.bucket_end[bucket] = self.bucket_start[bucket] + len(clause_ids)
+
+    def features(self, landmarks, angles):
+        """
+        Fill the value buffer for one frame
+        Args:
+            landmarks: LandmarkFrame
+            angles: compute_joint_angles() result for the same frame
+        Returns:
+            float64 buffer of every leaf, constant and feature
+        """
+        values = self.template.copy()
+        values[ANGLE_OFFSET:ANGLE_OFFSET + len(angles)] = angles
+        count = min(len(landmarks), len(LANDMARK_NAMES))
+        values[XY_OFFSET:XY_OFFSET + 2 * count] = landmarks.data[:count, :2].ravel()
+
+        for op, out, args, signs in self.programs:
+            operands = values.take(args)
+            if op == 'abs':
+                values[out] = np.abs(operands[0])
+            elif op == 'add':
+                values[out] = operands[0] + signs * operands[1]
+            elif op == 'div':
+                values[out] = operands[0] / operands[1]
+            else:
+                # Same left-to-right selection as the builtin min()/max()
+                result = operands[0]
+                for candidate in operands[1:]:
+                    better = candidate < result if op == 'min' else candidate > result
+                    result = np.where(better, candidate, result)
+                values[out] = result
+        return values
+
+    def matching_buckets(self, values):
+        """Boolean per bucket (plus a trailing never-true sentinel) telling whether all its clauses hold"""
+        truth = np.empty(self.clause_count, dtype=bool)
+        inclusive = values[self.inclusive_slots]
+        strict = values[self.strict_slots]
+        truth[self.inclusive] = inclusive[0] >= inclusive[1]
+        truth[self.strict] = strict[0] > strict[1]
+        failures = np.zeros(self.clause_count + 1, dtype=np.intp)
+        np.cumsum(~truth, out=failures[1:])
+        holds = np.empty(self.bucket_count + 1, dtype=bool)
+        np.equal(failures[self.bucket_end], failures[self.bucket_start], out=holds[:-1])
+        holds[-1] = False
+        return holds
+
+
+class CompiledPose:
+    def __init__(self, pose_type, table):
+        """
+        Compile one pose's rule table
+        Args:
+            pose_type: API pose identifier (e.g. "yog3")
+            table: The pose's entry from the rules file
+        """
+        self.pose_type = pose_type
+        self.name = table['name']
+        self.min_landmarks = int(table.get('min_landmarks', 0))
+        self.summary = table.get('summary', [])
+
+        self._slots = {}
+        self._constants = {}
+        self._nodes = []  # (depth, op, out slot, argument slots)
+        self._depths = {}
+        self._next_slot = LEAF_COUNT
+
+        for name, expression in table.get('features', {}).items():
+            if name in self._slots or _leaf_slot(name) is not None:
+                raise PoseRuleError(f"{pose_type}: duplicate feature '{name}'")
+            self._slots[name] = self._compile_expression(expression)
+
+        # Every gate, override and rule bucket becomes one row of clause membership
+        self._clauses = []
+        self._bucket_clauses = []
+        self.gates = [self._add_bucket(gate) for gate in table.get('gates', [])]
+        self.overrides = [self._add_bucket(override) for override in table.get('overrides', [])]
+        self.check_names = {
+            'gate': [gate.get('name', str(i)) for i, gate in enumerate(table.get('gates', []))],
+            'override': [override.get('name', str(i)) for i, override in enumerate(table.get('overrides', []))]
+        }
+        self.rule_names = []
+        rule_buckets = []
+        for rule in table.get('rules', []):
+            buckets = rule.get('buckets', [])
+            if not buckets or buckets[-1].get('when'):
+                raise PoseRuleError(f"{pose_type}: rule '{rule.get('name')}' needs a final bucket without 'when'")
+            self.rule_names.append(rule.get('name', f"rule_{len(self.rule_names)}"))
+            rule_buckets.append([self._add_bucket(bucket) for bucket in buckets])
+        self.bucket_counts = [len(buckets) for buckets in rule_buckets]
+
+        self._finalize(rule_buckets)
+
+    def _compile_expression(self, expression, depth_limit=32):
+        """Return the buffer slot holding `expression`, adding nodes as needed"""
+        if depth_limit <= 0:
+            raise PoseRuleError(f"{self.pose_type}: expression nested too deeply")
+        if isinstance(expression, bool):
+            raise PoseRuleError(f"{self.pose_type}: invalid expression {expression!r}")
+        if isinstance(expression, (int, float)):
+            return self._constant(float(expression))
+        if isinstance(expression, str):
+            slot = self._slots.get(expression, _leaf_slot(expression))
+            if slot is None:
+                raise PoseRuleError(f"{self.pose_type}: unknown feature or landmark '{expression}'")
+            return slot
+        if not isinstance(expression, list) or not expression:
+            raise PoseRuleError(f"{self.pose_type}: invalid expression {expression!r}")
+
+        op, args = expression[0], expression[1:]
+        if op == 'mean':
+            # (a + b) / 2, kept as two nodes so results match the scalar formula bit for bit
+            if len(args) != 2:
+                raise PoseRuleError(f"{self.pose_type}: 'mean' takes two arguments")
+            return self._compile_expression(['div', ['add', args[0], args[1]], 2], depth_limit)
+        if op not in OPERATORS:
+            raise PoseRuleError(f"{self.pose_type}: unknown operator '{op}'")
+        arity = OPERATORS[op]
+        if (arity is not None and len(args) != arity) or (arity is None and len(args) < 2):
+            raise PoseRuleError(f"{self.pose_type}: wrong number of arguments for '{op}'")
+
+        arg_slots = tuple(self._compile_expression(arg, depth_limit - 1) for arg in args)
+        depth = 1 + max(self._depths.get(slot, 0) for slot in arg_slots)
+        out = self._allocate()
+        self._depths[out] = depth
+        self._nodes.append((depth, op, out, arg_slots))
+        return out
+
+    def _allocate(self):
+        slot = self._next_slot
+        self._next_slot += 1
+        return slot
+
+    def _constant(self, value):
+        if value not in self._constants:
+            self._constants[value] = self._allocate()
+        return self._constants[value]
+
+    def _add_bucket(self, spec):
+        """Register a bucket's clauses; returns (bucket index, spec)"""
+        clause_ids = []
+        for clause in spec.get('when', []):
+            if len(clause) != 3 or clause[1] not in COMPARISONS:
+                raise PoseRuleError(f"{self.pose_type}: invalid clause {clause!r}")
+            lhs, op, rhs = clause
+            clause_ids.append(len(self._clauses))
+            self._clauses.append((self._compile_expression(lhs), COMPARISONS.index(op), self._compile_expression(rhs)))
+        self._bucket_clauses.append(clause_ids)
+        return len(self._bucket_clauses) - 1, spec
+
+    def _finalize(self, rule_buckets):
+        """Freeze everything into the arrays used per frame"""
+        self.buffer_size = self._next_slot
+        self.template = np.full(self.buffer_size, np.nan)
+        for value, slot in self._constants.items():
+            self.template[slot] = value
+        self.program = RuleProgram(self.template, self._nodes, self._clauses, self._bucket_clauses)
+
+        # Rules x buckets, padded with a never-true sentinel column index
+        self._sentinel = len(self._bucket_clauses)
+        width = max((len(buckets) for buckets in rule_buckets), default=0)
+        self._rule_matrix = np.full((len(rule_buckets), width), self._sentinel, dtype=np.intp)
+        self._bucket_scores = np.zeros(self._sentinel + 1, dtype=np.int64)
+        self._bucket_specs = [None] * self._sentinel
+        for row, buckets in enumerate(rule_buckets):
+            for column, (bucket, spec) in enumerate(buckets):
+                self._rule_matrix[row, column] = bucket
+                self._bucket_scores[bucket] = int(spec['score'])
+                self._bucket_specs[bucket] = (
+                    spec.get('feedback'),
+                    _correction(spec['correction']) if spec.get('correction') else None
+                )
+        self._rule_rows = np.arange(len(rule_buckets))
+
+        self.gates = [(bucket, spec['score'], list(spec.get('feedback', [])), [_correction(c) for c in spec.get('corrections', [])])
+                      for bucket, spec in self.gates]
+        self.overrides = [(bucket, spec['score'], list(spec.get('feedback', [])), [_correction(c) for c in spec.get('corrections', [])])
+                          for bucket, spec in self.overrides]
+
+    def features(self, landmarks, angles):
+        """Value buffer of every leaf, constant and feature for one frame"""
+        return self.program.features(landmarks, angles)
+
+    def matching_buckets(self, values):
+        """Boolean per bucket (plus the sentinel) telling whether all its clauses hold"""
+        return self.program.matching_buckets(values)
+
+    def choose(self, holds):
+        """Index of the first matching bucket of every rule"""
+        if not len(self._rule_matrix):
+            return self._rule_rows
+        first = holds[self._rule_matrix].argmax(axis=1)
+        return self._rule_matrix[self._rule_rows, first]
+
+    def evaluate(self, landmarks, angles=None):
+        """
+        Score one frame
+        Args:
+            landmarks: LandmarkFrame
+            angles: Precomputed joint angles (computed here if omitted)
+        Returns:
+            (score, feedback list, corrections list)
+        """
+        if not landmarks or len(landmarks) < self.min_landmarks:
+            logger.debug("❌ %s: Insufficient landmark data", self.name)
+            return INCOMPLETE_RESULT[0], list(INCOMPLETE_RESULT[1]), []
+        if angles is None:
+            angles = compute_joint_angles(landmarks.data)
+        return self.result(self.matching_buckets(self.features(landmarks, angles)))
+
+    def result(self, holds):
+        """
+        Assemble the analysis from matching_buckets() output
+        Args:
+            holds: Per-bucket booleans for this pose (sentinel last)
+        Returns:
+            (score, feedback list, corrections list)
+        """
+        for bucket, score, feedback, corrections in self.gates:
+            if holds[bucket]:
+                logger.debug("❌ %s: gate matched - score %s", self.name, score)
+                return score, list(feedback), [dict(c) for c in corrections]
+
+        chosen = self.choose(holds)
+        score_components = self._bucket_scores[chosen].tolist()
+        feedback = []
+        corrections = []
+        for bucket in chosen.tolist():
+            message, correction = self._bucket_specs[bucket]
+            if message:
+                feedback.append(message)
+            if correction:
+                corrections.append(dict(correction))
+
+        for bucket, score, override_feedback, override_corrections in self.overrides:
+            if holds[bucket]:
+                score_components = [score]
+                feedback = list(override_feedback)
+                corrections = [dict(c) for c in override_corrections]
+                break
+
+        if not score_components:
+            logger.debug("❌ %s: No score components calculated", self.name)
+            return EMPTY_RESULT[0], list(EMPTY_RESULT[1]), []
+
+        overall_score = sum(score_components) / len(score_components)
+        feedback = self.summarize(overall_score, feedback)
+
+        logger.debug("🎯 %s Analysis Complete: Score=%.1f%%, Components=%s", self.name, overall_score, score_components)
+        return overall_score, feedback[:3], corrections[:2]
+
+    def summarize(self, overall_score, feedback):
+        """Apply the first summary tier the score reaches"""
+        for tier in self.summary:
+            if 'min_score' in tier and overall_score < tier['min_score']:
+                continue
+            if 'replace' in tier:
+                feedback = [tier['replace']]
+            elif 'prefix' in tier:
+                feedback.insert(0, tier['prefix'])
+            if 'append' in tier:
+                feedback.append(tier['append'])
+            break
+        return feedback
+
+    def trace(self, landmarks, angles=None):
+        """Coverage keys a frame hits: (rule name, bucket index) and (gate/override name, 0) when matched"""
+        if angles is None:
+            angles = compute_joint_angles(landmarks.data)
+        holds = self.matching_buckets(self.features(landmarks, angles))
+        keys = {(name, int(holds[row].argmax())) for name, row in zip(self.rule_names, self._rule_matrix)}
+        keys.update((name, 0) for name, bucket in self._named_checks() if holds[bucket])
+        return keys
+
+    def coverage_keys(self):
+        """Every key trace() can report for this pose"""
+        keys = {(name, i) for name, count in zip(self.rule_names, self.bucket_counts) for i in range(count)}
+        keys.update((name, 0) for name, _ in self._named_checks())
+        return keys
+
+    def _named_checks(self):
+        for kind, checks in (('gate', self.gates), ('override', self.overrides)):
+            for i, (bucket, _, _, _) in enumerate(checks):
+                yield f"{kind}:{self.check_names[kind][i]}", bucket
+
+
+class PoseRuleSet:
+    def __init__(self, poses):
+        """
+        Merge compiled poses into one program so a frame is scored against all of them at once
+        Args:
+            poses: dict mapping pose_type to CompiledPose (order breaks score ties)
+        """
+        self.poses = dict(poses)
+        self.pose_types = list(self.poses)
+
+        # Leaves are shared; each pose's constants/features/clauses/buckets get their own range
+        templates = [np.full(LEAF_COUNT, np.nan)]
+        nodes, clauses, bucket_clauses = [], [], []
+        self._bucket_maps = []
+        slot_offset = 0
+        for pose in self.poses.values():
+            remap = lambda slot, offset=slot_offset: slot if slot < LEAF_COUNT else slot + offset
+            templates.append(pose.template[LEAF_COUNT:])
+            nodes.extend((depth, op, remap(out), tuple(remap(a) for a in args)) for depth, op, out, args in pose._nodes)
+            clause_offset = len(clauses)
+            clauses.extend((remap(lhs), code, remap(rhs)) for lhs, code, rhs in pose._clauses)
+            self._bucket_maps.append(len(bucket_clauses) + np.arange(len(pose._bucket_clauses)))
+            bucket_clauses.extend([clause_offset + c for c in ids] for ids in pose._bucket_clauses)
+            slot_offset += pose.buffer_size - LEAF_COUNT
+        self.program = RuleProgram(np.concatenate(templates), nodes, clauses, bucket_clauses)
+
+        # Local bucket index (sentinel included) -> merged index, for CompiledPose.result()
+        sentinel = len(bucket_clauses)
+        self._bucket_maps = [np.append(bucket_map, sentinel) for bucket_map in self._bucket_maps]
+
+        # Every pose's rules stacked into one matrix; rule_pose says which pose a row belongs to
+        width = max((pose._rule_matrix.shape[1] for pose in self.poses.values()), default=0)
+        rows, rule_pose = [], []
+        self._bucket_scores = np.zeros(sentinel + 1, dtype=np.int64)
+        for index, (pose, bucket_map) in enumerate(zip(self.poses.values(), self._bucket_maps)):
+            matrix = np.full((len(pose._rule_matrix), width), sentinel, dtype=np.intp)
+            matrix[:, :pose._rule_matrix.shape[1]] = bucket_map[pose._rule_matrix]
+            rows.append(matrix)
+            rule_pose.extend([index] * len(matrix))
+            self._bucket_scores[bucket_map] = pose._bucket_scores
+        self._rule_matrix = np.concatenate(rows) if rows else np.zeros((0, width), dtype=np.intp)
+        self._rule_rows = np.arange(len(self._rule_matrix))
+        self._rule_pose = np.array(rule_pose, dtype=np.intp)
+        self._rule_counts = np.bincount(self._rule_pose, minlength=len(self.poses))
+        self._min_landmarks = np.array([pose.min_landmarks for pose in self.poses.values()])
+
+        # (merged bucket, pose index, score) for every gate and override, stored lowest precedence
+        # first: applying them in order leaves the first matching gate, else override, in place
+        checks = []
+        for index, (pose, bucket_map) in enumerate(zip(self.poses.values(), self._bucket_maps)):
+            for bucket, score, _, _ in pose.gates + pose.overrides:
+                checks.append((int(bucket_map[bucket]), index, score))
+        self._checks = checks[::-1]
+
+    def scores(self, landmarks, angles):
+        """
+        Score one frame against every pose without building feedback
+        Args:
+            landmarks: LandmarkFrame
+            angles: compute_joint_angles() result for the same frame
+        Returns:
+            (float64 score per pose in pose_types order, merged bucket matches)
+        """
+        holds = self.program.matching_buckets(self.program.features(landmarks, angles))
+        chosen = self._rule_matrix[self._rule_rows, holds[self._rule_matrix].argmax(axis=1)]
+        totals = np.bincount(self._rule_pose, weights=self._bucket_scores[chosen], minlength=len(self.poses))
+        scores = np.divide(totals, self._rule_counts, out=np.zeros(len(self.poses)), where=self._rule_counts > 0)
+
+        for bucket, index, score in self._checks:
+            if holds[bucket]:
+                scores[index] = score
+        # Same early exit as CompiledPose.evaluate() for frames missing landmarks
+        scores[len(landmarks) < self._min_landmarks] = INCOMPLETE_RESULT[0]
+        return scores, holds
+
+    def recognize(self, landmarks, angles=None):
+        """
+        Find the pose a frame matches best
+        Args:
+            landmarks: LandmarkFrame
+            angles: Precomputed joint angles (computed here if omitted)
+        Returns:
+            (best pose_type, its (score, feedback, corrections), {pose_type: score})
+        """
+        if not landmarks or not self.poses:
+            return None, (INCOMPLETE_RESULT[0], list(INCOMPLETE_RESULT[1]), []), {}
+        if angles is None:
+            angles = compute_joint_angles(landmarks.data)
+        scores, holds = self.scores(landmarks, angles)
+        best = int(scores.argmax())
+        pose_type = self.pose_types[best]
+        pose = self.poses[pose_type]
+        if len(landmarks) < pose.min_landmarks:
+            result = pose.evaluate(landmarks, angles)
+        else:
+            result = pose.result(holds[self._bucket_maps[best]])
+        return pose_type, result, dict(zip(self.pose_types, scores.tolist()))
+
+
+def load_pose_rules(path=POSE_RULES_PATH):
+    """
+    Load and compile every pose in a rules file
+    Args:
+        path: JSON rules file
+    Returns:
+        dict mapping pose_type to CompiledPose
+    """
+    with open(path, encoding='utf-8') as f:
+        tables = json.load(f)
+    try:
+        return {pose_type: CompiledPose(pose_type, table) for pose_type, table in tables.items()}
+    except (KeyError, TypeError) as e:
+        raise PoseRuleError(f"Invalid pose rules in {path}: {e}") from e
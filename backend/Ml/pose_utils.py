@@ -4,11 +4,17 @@ Pose Detection Utilities
 Helper functions for pose analysis and comparison
 """
 
+import logging
 import numpy as np
 import math
 from scipy import spatial
 from typing import List, Dict, Any
 
+from joint_angles import angle_between, compute_joint_angles, landmarks_to_array
+from landmark_frame import LandmarkFrame
+
+logger = logging.getLogger(__name__)
+
 def calculate_angle(a, b, c):
     """
     Calculate angle between three points
@@ -17,16 +23,7 @@ def calculate_angle(a, b, c):
     Returns:
         angle: Angle in degrees
     """
-    a = np.array(a)
-    b = np.array(b)
-    c = np.array(c)
-    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    
-    if angle > 180.0:
-        angle = 360 - angle
-        
-    return angle
+    return angle_between(a, b, c)
 
 def compare_poses_cosine(user_keypoints, target_keypoints):
     """
@@ -57,7 +54,7 @@ def compare_poses_cosine(user_keypoints, target_keypoints):
         return score
         
     except Exception as e:
-        print(f"Error in pose comparison: {e}")
+        logger.error("Error in pose comparison: %s", e)
         return 0.75
 
 def compare_angles(user_angles, target_angles):
@@ -84,7 +81,7 @@ def compare_angles(user_angles, target_angles):
         return sum(differences) / len(differences) if differences else 0.5
         
     except Exception as e:
-        print(f"Error in angle comparison: {e}")
+        logger.error("Error in angle comparison: %s", e)
         return 0.5
 
 def classify_pose(landmarks, mp_pose):
@@ -124,14 +121,7 @@ def classify_pose(landmarks, mp_pose):
                       landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y]
         
         # Calculate angles
-        angle1 = calculate_angle(right_shoulder, right_elbow, right_wrist)
-        angle2 = calculate_angle(left_shoulder, left_elbow, left_wrist)
-        angle3 = calculate_angle(right_elbow, right_shoulder, right_hip)
-        angle4 = calculate_angle(left_elbow, left_shoulder, left_hip)
-        angle5 = calculate_angle(right_shoulder, right_hip, right_knee)
-        angle6 = calculate_angle(left_shoulder, left_hip, left_knee)
-        angle7 = calculate_angle(right_hip, right_knee, right_ankle)
-        angle8 = calculate_angle(left_hip, left_knee, left_ankle)
+        angle1, angle2, angle3, angle4, angle5, angle6, angle7, angle8 = compute_joint_angles(landmarks_to_array(landmarks))
         
         # Pose classification logic
         label = 'Unknown Pose'
@@ -153,7 +143,7 @@ def classify_pose(landmarks, mp_pose):
         return label
         
     except Exception as e:
-        print(f"Error in pose classification: {e}")
+        logger.error("Error in pose classification: %s", e)
         return 'Unknown Pose'
 
 def generate_feedback_messages(user_angles, target_angles, threshold=15):
@@ -245,7 +235,7 @@ def extract_angle_points(landmarks, mp_pose):
         return angle_points
         
     except Exception as e:
-        print(f"Error extracting angle points: {e}")
+        logger.error("Error extracting angle points: %s", e)
         return []
 
 def format_landmarks_for_api(landmarks):
@@ -256,35 +246,8 @@ def format_landmarks_for_api(landmarks):
     Returns:
         formatted_landmarks: List of formatted landmark dictionaries
     """
-    formatted_landmarks = []
-    
-    landmark_names = [
-        'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer',
-        'right_eye_inner', 'right_eye', 'right_eye_outer',
-        'left_ear', 'right_ear', 'mouth_left', 'mouth_right',
-        'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
-        'left_wrist', 'right_wrist', 'left_pinky', 'right_pinky',
-        'left_index', 'right_index', 'left_thumb', 'right_thumb',
-        'left_hip', 'right_hip', 'left_knee', 'right_knee',
-        'left_ankle', 'right_ankle', 'left_heel', 'right_heel',
-        'left_foot_index', 'right_foot_index'
-    ]
-    
-    for idx, landmark in enumerate(landmarks):
-        landmark_name = landmark_names[idx] if idx < len(landmark_names) else f"landmark_{idx}"
-        
-        # Only include visible landmarks
-        if landmark.visibility > 0.1:
-            formatted_landmarks.append({
-                "x": float(landmark.x),
-                "y": float(landmark.y),
-                "z": float(landmark.z),
-                "visibility": float(landmark.visibility),
-                "name": landmark_name,
-                "index": idx
-            })
-    
-    return formatted_landmarks
+    # Only include visible landmarks
+    return LandmarkFrame.coerce(landmarks).to_json(names=True, min_visibility=0.1)
 
 def get_pose_target_angles():
     """
@@ -6,6 +6,7 @@ Compatible with MediaPipe 0.10.30+
 """
 
 import cv2
+import logging
 import numpy as np
 import pandas as pd
 import time
@@ -15,6 +16,13 @@ from datetime import datetime
 from scipy import spatial
 from typing import List, Dict, Any
 
+from joint_angles import angle_between, compute_joint_angles, landmarks_to_array
+from landmark_cache import CachedPose
+from reference_library import load_reference_library
+from landmark_frame import LandmarkFrame
+
+logger = logging.getLogger(__name__)
+
 # Try to import MediaPipe with proper version handling
 try:
     import mediapipe as mp
@@ -24,26 +32,26 @@ try:
         mp_drawing = mp.solutions.drawing_utils
         mp_pose = mp.solutions.pose
         MEDIAPIPE_API = "solutions"
-        print("📦 Using MediaPipe Solutions API")
+        logger.info("📦 Using MediaPipe Solutions API")
     else:
         # Use Tasks API for newer versions
         from mediapipe.tasks import python
         from mediapipe.tasks.python import vision
         MEDIAPIPE_API = "tasks"
-        print("📦 Using MediaPipe Tasks API")
+        logger.info("📦 Using MediaPipe Tasks API")
     
     MEDIAPIPE_AVAILABLE = True
-    print(f"✅ MediaPipe {mp.__version__} available")
+    logger.info("✅ MediaPipe %s available", mp.__version__)
     
 except Exception as e:
     MEDIAPIPE_AVAILABLE = False
     MEDIAPIPE_API = "none"
-    print(f"❌ MediaPipe not available: {e}")
+    logger.error("❌ MediaPipe not available: %s", e)
 
 class ProfessionalPoseDetector:
     def __init__(self):
         """Initialize Professional Pose Detection System"""
-        print("🔧 Initializing Professional Pose Detection System...")
+        logger.info("🔧 Initializing Professional Pose Detection System...")
         
         self.pose_configs = {
             "tree_pose": {
@@ -71,17 +79,19 @@ class ProfessionalPoseDetector:
                 "target_angles": [90, 90, 45, 45, 180, 180, 180, 180]
             }
         }
+        # Measured targets from the reference library replace the hand-set angles when it is built
+        self._load_target_poses()
         
         # Initialize pose detector based on available API
         self.pose_detector = None
         self._initialize_detector()
         
-        print("✅ Professional Pose Detection System initialized successfully")
+        logger.info("✅ Professional Pose Detection System initialized successfully")
     
     def _initialize_detector(self):
         """Initialize the appropriate pose detector"""
         if not MEDIAPIPE_AVAILABLE:
-            print("⚠️ MediaPipe not available - using fallback detection")
+            logger.warning("⚠️ MediaPipe not available - using fallback detection")
             return
         
         try:
@@ -91,41 +101,33 @@ class ProfessionalPoseDetector:
                     min_detection_confidence=0.5,
                     min_tracking_confidence=0.5
                 )
-                print("✅ Solutions API pose detector initialized")
+                logger.info("✅ Solutions API pose detector initialized")
             else:
                 # Use fallback for Tasks API or create a simple detector
-                print("⚠️ Using fallback detection for newer MediaPipe")
+                logger.warning("⚠️ Using fallback detection for newer MediaPipe")
                 
         except Exception as e:
-            print(f"❌ Error initializing pose detector: {e}")
+            logger.error("❌ Error initializing pose detector: %s", e)
     
     def calculate_angle(self, a, b, c):
         """Calculate angle between three points"""
-        a = np.array(a)
-        b = np.array(b)
-        c = np.array(c)
-        radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-        angle = np.abs(radians * 180.0 / np.pi)
-        
-        if angle > 180.0:
-            angle = 360 - angle
-            
-        return angle
+        return angle_between(a, b, c)
     
     def extract_keypoints_from_image(self, image_path):
         """Extract keypoints and angles from target pose image"""
         try:
-            with mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
+            # Detections are cached on disk by image content; the graph is only built on a miss
+            with CachedPose(lambda: mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)) as pose:
                 image = cv2.imread(image_path)
                 if image is None:
-                    print(f"⚠️ Could not load target image: {image_path}")
+                    logger.warning("⚠️ Could not load target image: %s", image_path)
                     return None, None, None
                 
                 image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                results = pose.process(image_rgb)
+                results = pose.process(image_rgb, image_path)
                 
                 if not results.pose_landmarks:
-                    print(f"⚠️ No pose detected in target image: {image_path}")
+                    logger.warning("⚠️ No pose detected in target image: %s", image_path)
                     return None, None, None
                 
                 landmarks = results.pose_landmarks.landmark
@@ -157,15 +159,7 @@ class ProfessionalPoseDetector:
                              landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y]
                 
                 # Calculate 8 key angles
-                angles = []
-                angles.append(int(self.calculate_angle(right_shoulder, right_elbow, right_wrist)))  # Right arm
-                angles.append(int(self.calculate_angle(left_shoulder, left_elbow, left_wrist)))     # Left arm
-                angles.append(int(self.calculate_angle(right_elbow, right_shoulder, right_hip)))    # Right shoulder
-                angles.append(int(self.calculate_angle(left_elbow, left_shoulder, left_hip)))       # Left shoulder
-                angles.append(int(self.calculate_angle(right_shoulder, right_hip, right_knee)))     # Right hip
-                angles.append(int(self.calculate_angle(left_shoulder, left_hip, left_knee)))        # Left hip
-                angles.append(int(self.calculate_angle(right_hip, right_knee, right_ankle)))        # Right knee
-                angles.append(int(self.calculate_angle(left_hip, left_knee, left_ankle)))           # Left knee
+                angles = [int(angle) for angle in compute_joint_angles(landmarks_to_array(landmarks))]
                 
                 # Extract keypoints for comparison
                 keypoints = []
@@ -179,14 +173,15 @@ class ProfessionalPoseDetector:
                 return landmarks, keypoints, angles
                 
         except Exception as e:
-            print(f"❌ Error extracting keypoints from {image_path}: {e}")
+            logger.error("❌ Error extracting keypoints from %s: %s", image_path, e)
             return None, None, None
     
     def _load_target_poses(self):
-        """Load target poses from images"""
-        print("📚 Loading target poses...")
+        """Load measured target poses from the reference library (build_reference_library.py)"""
+        logger.info("📚 Loading target poses...")
+        library = load_reference_library()
         
-        # For now, use default angles - in production, load from actual target images
+        # Hand-set angles for poses the library does not measure (or when it is not built)
         default_angles = {
             "tree_pose": [180, 180, 90, 90, 180, 45, 180, 180],
             "warrior_pose": [180, 180, 90, 90, 90, 180, 90, 180],
@@ -197,8 +192,14 @@ class ProfessionalPoseDetector:
         }
         
         for pose_type, config in self.pose_configs.items():
-            config["target_angles"] = default_angles.get(pose_type, [90] * 8)
-            config["target_keypoints"] = []  # Will be populated when target images are available
+            target = library.target(pose_type) if library is not None else None
+            if target is not None:
+                config["target_angles"] = target.target_angles()
+                config["target_keypoints"] = target.target_keypoints()
+                logger.info("📐 %s: measured target from %d images", pose_type, target.samples)
+            else:
+                config["target_angles"] = default_angles.get(pose_type, [90] * 8)
+                config["target_keypoints"] = []
     
     def compare_poses(self, user_keypoints, target_keypoints):
         """Compare user pose with target pose using cosine similarity"""
@@ -386,13 +387,13 @@ class ProfessionalPoseDetector:
             }
                 
         except Exception as e:
-            print(f"❌ Professional pose detection error: {e}")
+            logger.error("❌ Professional pose detection error: %s", e)
             return self._create_error_response(f"Detection failed: {str(e)}")
     
     def _fallback_pose_detection(self, frame, pose_type, target_angles):
         """Fallback pose detection using OpenCV"""
         try:
-            print("🔄 Using fallback pose detection...")
+            logger.debug("🔄 Using fallback pose detection...")
             
             # Simple contour-based detection
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
@@ -475,7 +476,7 @@ class ProfessionalPoseDetector:
             }
             
         except Exception as e:
-            print(f"❌ Fallback detection error: {e}")
+            logger.error("❌ Fallback detection error: %s", e)
             return self._create_error_response(f"Fallback detection failed: {str(e)}")
     
     def _extract_user_pose_data(self, landmarks):
@@ -508,15 +509,7 @@ class ProfessionalPoseDetector:
                          landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y]
             
             # Calculate angles
-            angles = []
-            angles.append(int(self.calculate_angle(right_shoulder, right_elbow, right_wrist)))
-            angles.append(int(self.calculate_angle(left_shoulder, left_elbow, left_wrist)))
-            angles.append(int(self.calculate_angle(right_elbow, right_shoulder, right_hip)))
-            angles.append(int(self.calculate_angle(left_elbow, left_shoulder, left_hip)))
-            angles.append(int(self.calculate_angle(right_shoulder, right_hip, right_knee)))
-            angles.append(int(self.calculate_angle(left_shoulder, left_hip, left_knee)))
-            angles.append(int(self.calculate_angle(right_hip, right_knee, right_ankle)))
-            angles.append(int(self.calculate_angle(left_hip, left_knee, left_ankle)))
+            angles = [int(angle) for angle in compute_joint_angles(landmarks_to_array(landmarks))]
             
             # Extract keypoints
             keypoints = []
@@ -530,7 +523,7 @@ class ProfessionalPoseDetector:
             return landmarks, keypoints, angles
             
         except Exception as e:
-            print(f"❌ Error extracting user pose data: {e}")
+            logger.error("❌ Error extracting user pose data: %s", e)
             return None, None, None
     
     def _get_angle_points(self, landmarks):
@@ -559,34 +552,7 @@ class ProfessionalPoseDetector:
     
     def _format_landmarks(self, landmarks):
         """Format landmarks for API response"""
-        formatted_landmarks = []
-        
-        landmark_names = [
-            'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer',
-            'right_eye_inner', 'right_eye', 'right_eye_outer',
-            'left_ear', 'right_ear', 'mouth_left', 'mouth_right',
-            'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
-            'left_wrist', 'right_wrist', 'left_pinky', 'right_pinky',
-            'left_index', 'right_index', 'left_thumb', 'right_thumb',
-            'left_hip', 'right_hip', 'left_knee', 'right_knee',
-            'left_ankle', 'right_ankle', 'left_heel', 'right_heel',
-            'left_foot_index', 'right_foot_index'
-        ]
-        
-        for idx, landmark in enumerate(landmarks):
-            landmark_name = landmark_names[idx] if idx < len(landmark_names) else f"landmark_{idx}"
-            
-            if landmark.visibility > 0.1:
-                formatted_landmarks.append({
-                    "x": float(landmark.x),
-                    "y": float(landmark.y),
-                    "z": float(landmark.z),
-                    "visibility": float(landmark.visibility),
-                    "name": landmark_name,
-                    "index": idx
-                })
-        
-        return formatted_landmarks
+        return LandmarkFrame.coerce(landmarks).to_json(names=True, min_visibility=0.1)
     
     def _create_error_response(self, error_message):
         """Create error response"""
@@ -622,6 +588,7 @@ class ProfessionalPoseDetector:
 
 # For standalone testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     detector = ProfessionalPoseDetector()
     
     # Test with webcam
@@ -768,15 +735,7 @@ if __name__ == "__main__":
                          landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y]
             
             # Calculate angles
-            angles = []
-            angles.append(int(self.calculate_angle(right_shoulder, right_elbow, right_wrist)))
-            angles.append(int(self.calculate_angle(left_shoulder, left_elbow, left_wrist)))
-            angles.append(int(self.calculate_angle(right_elbow, right_shoulder, right_hip)))
-            angles.append(int(self.calculate_angle(left_elbow, left_shoulder, left_hip)))
-            angles.append(int(self.calculate_angle(right_shoulder, right_hip, right_knee)))
-            angles.append(int(self.calculate_angle(left_shoulder, left_hip, left_knee)))
-            angles.append(int(self.calculate_angle(right_hip, right_knee, right_ankle)))
-            angles.append(int(self.calculate_angle(left_hip, left_knee, left_ankle)))
+            angles = [int(angle) for angle in compute_joint_angles(landmarks_to_array(landmarks))]
             
             # Extract keypoints
             keypoints = []
@@ -790,7 +749,7 @@ if __name__ == "__main__":
             return landmarks, keypoints, angles
             
         except Exception as e:
-            print(f"❌ Error extracting user pose data: {e}")
+            logger.error("❌ Error extracting user pose data: %s", e)
             return None, None, None
     
     def _get_angle_points(self, landmarks):
@@ -828,37 +787,10 @@ if __name__ == "__main__":
         if MEDIAPIPE_API != "solutions":
             return []
         
-        formatted_landmarks = []
-        
-        landmark_names = [
-            'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer',
-            'right_eye_inner', 'right_eye', 'right_eye_outer',
-            'left_ear', 'right_ear', 'mouth_left', 'mouth_right',
-            'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
-            'left_wrist', 'right_wrist', 'left_pinky', 'right_pinky',
-            'left_index', 'right_index', 'left_thumb', 'right_thumb',
-            'left_hip', 'right_hip', 'left_knee', 'right_knee',
-            'left_ankle', 'right_ankle', 'left_heel', 'right_heel',
-            'left_foot_index', 'right_foot_index'
-        ]
-        
         try:
-            for idx, landmark in enumerate(landmarks):
-                landmark_name = landmark_names[idx] if idx < len(landmark_names) else f"landmark_{idx}"
-                
-                if landmark.visibility > 0.1:
-                    formatted_landmarks.append({
-                        "x": float(landmark.x),
-                        "y": float(landmark.y),
-                        "z": float(landmark.z),
-                        "visibility": float(landmark.visibility),
-                        "name": landmark_name,
-                        "index": idx
-                    })
+            return LandmarkFrame.coerce(landmarks).to_json(names=True, min_visibility=0.1)
         except:
-            pass
-        
-        return formatted_landmarks
+            return []
     
     def _create_error_response(self, error_message):
         """Create error response"""
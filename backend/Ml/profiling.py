@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+On-Demand Profiling
+Profiles the running service without a restart, in one of two modes:
+
+    sample    a background thread snapshots every thread's stack at a fixed
+              interval for T seconds and writes collapsed stacks
+              ("frame;frame;frame count" lines) for flamegraph.pl / speedscope
+    cprofile  the next N requests (or those within T seconds) run under
+              cProfile; their merged stats are written as a .pstats file
+
+When nothing is armed, the per-request hook is a single attribute check.
+"""
+
+import cProfile
+import itertools
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+SAMPLE = 'sample'
+CPROFILE = 'cprofile'
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profiling run is started while another one is active"""
+
+
+def collapse_stack(frame, thread_name):
+    """One thread's stack as a collapsed-stack key, outermost frame first"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    frames.append(thread_name)
+    return ';'.join(reversed(frames))
+
+
+class StackSampler(threading.Thread):
+    def __init__(self, path, seconds, interval, on_done=None):
+        """
+        Args:
+            path: Collapsed-stack file to write
+            seconds: How long to sample
+            interval: Seconds between snapshots
+            on_done: Called with the sampler once the file is written
+        """
+        super().__init__(name='stack-sampler', daemon=True)
+        self.path = path
+        self.seconds = seconds
+        self.interval = interval
+        self.on_done = on_done
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        stacks = Counter()
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline and not self._stop_event.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    stacks[collapse_stack(frame, names.get(thread_id, f"thread-{thread_id}"))] += 1
+            self.samples += 1
+            self._stop_event.wait(self.interval)
+
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info("🔥 Wrote %d stack samples to %s", self.samples, self.path)
+        if self.on_done is not None:
+            self.on_done(self)
+
+
+class RequestProfiler:
+    def __init__(self, path, requests, seconds, on_done=None):
+        """
+        cProfile the next `requests` requests, or those started within `seconds`
+        Args:
+            path: .pstats file to write
+            requests: Max requests to profile
+            seconds: Max seconds to stay armed
+            on_done: Called with the profiler once the file is written
+        """
+        self.path = path
+        self.remaining = requests
+        self.deadline = time.monotonic() + seconds
+        self.on_done = on_done
+        self.profiled = 0
+        self._stats = None
+        # cProfile instruments one thread at a time; concurrent requests are skipped
+        self._lock = threading.Lock()
+        self._finished = False
+
+    @property
+    def expired(self):
+        return self.remaining <= 0 or time.monotonic() > self.deadline
+
+    def begin(self):
+        """Start profiling the current request; returns its Profile, or None if it is not profiled"""
+        if self.expired:
+            self.finish()
+            return None
+        if not self._lock.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def end(self, profile):
+        """Stop a request's Profile and merge it into the collected stats"""
+        profile.disable()
+        try:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self.profiled += 1
+            self.remaining -= 1
+        finally:
+            self._lock.release()
+        if self.remaining <= 0:
+            self.finish()
+
+    def finish(self):
+        """Write the collected stats (once)"""
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+            if self._stats is not None:
+                self._stats.dump_stats(self.path)
+                logger.info("🔥 Wrote cProfile stats of %d requests to %s", self.profiled, self.path)
+            else:
+                logger.info("🔥 cProfile window closed without profiled requests")
+        if self.on_done is not None:
+            self.on_done(self)
+
+
+class ProfilerControl:
+    def __init__(self, output_dir, max_seconds=300.0):
+        """
+        Start and track on-demand profiling runs (one at a time)
+        Args:
+            output_dir: Directory profile files are written to
+            max_seconds: Upper bound on any run's duration
+        """
+        self.output_dir = output_dir
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._active = None
+        self._request_profiler = None
+        self._written = []
+        self._run_numbers = itertools.count(1)
+
+    def _path(self, mode, extension):
+        """Unique per run: runs started within the same millisecond still differ by the run number"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+        return os.path.join(self.output_dir, f"{mode}-{stamp}-{os.getpid()}-{next(self._run_numbers)}.{extension}")
+
+    def _done(self, run):
+        with self._lock:
+            if self._active is run:
+                self._active = None
+                self._request_profiler = None
+            if os.path.exists(run.path):
+                self._written.append(run.path)
+
+    def start(self, mode=SAMPLE, seconds=30.0, requests=100, interval=0.005):
+        """
+        Arm a profiling run
+        Args:
+            mode: SAMPLE or CPROFILE
+            seconds: Sampling duration, or how long cProfile stays armed
+            requests: Requests to cProfile
+            interval: Seconds between stack samples
+        Returns:
+            Path the profile will be written to
+        Raises:
+            ProfilerBusy: Another run is still active
+            ValueError: Unknown mode or bad numbers
+        """
+        seconds = min(max(float(seconds), 0.1), self.max_seconds)
+        self._close_expired()
+        with self._lock:
+            if self._active is not None:
+                active_mode = SAMPLE if isinstance(self._active, StackSampler) else CPROFILE
+                raise ProfilerBusy(f"A {active_mode} run is already active")
+            if mode == SAMPLE:
+                run = StackSampler(self._path(mode, 'collapsed'), seconds, max(float(interval), 0.001), self._done)
+                self._active = run
+                run.start()
+            elif mode == CPROFILE:
+                run = RequestProfiler(self._path(mode, 'pstats'), max(int(requests), 1), seconds, self._done)
+                self._active = self._request_profiler = run
+            else:
+                raise ValueError(f"Unknown profiling mode: {mode}")
+        logger.info("🔥 Profiling started: mode=%s, seconds=%.1f, output=%s", mode, seconds, run.path)
+        return run.path
+
+    def _close_expired(self):
+        """Write out a cProfile window that ran out of time with no request left to notice"""
+        active = self._active
+        if isinstance(active, RequestProfiler) and active.expired:
+            active.finish()
+
+    def begin_request(self):
+        """Per-request hook: (profiler, Profile) when this request is profiled, else None"""
+        profiler = self._request_profiler
+        if profiler is None:
+            return None
+        profile = profiler.begin()
+        return (profiler, profile) if profile is not None else None
+
+    def end_request(self, handle):
+        if handle is not None:
+            profiler, profile = handle
+            profiler.end(profile)
+
+    def status(self):
+        self._close_expired()
+        active = self._active
+        if isinstance(active, StackSampler):
+            current = {"mode": SAMPLE, "output": active.path, "samples": active.samples}
+        elif isinstance(active, RequestProfiler):
+            current = {"mode": CPROFILE, "output": active.path, "profiled": active.profiled,
+                       "remaining": active.remaining}
+        else:
+            current = {"mode": None}
+        return {**current, "output_dir": self.output_dir, "written": list(self._written)}
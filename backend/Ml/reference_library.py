@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Reference Pose Library
+Target poses measured once by build_reference_library.py and stored as one
+structured .npy array: per reference image its landmarks, normalized
+keypoints, 8 joint angles and a thumbnail, plus one measured target per
+pose (median angles over the reference and training images). The file is
+memory-mapped, so loading it costs no detection and no decoding.
+"""
+
+import logging
+import os
+
+import numpy as np
+
+from joint_angles import ANGLE_NAMES, LANDMARK_COUNT, LEFT_HIP, LEFT_SHOULDER, RIGHT_HIP, RIGHT_SHOULDER
+from landmark_cache import file_hash
+
+logger = logging.getLogger(__name__)
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LIBRARY_PATH = os.environ.get('ML_REFERENCE_LIBRARY', os.path.join(ML_DIR, 'reference_library.npy'))
+
+# Bumped whenever REFERENCE_DTYPE or the meaning of a field changes
+LIBRARY_VERSION = 1
+
+# Thumbnail (width, height); live_coach.py shows it scaled up to 560x360
+THUMBNAIL_SIZE = (280, 180)
+
+# Record kinds
+REFERENCE, TARGET = 'reference', 'target'
+
+REFERENCE_DTYPE = np.dtype([
+    ('version', 'u2'),
+    ('kind', 'U10'),
+    ('name', 'U32'),
+    ('pose', 'U24'),                    # ProfessionalPoseDetector.pose_configs key, '' if none
+    ('selector', 'i2'),                 # live_coach.py --reference number (the old `bike`), 0 if none
+    ('source', 'U128'),                 # Image path relative to backend/Ml, or the folders measured
+    ('content_hash', 'U32'),            # landmark_cache.file_hash of the source image ('' for targets)
+    ('model', 'U64'),                   # landmark_cache.model_version the landmarks come from
+    ('samples', 'i4'),                  # Images measured
+    ('landmarks', 'f4', (LANDMARK_COUNT, 4)),  # x/y/z/visibility in image coordinates
+    ('keypoints', 'f4', (LANDMARK_COUNT, 3)),  # Hip-centered, torso-length scaled x/y/z
+    ('angles', 'f4', (len(ANGLE_NAMES),)),
+    ('thumbnail', 'u1', (THUMBNAIL_SIZE[1], THUMBNAIL_SIZE[0], 3)),  # BGR with the skeleton drawn
+])
+
+# (name, image, pose_configs key, selector); yoga16 is the fallback for any other selector number
+REFERENCE_IMAGES = (
+    ('tree', 'Video/yoga19.jpg', 'tree_pose', 2),
+    ('t_pose', 'Video/yoga25.jpg', '', 3),
+    ('goddess', 'Video/yoga11.jpg', 'goddess_pose', 4),
+    ('warrior2', 'Video/yoga12.jpg', 'warrior_pose', 5),
+    ('downdog', 'Video/yoga8.jpg', 'downward_dog', 6),
+    ('downdog_side', 'Video/yoga9.jpg', 'downward_dog', 7),
+    ('goddess_arms', 'Video/yoga10.jpg', 'goddess_pose', 8),
+    ('warrior2_side', 'Video/yoga13.jpg', 'warrior_pose', 9),
+    ('side_plank', 'Video/yoga16.jpg', '', 1),
+)
+
+# Video/TRAIN folders measured into the per-pose targets
+TRAIN_POSE_KEYS = {
+    'warrior2': 'warrior_pose',
+    'tree': 'tree_pose',
+    'goddess': 'goddess_pose',
+    'downdog': 'downward_dog',
+    'plank': 'plank_pose'
+}
+
+
+def normalize_keypoints(landmarks):
+    """
+    Make keypoints comparable across people and framing
+    Args:
+        landmarks: (33, 3+) landmark array in image coordinates
+    Returns:
+        (33, 3) float32 x/y/z centered on the mid-hip and scaled by the torso length
+    """
+    points = np.asarray(landmarks, dtype=np.float32)[:, :3]
+    hip = (points[LEFT_HIP] + points[RIGHT_HIP]) / 2
+    shoulder = (points[LEFT_SHOULDER] + points[RIGHT_SHOULDER]) / 2
+    torso = float(np.linalg.norm((shoulder - hip)[:2]))
+    return ((points - hip) / (torso if torso > 1e-6 else 1.0)).astype(np.float32)
+
+
+class ReferencePose:
+    __slots__ = ('record',)
+
+    def __init__(self, record):
+        """One library record (a view into the memory-mapped array)"""
+        self.record = record
+
+    def __getattr__(self, field):
+        if field in REFERENCE_DTYPE.names:
+            value = self.record[field]
+            return value.item() if np.ndim(value) == 0 else value
+        raise AttributeError(field)
+
+    def __repr__(self):
+        return f"ReferencePose({str(self.record['name'])!r}, {self.record['kind']})"
+
+    def target_angles(self):
+        """Integer joint angles, as live_coach.py and ProfessionalPoseDetector compare them"""
+        return [int(angle) for angle in self.record['angles']]
+
+    def target_keypoints(self):
+        """[{'X', 'Y', 'Z'}] in image coordinates, the layout compare_poses expects"""
+        return [{'X': x, 'Y': y, 'Z': z} for x, y, z in self.record['landmarks'][:, :3].tolist()]
+
+
+class ReferenceLibrary:
+    def __init__(self, records, path=None):
+        """
+        Args:
+            records: Structured array of REFERENCE_DTYPE (usually memory-mapped)
+            path: File it was loaded from
+        """
+        self.records = records
+        self.path = path
+
+    @classmethod
+    def load(cls, path=DEFAULT_LIBRARY_PATH):
+        """Memory-map a built library; None if it is missing or from another library version"""
+        try:
+            records = np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.debug("📚 No reference library at %s: %s", path, e)
+            return None
+        if records.dtype != REFERENCE_DTYPE or not len(records) or int(records[0]['version']) != LIBRARY_VERSION:
+            logger.warning("⚠️ Reference library %s is from another version - run build_reference_library.py", path)
+            return None
+        return cls(records, path)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return (ReferencePose(record) for record in self.records)
+
+    def _find(self, **fields):
+        for record in self.records:
+            if all(record[field] == value for field, value in fields.items()):
+                return ReferencePose(record)
+        return None
+
+    def get(self, name):
+        """Reference image record by name"""
+        return self._find(kind=REFERENCE, name=name)
+
+    def by_selector(self, selector):
+        """Reference image record for a selector number (the old scripts' `bike`)"""
+        return self._find(kind=REFERENCE, selector=selector)
+
+    def for_image(self, path):
+        """
+        Reference image record for `path`, if the library has it and the file is unchanged
+        Args:
+            path: Image path, absolute or relative to backend/Ml
+        """
+        full_path = path if os.path.isabs(path) else os.path.join(ML_DIR, path)
+        source = os.path.relpath(full_path, ML_DIR).replace(os.sep, '/')
+        reference = self._find(kind=REFERENCE, source=source)
+        if reference is None or not os.path.isfile(full_path) or file_hash(full_path) != reference.content_hash:
+            return None
+        return reference
+
+    def target(self, pose):
+        """Measured target for a pose_configs key"""
+        return self._find(kind=TARGET, pose=pose)
+
+
+_libraries = {}
+
+
+def load_reference_library(path=DEFAULT_LIBRARY_PATH):
+    """ReferenceLibrary.load(), memoized per file modification time"""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    if _libraries.get(path, (None, None))[0] != mtime:
+        _libraries[path] = (mtime, ReferenceLibrary.load(path))
+    return _libraries[path][1]
+
+
+def reference_for_image(path, library_path=DEFAULT_LIBRARY_PATH):
+    """Library record for a reference image, or None (callers then extract it themselves)"""
+    library = load_reference_library(library_path)
+    return library.for_image(path) if library is not None else None
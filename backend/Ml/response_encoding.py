@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Response Encoding
+Content negotiation for detect-pose results. The default stays the verbose
+JSON (33 landmark dicts plus display metadata). Compact clients get the
+landmarks as one flat int16 array in 1/LANDMARK_SCALE units and no static
+fields - as JSON (`compact=1`) or MessagePack (`Accept: application/msgpack`).
+"""
+
+import json
+
+import numpy as np
+
+from landmark_frame import LandmarkFrame
+
+# MessagePack is optional - msgpack requests fall back to compact JSON without it
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+VERBOSE = 'json'
+COMPACT = 'compact'
+MSGPACK = 'msgpack'
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+# Landmarks are x, y, z, visibility per point, quantized to 1/10000 (int16 covers +-3.27)
+LANDMARK_SCALE = 10000
+INT16_MIN, INT16_MAX = -32768, 32767
+
+# Derivable or constant per deployment - only sent in the verbose format
+STATIC_FIELDS = ('pose_name', 'real_mediapipe', 'analysis_timestamp', 'landmarks_count')
+
+
+def choose_encoding(accept=None, compact=None, format_name=None):
+    """
+    Pick the response encoding for a request
+    Args:
+        accept: Accept header value
+        compact: compact flag ("1"/"true"/True enable it)
+        format_name: Explicit format ("json", "compact" or "msgpack")
+    Returns:
+        VERBOSE, COMPACT or MSGPACK
+    """
+    if format_name in (VERBOSE, COMPACT, MSGPACK):
+        encoding = format_name
+    elif accept and any(mimetype in accept.lower() for mimetype in MSGPACK_MIMETYPES):
+        encoding = MSGPACK
+    elif compact is True or str(compact).lower() in TRUE_VALUES:
+        encoding = COMPACT
+    else:
+        encoding = VERBOSE
+    if encoding == MSGPACK and not MSGPACK_AVAILABLE:
+        return COMPACT
+    return encoding
+
+
+def quantize_landmarks(landmarks):
+    """(N, 4) landmark data -> flat int16 array of x, y, z, visibility in 1/LANDMARK_SCALE units"""
+    scaled = np.rint(landmarks.data * LANDMARK_SCALE)
+    return np.clip(scaled, INT16_MIN, INT16_MAX).astype('<i2').ravel()
+
+
+def dequantize_landmarks(values):
+    """Inverse of quantize_landmarks (for clients and tests): flat ints or int16 bytes -> LandmarkFrame"""
+    if isinstance(values, (bytes, bytearray, memoryview)):
+        values = np.frombuffer(values, dtype='<i2')
+    data = np.asarray(values, dtype=np.float32).reshape(-1, 4) / LANDMARK_SCALE
+    return LandmarkFrame(data)
+
+
+def verbose_response(response):
+    """Response dict as the default JSON body (landmark dicts rendered from the frame)"""
+    landmarks = response.get('landmarks')
+    if isinstance(landmarks, LandmarkFrame):
+        return {**response, 'landmarks': landmarks.to_json()}
+    return response
+
+
+def compact_response(response, binary=False):
+    """
+    Response dict without static fields and with quantized landmarks
+    Args:
+        response: Response dict (landmarks as a LandmarkFrame, or a list for empty results)
+        binary: Landmarks as little-endian int16 bytes (MessagePack) instead of a list of ints
+    """
+    compact = {key: value for key, value in response.items() if key not in STATIC_FIELDS}
+    landmarks = response.get('landmarks')
+    if landmarks is not None:
+        if not isinstance(landmarks, LandmarkFrame):
+            landmarks = LandmarkFrame.coerce(landmarks)
+        values = quantize_landmarks(landmarks)
+        compact['landmarks'] = values.tobytes() if binary else values.tolist()
+        compact['landmark_scale'] = LANDMARK_SCALE
+    return compact
+
+
+def encode_response(response, encoding):
+    """
+    Serialize a response dict
+    Args:
+        response: Response dict
+        encoding: VERBOSE, COMPACT or MSGPACK
+    Returns:
+        (body as str or bytes, mimetype)
+    """
+    if encoding == MSGPACK:
+        return msgpack.packb(compact_response(response, binary=True), use_bin_type=True), 'application/msgpack'
+    if encoding == COMPACT:
+        return json.dumps(compact_response(response), separators=(',', ':'), ensure_ascii=False), 'application/json'
+    return json.dumps(verbose_response(response)), 'application/json'
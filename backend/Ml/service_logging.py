@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Service Logging
+Leveled logging for the ML service. Request threads only put records on a
+bounded queue; a background QueueListener formats and writes them, so a slow
+terminal or log pipe never stalls frame processing. Per-frame debug traces are
+sampled per session: a sampled session logs every step, the others none.
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import zlib
+
+# Root level and per-logger overrides, e.g. "pose_rules=DEBUG,werkzeug=WARNING"
+LOG_LEVEL = os.environ.get('ML_LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.environ.get('ML_LOG_LEVELS', '')
+# "text" or "json" (one object per line, extra= fields included)
+LOG_FORMAT = os.environ.get('ML_LOG_FORMAT', 'text').lower()
+# Fraction of sessions (and of session-less frames) whose debug traces are kept
+TRACE_SAMPLE_RATE = float(os.environ.get('ML_LOG_TRACE_SAMPLE', '1.0'))
+# Records beyond this many waiting to be written are dropped (and counted)
+LOG_QUEUE_SIZE = int(os.environ.get('ML_LOG_QUEUE_SIZE', '10000'))
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_trace_sampled = contextvars.ContextVar('trace_sampled', default=True)
+_listener = None
+_handler = None
+_atexit_registered = False
+
+# Attributes every LogRecord has; anything else came from extra= and goes into JSON output
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TraceSampleFilter(logging.Filter):
+    """Drop DEBUG records of frames whose trace was not sampled"""
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or _trace_sampled.get()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: a full queue drops the record instead"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Same-process queue: leave message formatting to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_levels(spec):
+    """
+    Parse per-logger levels
+    Args:
+        spec: Comma-separated name=LEVEL pairs
+    Returns:
+        dict mapping logger name to level name
+    """
+    levels = {}
+    for item in spec.split(','):
+        name, _, level = item.strip().partition('=')
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level=None, stream=None, sample_rate=None, force=False):
+    """
+    Route all logging through a non-blocking queue (idempotent unless force=True)
+    Args:
+        level: Root level (defaults to ML_LOG_LEVEL)
+        stream: Where the listener writes (defaults to stdout, where the service always logged)
+        sample_rate: Trace sample rate (defaults to ML_LOG_TRACE_SAMPLE)
+        force: Replace an existing configuration (used by bench_logging.py)
+    """
+    global _listener, _handler, _atexit_registered, TRACE_SAMPLE_RATE
+    if _listener is not None:
+        if not force:
+            return
+        shutdown_logging()
+    if sample_rate is not None:
+        TRACE_SAMPLE_RATE = sample_rate
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    _handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _handler.addFilter(TraceSampleFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel(level or LOG_LEVEL)
+    for name, logger_level in parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(shutdown_logging)
+        _atexit_registered = True
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records():
+    """Records dropped because the log queue was full"""
+    return _handler.dropped if _handler is not None else 0
+
+
+def sample_trace(session_id=None):
+    """Decide whether a frame's debug trace is kept; a session is either fully sampled or not"""
+    if TRACE_SAMPLE_RATE >= 1:
+        return True
+    if TRACE_SAMPLE_RATE <= 0:
+        return False
+    if session_id:
+        return zlib.crc32(str(session_id).encode()) % 10000 < TRACE_SAMPLE_RATE * 10000
+    return random.random() < TRACE_SAMPLE_RATE
+
+
+@contextlib.contextmanager
+def frame_trace(session_id=None):
+    """Scope the trace sampling decision to one frame (per thread / task)"""
+    token = _trace_sampled.set(sample_trace(session_id))
+    try:
+        yield
+    finally:
+        _trace_sampled.reset(token)
+
+
+def tracing(logger):
+    """True when `logger` would emit a debug trace for the current frame.
+
+    Guard debug lines whose arguments are costly to build (sliced lists, comprehensions).
+    """
+    return logger.isEnabledFor(logging.DEBUG) and _trace_sampled.get()
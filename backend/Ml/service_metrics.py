@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Service Metrics
+Prometheus histograms of where a detect-pose frame spends its time (request
+parsing, decoding, detector wait, detection, analysis, encoding), plus frames
+in flight, detector contention and per-pose outcome counters. Exposed as
+Prometheus text on /metrics. Stage times also go to the request's
+Server-Timing breakdown when one was asked for (see common/request_timing.py).
+Without prometheus_client, and with no timing requested, every call is a no-op.
+"""
+
+import contextlib
+import os
+import sys
+
+# The request and stage timers live in backend/common, shared with the diet service
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common.request_timing import PROMETHEUS_AVAILABLE, StageTimer
+
+# Without prometheus_client nothing is recorded and /metrics reports it missing
+if PROMETHEUS_AVAILABLE:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, generate_latest
+
+STAGES = StageTimer('ml_stage_seconds', 'Time spent in each detect-pose processing stage')
+# Time a `with` block into a stage / record an already measured stage duration
+stage = STAGES.stage
+observe = STAGES.observe
+
+if PROMETHEUS_AVAILABLE:
+    FRAMES = Counter('ml_frames', 'Frames handled, by requested pose and outcome', ['pose_type', 'outcome'])
+    IN_FLIGHT = Gauge('ml_frames_in_flight', 'Frames currently being processed')
+    DETECTOR_CHECKOUTS = Counter('ml_detector_checkouts', 'Detector pool checkouts by whether they had to wait',
+                                 ['result'])
+
+# Checkouts that waited less than this count as uncontended
+CONTENTION_THRESHOLD_S = 0.001
+
+
+def count_frame(pose_type, outcome):
+    """
+    Count one handled frame
+    Args:
+        pose_type: Requested pose (callers map unknown values to a fixed label)
+        outcome: detected, no_pose, reused, superseded, busy or error
+    """
+    if PROMETHEUS_AVAILABLE:
+        FRAMES.labels(pose_type, outcome).inc()
+
+
+@contextlib.contextmanager
+def frame_in_flight():
+    """Count a frame as in flight for a `with` block (or a decorated view)"""
+    if not PROMETHEUS_AVAILABLE:
+        yield
+        return
+    IN_FLIGHT.inc()
+    try:
+        yield
+    finally:
+        IN_FLIGHT.dec()
+
+
+def record_checkout(waited=0.0, timed_out=False):
+    """Record a detector pool checkout: the wait as a stage plus its contention outcome"""
+    observe('detector_wait', waited)
+    if not PROMETHEUS_AVAILABLE:
+        return
+    if timed_out:
+        result = 'timeout'
+    else:
+        result = 'waited' if waited >= CONTENTION_THRESHOLD_S else 'immediate'
+    DETECTOR_CHECKOUTS.labels(result).inc()
+
+
+def render_metrics():
+    """
+    Current metrics in the Prometheus text format
+    Returns:
+        (body, content type), or (None, None) without prometheus_client
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return None, None
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Per-Session State
+Each client session keeps its own state between frames. With tracking
+enabled that includes a PoseLandmarker in VIDEO running mode so MediaPipe
+can track the person between frames instead of re-running the full person
+detector on every frame. Sessions also gate admission: one frame in
+flight and at most one waiting, with newer frames superseding the waiter.
+Idle sessions are evicted, and the least recently used ones go first when
+the store exceeds its session or memory cap. An evicted session with a frame
+in flight keeps its detector until that frame finishes; a closed session
+never creates a new one.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of PoseSession.admit()
+ADMITTED = 'admitted'
+SUPERSEDED = 'superseded'
+BUSY = 'busy'
+
+# Weight of the newest frame in the per-session latency average
+LATENCY_SMOOTHING = 0.2
+
+# Rough footprint of a session without its arrays and detector (objects, locks, small dicts)
+SESSION_BASE_BYTES = 4096
+
+
+class SessionClosed(Exception):
+    """The session was evicted; its frames should use the shared detectors"""
+    pass
+
+
+class PoseSession:
+    def __init__(self, session_id, detector_factory=None):
+        """
+        One client session
+        Args:
+            session_id: Client-provided session identifier
+            detector_factory: Callable creating a VIDEO-mode detector, or None for no tracking
+        """
+        self.session_id = session_id
+        self.detector_factory = detector_factory
+        self.detector = None
+        self.lock = threading.Lock()
+        self.closed = False
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_timestamp_ms = -1
+        self.frames = 0
+        # Last processed frame, used to short-circuit near-identical frames
+        self.dedup = None
+        # One Euro filter state of the session's landmarks (see landmark_filter.py)
+        self.landmark_filter = None
+        # Pose hold in progress (see pose_hold.py)
+        self.hold = None
+        # Admission: one frame in flight, one waiting; a newer frame replaces the waiter
+        self._admission = threading.Condition()
+        self._in_flight = False
+        self._waiting = None
+        self._tickets = itertools.count()
+        self.avg_latency_ms = None
+
+    @property
+    def tracking(self):
+        return self.detector_factory is not None
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def memory_bytes(self, detector_bytes=0):
+        """
+        Estimated memory held by this session
+        Args:
+            detector_bytes: Estimate charged for a loaded tracking detector
+        """
+        size = SESSION_BASE_BYTES
+        if self.detector is not None:
+            size += detector_bytes
+        dedup = self.dedup
+        if dedup is not None:
+            size += dedup.signature.nbytes
+            # Cached response: the landmark array dominates
+            landmarks = getattr(dedup.response.get("landmarks"), "data", None)
+            if landmarks is not None:
+                size += landmarks.nbytes
+        landmark_filter = self.landmark_filter
+        if landmark_filter is not None:
+            size += landmark_filter.values.nbytes + landmark_filter.derivative.nbytes
+        return size
+
+    def admit(self, timeout):
+        """
+        Wait for this session's turn to run a frame
+        Args:
+            timeout: Max seconds to wait behind the in-flight frame
+        Returns:
+            ADMITTED (call finish() afterwards), SUPERSEDED if a newer frame
+            took the waiting spot, or BUSY if the in-flight frame did not finish in time
+        """
+        deadline = time.monotonic() + timeout
+        with self._admission:
+            if not self._in_flight and self._waiting is None:
+                self._in_flight = True
+                return ADMITTED
+
+            ticket = next(self._tickets)
+            self._waiting = ticket  # Any older waiter is superseded
+            self._admission.notify_all()
+            while self._in_flight and self._waiting == ticket:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._admission.wait(remaining)
+
+            if self._waiting != ticket:
+                return SUPERSEDED
+            self._waiting = None
+            if self._in_flight:
+                return BUSY
+            self._in_flight = True
+            return ADMITTED
+
+    def finish(self, elapsed):
+        """Release the in-flight spot and fold the frame's latency into the average"""
+        with self._admission:
+            self._in_flight = False
+            elapsed_ms = elapsed * 1000
+            if self.avg_latency_ms is None:
+                self.avg_latency_ms = elapsed_ms
+            else:
+                self.avg_latency_ms += LATENCY_SMOOTHING * (elapsed_ms - self.avg_latency_ms)
+            self._admission.notify_all()
+            release = self.closed
+        if release:
+            # Evicted while this frame ran - close() left the detector to us
+            self._release_detector()
+
+    def detect(self, mp_image):
+        """
+        Run tracked detection on one frame with a strictly increasing timestamp
+        Raises:
+            SessionClosed: The session was evicted and has no detector left
+        """
+        with self.lock:
+            if self.detector is None:
+                if self.closed:
+                    raise SessionClosed(self.session_id)
+                # Model loading is slow - only sessions that send frames pay for it
+                self.detector = self.detector_factory()
+            # VIDEO mode rejects repeated or decreasing timestamps
+            timestamp_ms = max(int((time.monotonic() - self.created_at) * 1000), self.last_timestamp_ms + 1)
+            self.last_timestamp_ms = timestamp_ms
+            self.frames += 1
+            return self.detector.detect_for_video(mp_image, timestamp_ms)
+
+    def close(self):
+        """Mark the session closed; the detector is released now, or by finish() if a frame is in flight"""
+        with self._admission:
+            self.closed = True
+            deferred = self._in_flight
+        if not deferred:
+            self._release_detector()
+
+    def _release_detector(self):
+        with self.lock:
+            if self.detector is None:
+                return
+            try:
+                self.detector.close()
+            except Exception as e:
+                logger.warning("⚠️ Error closing session detector %s: %s", self.session_id, e)
+            self.detector = None
+
+
+class SessionStore:
+    def __init__(self, detector_factory=None, idle_timeout=60.0, max_sessions=64, sweep_interval=5.0,
+                 memory_limit=0, detector_bytes=0):
+        """
+        Create sessions on demand and evict them when idle
+        Args:
+            detector_factory: Zero-argument callable returning a VIDEO-mode detector (None disables tracking)
+            idle_timeout: Seconds without a frame before a session is closed
+            max_sessions: Cap on sessions; beyond it the least recently used one without a frame
+                in flight is evicted
+            sweep_interval: Minimum seconds between idle sweeps
+            memory_limit: Estimated bytes all sessions may hold before the least recently used are evicted (0 = no cap)
+            detector_bytes: Estimated memory of one session's tracking detector
+        """
+        self.detector_factory = detector_factory
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max(1, int(max_sessions))
+        self.memory_limit = memory_limit
+        self.detector_bytes = detector_bytes
+        self.sweep_interval = sweep_interval
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._created = 0
+        self._evicted = 0
+        self._in_flight = 0
+        self._superseded = 0
+        self._busy = 0
+
+    @property
+    def tracking(self):
+        return self.detector_factory is not None
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def get(self, session_id):
+        """Return the session for `session_id`, creating it if needed"""
+        self.evict_idle()
+        evicted = []
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            else:
+                session = PoseSession(session_id, self.detector_factory)
+                self._sessions[session_id] = session
+                self._created += 1
+                evicted.extend(self._evict_over_count(session_id))
+            evicted.extend(self._evict_over_memory())
+        session.touch()
+        for stale in evicted:
+            stale.close()
+        return session
+
+    def memory_bytes(self):
+        """Estimated memory held by all sessions"""
+        with self._lock:
+            return sum(s.memory_bytes(self.detector_bytes) for s in self._sessions.values())
+
+    def _evict_over_count(self, keep):
+        """Pop least recently used sessions beyond max_sessions (caller holds the lock).
+
+        Sessions with a frame in flight are skipped, so a burst of more live
+        clients than the cap briefly exceeds it instead of evicting active ones.
+        """
+        evicted = []
+        excess = len(self._sessions) - self.max_sessions
+        if excess <= 0:
+            return evicted
+        for sid in [sid for sid, s in self._sessions.items() if sid != keep and not s.in_flight][:excess]:
+            evicted.append(self._sessions.pop(sid))
+            self._evicted += 1
+        return evicted
+
+    def _evict_over_memory(self):
+        """Pop least recently used sessions until the memory estimate fits (caller holds the lock).
+
+        Like _evict_over_count(), sessions with a frame in flight are skipped and
+        the estimate stays over the limit until they finish.
+        """
+        if self.memory_limit <= 0:
+            return []
+        sizes = {sid: s.memory_bytes(self.detector_bytes) for sid, s in self._sessions.items()}
+        total = sum(sizes.values())
+        evicted = []
+        # The most recently used session (the caller's) is never evicted
+        for sid in list(self._sessions)[:-1]:
+            if total <= self.memory_limit:
+                break
+            if self._sessions[sid].in_flight:
+                continue
+            evicted.append(self._sessions.pop(sid))
+            total -= sizes[sid]
+            self._evicted += 1
+        return evicted
+
+    def admit(self, session, timeout):
+        """Run PoseSession.admit() and keep service-wide admission counters"""
+        result = session.admit(timeout)
+        with self._lock:
+            if result == ADMITTED:
+                self._in_flight += 1
+            elif result == SUPERSEDED:
+                self._superseded += 1
+            else:
+                self._busy += 1
+        return result
+
+    def finish(self, session, elapsed):
+        """Counterpart of admit() for admitted frames"""
+        session.finish(elapsed)
+        with self._lock:
+            self._in_flight -= 1
+
+    def evict_idle(self, force=False):
+        """Close sessions that have not seen a frame within the idle timeout"""
+        now = time.monotonic()
+        if not force and now - self._last_sweep < self.sweep_interval:
+            return 0
+        with self._lock:
+            self._last_sweep = now
+            idle = [sid for sid, s in self._sessions.items() if now - s.last_used > self.idle_timeout]
+            expired = [self._sessions.pop(sid) for sid in idle]
+            self._evicted += len(expired)
+        for session in expired:
+            session.close()
+        if expired:
+            logger.info("🧹 Evicted %d idle pose sessions", len(expired))
+        return len(expired)
+
+    def discard(self, session_id):
+        """Close one session right away (e.g. when its stream disconnects)"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def stats(self):
+        """Snapshot of active sessions and churn"""
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "tracking": self.tracking,
+                "tracked_detectors": sum(1 for s in self._sessions.values() if s.detector is not None),
+                "max_sessions": self.max_sessions,
+                "idle_timeout_s": self.idle_timeout,
+                "memory_limit_mb": round(self.memory_limit / 2**20, 1),
+                "memory_mb": round(sum(s.memory_bytes(self.detector_bytes) for s in self._sessions.values()) / 2**20, 2),
+                "created": self._created,
+                "evicted": self._evicted,
+                "frames_in_flight": self._in_flight,
+                "superseded": self._superseded,
+                "admission_timeouts": self._busy
+            }
+
+    def close(self):
+        """Close every session detector"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
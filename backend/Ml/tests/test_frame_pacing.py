@@ -0,0 +1,44 @@
+"""next_frame_interval_ms: an idle service suggests the floor interval"""
+
+import uuid
+
+import cv2
+import numpy as np
+import pytest
+
+from session_store import ADMITTED
+
+app_module = pytest.importorskip('app')
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # One detector, so any other frame in flight is full load
+    monkeypatch.setattr(app_module, 'DETECTOR_POOL_SIZE', 1)
+    return app_module.app.test_client()
+
+
+def post_frame(client, session_id):
+    ok, encoded = cv2.imencode('.jpg', np.full((120, 160, 3), 128, dtype=np.uint8))
+    assert ok
+    reply = client.post('/api/ml/detect-pose', data=encoded.tobytes(), content_type='image/jpeg',
+                        headers={'X-Session-Id': session_id, 'X-Pose-Type': 'yog3'})
+    assert reply.status_code == 200
+    return reply.get_json()
+
+
+def test_idle_session_gets_the_floor_interval(client):
+    response = post_frame(client, f"idle-{uuid.uuid4().hex}")
+    assert response["success"] is True
+    assert response["next_frame_interval_ms"] == app_module.MIN_FRAME_INTERVAL_MS
+
+
+def test_other_sessions_in_flight_stretch_the_interval(client):
+    store = app_module.session_store
+    other = store.get(f"busy-{uuid.uuid4().hex}")
+    assert store.admit(other, 1.0) == ADMITTED
+    try:
+        response = post_frame(client, f"paced-{uuid.uuid4().hex}")
+    finally:
+        store.finish(other, 0.01)
+    assert response["next_frame_interval_ms"] == 2 * app_module.MIN_FRAME_INTERVAL_MS
@@ -0,0 +1,83 @@
+"""Frames decode straight to a model-sized RGB image"""
+
+import cv2
+import numpy as np
+import pytest
+
+from frame_preprocessing import (decode_frame, fit_to_max_side, parse_pose_profiles, read_image_size,
+                                 reduced_decode_flag)
+
+
+def encode(extension, width, height, bgr=(0, 0, 255), params=()):
+    """Encode a solid BGR frame (red by default)"""
+    ok, data = cv2.imencode(extension, np.full((height, width, 3), bgr, dtype=np.uint8), list(params))
+    assert ok
+    return data
+
+
+@pytest.mark.parametrize("extension, params", [
+    ('.jpg', ()),
+    ('.jpg', (cv2.IMWRITE_JPEG_PROGRESSIVE, 1)),
+    ('.png', ()),
+    ('.webp', (cv2.IMWRITE_WEBP_QUALITY, 80)),
+    ('.webp', (cv2.IMWRITE_WEBP_QUALITY, 101)),  # Lossless (VP8L)
+])
+def test_read_image_size_from_the_header(extension, params):
+    if not cv2.haveImageWriter(extension):
+        pytest.skip(f"OpenCV cannot write {extension}")
+    assert read_image_size(encode(extension, 1280, 720, params=params)) == (1280, 720)
+    assert read_image_size(encode(extension, 33, 517, params=params).tobytes()) == (33, 517)
+
+
+def test_read_image_size_rejects_unknown_data():
+    assert read_image_size(np.frombuffer(b'GIF89a' + bytes(58), dtype=np.uint8)) is None
+    assert read_image_size(b'') is None
+
+
+@pytest.mark.parametrize("size, max_side, expected", [
+    ((3840, 2160), 640, cv2.IMREAD_REDUCED_COLOR_4),
+    ((1920, 1080), 640, cv2.IMREAD_REDUCED_COLOR_2),
+    ((5120, 2880), 640, cv2.IMREAD_REDUCED_COLOR_8),
+    ((1279, 720), 640, cv2.IMREAD_COLOR),
+    ((1920, 1080), 0, cv2.IMREAD_COLOR),
+    (None, 640, cv2.IMREAD_COLOR),
+])
+def test_reduced_decode_never_goes_below_the_max_side(size, max_side, expected):
+    assert reduced_decode_flag(size, max_side) == expected
+
+
+def test_fit_to_max_side():
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+    assert fit_to_max_side(image, 640).shape == (360, 640, 3)
+    assert fit_to_max_side(image, 1280) is image
+    assert fit_to_max_side(image, 0) is image
+
+    buffers = []
+    def dst(shape):
+        buffers.append(np.empty(shape, dtype=np.uint8))
+        return buffers[-1]
+    assert fit_to_max_side(image, 320, dst=dst) is buffers[0]
+    assert buffers[0].shape == (180, 320, 3)
+
+
+@pytest.mark.parametrize("extension", ['.jpg', '.png'])
+def test_decode_frame_returns_rgb_within_the_max_side(extension):
+    image = decode_frame(encode(extension, 1920, 1080), max_side=640)
+    assert image.shape == (360, 640, 3) and image.dtype == np.uint8
+    red, green, blue = image[180, 320].tolist()
+    assert red > 200 and green < 50 and blue < 50
+
+    # Frames that already fit keep their size
+    assert decode_frame(encode(extension, 320, 240), max_side=640).shape == (240, 320, 3)
+    assert decode_frame(encode(extension, 1920, 1080), max_side=0).shape == (1080, 1920, 3)
+
+
+def test_decode_frame_rejects_garbage():
+    assert decode_frame(np.frombuffer(b'\xff\xd8not a jpeg at all', dtype=np.uint8)) is None
+
+
+def test_parse_pose_profiles():
+    assert parse_pose_profiles("yog5:960, yog6:800") == {'yog5': 960, 'yog6': 800}
+    assert parse_pose_profiles("yog5:big,yog6:800,junk") == {'yog6': 800}
+    assert parse_pose_profiles("") == {}
+    assert parse_pose_profiles(None) == {}
@@ -0,0 +1,67 @@
+"""The vectorized joint angles match the per-angle formula they replaced"""
+
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from joint_angles import (ANGLE_INDEX, ANGLE_NAMES, JOINT_ANGLES, LANDMARK_COUNT, RIGHT_ELBOW, RIGHT_SHOULDER,
+                          RIGHT_WRIST, angle_between, compute_joint_angles, joint_angle_dict, landmarks_to_array)
+
+
+def scalar_angle(a, b, c):
+    """The classic three-point formula, one angle at a time"""
+    radians = math.atan2(c[1] - b[1], c[0] - b[0]) - math.atan2(a[1] - b[1], a[0] - b[0])
+    angle = abs(radians * 180.0 / math.pi)
+    return 360 - angle if angle > 180.0 else angle
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_the_scalar_formula(seed):
+    points = np.random.default_rng(seed).uniform(0.0, 1.0, size=(LANDMARK_COUNT, 3)).astype(np.float32)
+    angles = compute_joint_angles(points)
+    assert angles.shape == (len(JOINT_ANGLES),)
+    for i, (name, first, vertex, last) in enumerate(JOINT_ANGLES):
+        expected = scalar_angle(*(points[index].astype(np.float64) for index in (first, vertex, last)))
+        assert angles[i] == pytest.approx(expected, abs=1e-9), name
+
+
+def test_known_angles():
+    assert angle_between((1, 0), (0, 0), (0, 1)) == pytest.approx(90.0)
+    assert angle_between((-1, 0), (0, 0), (1, 0)) == pytest.approx(180.0)
+    assert angle_between((1, 0), (0, 0), (1, 1)) == pytest.approx(45.0)
+    # Reflex angles fold back into 0-180, and z is ignored
+    assert angle_between((1, 0, 5), (0, 0, -5), (1, -1, 0)) == pytest.approx(45.0)
+
+
+def test_named_angles():
+    points = np.zeros((LANDMARK_COUNT, 3), dtype=np.float32)
+    points[RIGHT_SHOULDER] = (0.5, 0.2, 0.0)
+    points[RIGHT_ELBOW] = (0.5, 0.4, 0.0)
+    points[RIGHT_WRIST] = (0.7, 0.4, 0.0)
+    angles = joint_angle_dict(points)
+    assert tuple(angles) == ANGLE_NAMES
+    assert angles['right_elbow'] == pytest.approx(90.0)
+    assert compute_joint_angles(points)[ANGLE_INDEX['right_elbow']] == pytest.approx(90.0)
+
+
+def test_landmarks_to_array_accepts_every_landmark_form():
+    rows = [(0.1, 0.2, 0.3), (0.4, 0.5, -0.1)]
+    expected = np.array(rows, dtype=np.float32)
+    forms = [
+        [{'x': x, 'y': y, 'z': z, 'visibility': 0.9} for x, y, z in rows],
+        [SimpleNamespace(x=x, y=y, z=z) for x, y, z in rows],
+        rows,
+    ]
+    for landmarks in forms:
+        array = landmarks_to_array(landmarks)
+        assert array.dtype == np.float32
+        np.testing.assert_array_equal(array, expected)
+
+    # Missing z defaults to 0; arrays pass through untouched
+    flat = np.array([[0.1, 0.2, 0.0]], dtype=np.float32)
+    np.testing.assert_array_equal(landmarks_to_array([{'x': 0.1, 'y': 0.2}]), flat)
+    np.testing.assert_array_equal(landmarks_to_array([(0.1, 0.2)]), flat)
+    assert landmarks_to_array(expected) is expected
+    assert landmarks_to_array([]).shape == (0, 3)
@@ -0,0 +1,113 @@
+"""Verbose, compact and MessagePack replies carry the same landmarks"""
+
+import json
+
+import numpy as np
+import pytest
+
+from landmark_frame import LandmarkFrame
+from response_encoding import (COMPACT, LANDMARK_SCALE, MSGPACK, VERBOSE, choose_encoding, dequantize_landmarks,
+                               encode_response, quantize_landmarks)
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    data = rng.uniform(-0.5, 1.5, size=(33, 4)).astype(np.float32)
+    data[:, 3] = rng.uniform(0.0, 1.0, size=33)
+    return LandmarkFrame(data)
+
+
+def response_for(frame):
+    return {"success": True, "pose_detected": True, "pose_name": "Tree Pose", "accuracy_score": 87,
+            "landmarks_count": len(frame), "landmarks": frame}
+
+
+def test_verbose_round_trip(frame):
+    body, mimetype = encode_response(response_for(frame), VERBOSE)
+    assert mimetype == 'application/json'
+    decoded = json.loads(body)
+    assert decoded["pose_name"] == "Tree Pose"
+    restored = LandmarkFrame.from_dicts(decoded["landmarks"])
+    # Visibility is rounded to 4 decimals in the verbose format
+    np.testing.assert_allclose(restored.data, frame.data, atol=0.5 / LANDMARK_SCALE)
+
+
+def test_compact_round_trip(frame):
+    body, mimetype = encode_response(response_for(frame), COMPACT)
+    assert mimetype == 'application/json'
+    decoded = json.loads(body)
+    assert "pose_name" not in decoded and "landmarks_count" not in decoded
+    assert decoded["accuracy_score"] == 87
+    assert decoded["landmark_scale"] == LANDMARK_SCALE
+    assert len(decoded["landmarks"]) == 33 * 4
+    restored = dequantize_landmarks(decoded["landmarks"])
+    np.testing.assert_allclose(restored.data, frame.data, atol=0.5 / LANDMARK_SCALE + 1e-6)
+
+
+def test_msgpack_round_trip(frame):
+    msgpack = pytest.importorskip('msgpack')
+    body, mimetype = encode_response(response_for(frame), MSGPACK)
+    assert mimetype == 'application/msgpack'
+    decoded = msgpack.unpackb(body, raw=False)
+    assert isinstance(decoded["landmarks"], bytes) and len(decoded["landmarks"]) == 33 * 4 * 2
+    restored = dequantize_landmarks(decoded["landmarks"])
+    np.testing.assert_allclose(restored.data, frame.data, atol=0.5 / LANDMARK_SCALE + 1e-6)
+
+
+def test_quantization_is_one_ten_thousandth_and_clipped():
+    frame = LandmarkFrame(np.array([[0.1234, -0.00004, 0.00006, 1.0],
+                                    [3.5, -3.5, 0.0, 0.8]], dtype=np.float32))
+    values = quantize_landmarks(frame)
+    assert values.dtype == np.dtype('<i2')
+    assert values[:4].tolist() == [1234, 0, 1, 10000]
+    # Out-of-range coordinates saturate instead of wrapping around
+    assert values[4:].tolist() == [32767, -32768, 0, 8000]
+
+
+def test_empty_landmarks_stay_empty():
+    body, _ = encode_response({"success": True, "pose_detected": False, "landmarks": []}, COMPACT)
+    assert json.loads(body)["landmarks"] == []
+
+
+@pytest.mark.parametrize("accept, compact, format_name, expected", [
+    (None, None, None, VERBOSE),
+    ('application/json', None, None, VERBOSE),
+    ('application/json', '1', None, COMPACT),
+    ('application/json', 'false', None, VERBOSE),
+    (None, True, None, COMPACT),
+    ('application/x-msgpack, application/json;q=0.5', None, None, MSGPACK),
+    ('Application/MsgPack', None, None, MSGPACK),
+    ('application/msgpack', None, 'json', VERBOSE),
+    (None, None, 'compact', COMPACT),
+    (None, None, 'xml', VERBOSE),
+])
+def test_choose_encoding(accept, compact, format_name, expected):
+    pytest.importorskip('msgpack')
+    assert choose_encoding(accept, compact, format_name) == expected
+
+
+def test_msgpack_falls_back_to_compact_without_msgpack(monkeypatch):
+    import response_encoding
+    monkeypatch.setattr(response_encoding, 'MSGPACK_AVAILABLE', False)
+    assert choose_encoding('application/msgpack') == COMPACT
+
+
+def test_detect_pose_answers_in_the_accepted_encoding():
+    msgpack = pytest.importorskip('msgpack')
+    cv2 = pytest.importorskip('cv2')
+    app_module = pytest.importorskip('app')
+    ok, encoded = cv2.imencode('.jpg', np.full((120, 160, 3), 128, dtype=np.uint8))
+    assert ok
+    client = app_module.app.test_client()
+
+    reply = client.post('/api/ml/detect-pose', data=encoded.tobytes(), content_type='image/jpeg',
+                        headers={'Accept': 'application/msgpack'})
+    assert reply.status_code == 200
+    assert reply.mimetype == 'application/msgpack'
+    assert 'Accept' in reply.headers.get('Vary', '')
+    assert msgpack.unpackb(reply.data, raw=False)["success"] is True
+
+    reply = client.post('/api/ml/detect-pose', data=encoded.tobytes(), content_type='image/jpeg')
+    assert reply.mimetype == 'application/json'
+    assert "pose_name" in reply.get_json()
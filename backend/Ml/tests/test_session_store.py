@@ -0,0 +1,93 @@
+"""SessionStore eviction never leaks or steals a detector from an in-flight frame"""
+
+import pytest
+
+from session_store import ADMITTED, SessionClosed, SessionStore
+
+
+class FakeDetector:
+    def __init__(self):
+        self.closed = False
+
+    def detect_for_video(self, image, timestamp_ms):
+        assert not self.closed
+        return timestamp_ms
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def detectors():
+    return []
+
+
+@pytest.fixture
+def store(detectors):
+    def factory():
+        detectors.append(FakeDetector())
+        return detectors[-1]
+    return SessionStore(factory, max_sessions=2)
+
+
+def test_eviction_defers_close_until_the_frame_finishes(store, detectors):
+    session = store.get('a')
+    assert store.admit(session, 1.0) == ADMITTED
+    session.detect(None)
+
+    session.close()
+    assert not detectors[0].closed
+    session.detect(None)  # The in-flight frame still has its detector
+    store.finish(session, 0.01)
+    assert detectors[0].closed and session.detector is None
+
+
+def test_closed_session_never_creates_a_detector(store, detectors):
+    session = store.get('a')
+    session.close()
+    with pytest.raises(SessionClosed):
+        session.detect(None)
+    assert detectors == []
+
+
+def test_cap_skips_sessions_with_a_frame_in_flight(store):
+    busy = store.get('a')
+    assert store.admit(busy, 1.0) == ADMITTED
+    idle = store.get('b')
+    store.get('x')
+    assert idle.closed and not busy.closed
+    assert store.stats()['active'] == 2
+
+    newest = store.get('c')
+    assert store.admit(newest, 1.0) == ADMITTED
+    store.get('d')  # Every older session has a frame in flight: the cap is exceeded instead
+    assert not busy.closed and not newest.closed
+    assert store.stats()['active'] == 3
+    store.finish(busy, 0.01)
+    store.finish(newest, 0.01)
+
+
+def test_memory_cap_skips_sessions_with_a_frame_in_flight(detectors):
+    def factory():
+        detectors.append(FakeDetector())
+        return detectors[-1]
+    store = SessionStore(factory, max_sessions=100, memory_limit=1_500_000, detector_bytes=1_000_000)
+
+    busy = store.get('a')
+    assert store.admit(busy, 1.0) == ADMITTED
+    busy.detect(None)
+    idle = store.get('b')
+    idle.detect(None)
+    store.get('c')  # Two loaded detectors are over the cap: only the idle one may go
+    assert idle.closed and not busy.closed
+    assert not detectors[0].closed and detectors[1].closed
+
+    newest = store.get('c')
+    assert store.admit(newest, 1.0) == ADMITTED
+    newest.detect(None)
+    store.get('d')  # Every loaded detector is in use: the cap is exceeded instead
+    assert not busy.closed and not newest.closed
+    assert store.stats()['active'] == 3
+    busy.detect(None)
+    store.finish(busy, 0.01)
+    store.finish(newest, 0.01)
@@ -0,0 +1,72 @@
+"""WebSocket stream: a bad frame gets an error reply and the stream keeps serving"""
+
+import base64
+import json
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+app_module = pytest.importorskip('app')
+simple_websocket = pytest.importorskip('simple_websocket')
+if not app_module.SOCK_AVAILABLE:
+    pytest.skip("flask-sock not installed", allow_module_level=True)
+
+
+@pytest.fixture(scope='module')
+def stream_url():
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"ws://127.0.0.1:{server.server_port}/api/ml/stream?pose_type=yog3"
+    server.shutdown()
+    thread.join(timeout=5)
+
+
+def encoded_frame():
+    ok, encoded = cv2.imencode('.jpg', np.full((120, 160, 3), 128, dtype=np.uint8))
+    assert ok
+    return "data:image/jpeg;base64," + base64.b64encode(encoded.tobytes()).decode('ascii')
+
+
+def receive_json(ws):
+    message = ws.receive(timeout=10)
+    assert message is not None, "stream did not answer"
+    return json.loads(message)
+
+
+def test_malformed_frame_keeps_stream_open(stream_url):
+    ws = simple_websocket.Client.connect(stream_url)
+    try:
+        ws.send(json.dumps({"image": 5, "frame_id": 1}))
+        error = receive_json(ws)
+        assert error["success"] is False
+        assert error["frame_id"] == 1
+
+        ws.send(json.dumps({"image": encoded_frame(), "frame_id": 2}))
+        reply = receive_json(ws)
+        assert reply["frame_id"] == 2
+        assert reply["success"] is True
+    finally:
+        ws.close()
+
+
+def test_failing_frame_gets_error_reply(stream_url, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("worker died")
+
+    ws = simple_websocket.Client.connect(stream_url)
+    try:
+        monkeypatch.setattr(app_module, 'process_pose_frame', fail)
+        ws.send(json.dumps({"image": encoded_frame(), "frame_id": 7}))
+        error = receive_json(ws)
+        assert error == {**error, "success": False, "error": "worker died", "frame_id": 7}
+
+        monkeypatch.undo()
+        ws.send(json.dumps({"image": encoded_frame(), "frame_id": 8}))
+        assert receive_json(ws)["frame_id"] == 8
+    finally:
+        ws.close()
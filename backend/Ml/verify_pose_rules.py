@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Pose Rule Regression Check
+Replays the landmark frames in fixtures/pose_rules_regression.json through
+analyze_pose_accuracy and compares score, feedback and corrections with the
+recorded results. Also reports which rule buckets the fixture exercises and
+checks that auto recognition picks the best of the per-pose results.
+
+Usage:
+    python verify_pose_rules.py                     # check against the fixture
+    python verify_pose_rules.py --rules my_rules.json
+    python verify_pose_rules.py --record            # re-record after an intended rule change
+    python verify_pose_rules.py --generate 40       # new fixture: random frames covering every bucket
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pose_rules_regression.json')
+
+# Fixture coordinates are stored as integer multiples of 1/COORDINATE_SCALE (exact in float32)
+COORDINATE_SCALE = 1024
+
+
+def frame_from_fixture(points):
+    """LandmarkFrame from integer fixture coordinates (z is not used by the rules)"""
+    from landmark_frame import LandmarkFrame
+    data = np.zeros((len(points), 3), dtype=np.float32)
+    data[:, :2] = np.asarray(points, dtype=np.float32) / COORDINATE_SCALE
+    return LandmarkFrame(data)
+
+
+def result_record(frame_index, pose_type, result):
+    score, feedback, corrections = result
+    return {"frame": frame_index, "pose_type": pose_type, "score": score,
+            "feedback": feedback, "corrections": corrections}
+
+
+def random_frames(count, seed):
+    """Candidate frames from a mix of uniform, clustered and threshold-aligned layouts"""
+    rng = np.random.default_rng(seed)
+    for k in range(count):
+        mode = k % 3
+        if mode == 0:
+            points = rng.random((33, 2))
+        elif mode == 1:
+            points = 0.5 + rng.normal(0, 0.15, (33, 2))
+        else:
+            points = np.round(rng.random((33, 2)) * 20) / 20
+        yield np.clip(np.round(points * COORDINATE_SCALE), 0, COORDINATE_SCALE).astype(int)
+
+
+def coverage_keys(rules, frame):
+    """(pose, rule, bucket) keys a frame hits across all poses"""
+    return {(pose_type,) + key for pose_type, pose in rules.items() for key in pose.trace(frame)}
+
+
+def all_coverage_keys(rules):
+    return {(pose_type,) + key for pose_type, pose in rules.items() for key in pose.coverage_keys()}
+
+
+def generate_fixture(rules, extra, seed=7, candidates=20000):
+    """Pick frames greedily until every reachable bucket is covered, plus `extra` random ones"""
+    wanted = all_coverage_keys(rules)
+    covered = set()
+    chosen = []
+    pool = list(random_frames(candidates, seed))
+    for points in pool:
+        keys = coverage_keys(rules, frame_from_fixture(points)) & wanted
+        if keys - covered:
+            covered |= keys
+            chosen.append(points)
+        if covered == wanted:
+            break
+    chosen.extend(pool[-extra:] if extra else [])
+    missing = sorted(wanted - covered, key=str)
+    if missing:
+        print(f"⚠️ Buckets no candidate frame reached: {missing}")
+    return [points.tolist() for points in chosen]
+
+
+def write_fixture(path, fixture):
+    """One frame / case per line so rule changes show up as readable diffs"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    dump = lambda value: json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n"coordinate_scale": %d,\n"frames": [\n' % COORDINATE_SCALE)
+        f.write(',\n'.join(dump(frame) for frame in fixture["frames"]))
+        f.write('\n],\n"cases": [\n')
+        f.write(',\n'.join(dump(case) for case in fixture["cases"]))
+        f.write('\n]\n}\n')
+
+
+def evaluate(frames, pose_types):
+    from pose_analysis import analyze_pose_accuracy
+    cases = []
+    for index, points in enumerate(frames):
+        frame = frame_from_fixture(points)
+        for pose_type in pose_types:
+            cases.append(result_record(index, pose_type, analyze_pose_accuracy(frame, pose_type)))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the pose rule engine against recorded results")
+    parser.add_argument('--fixture', default=DEFAULT_FIXTURE)
+    parser.add_argument('--rules', help="Rules file to load instead of ML_POSE_RULES / pose_rules.json")
+    parser.add_argument('--record', action='store_true', help="Overwrite the expected results with the current output")
+    parser.add_argument('--generate', type=int, metavar='EXTRA', default=None,
+                        help="Build a new fixture from covering frames plus EXTRA random ones")
+    args = parser.parse_args()
+
+    if args.rules:
+        os.environ['ML_POSE_RULES'] = args.rules
+    from pose_analysis import POSE_RULES
+
+    pose_types = list(POSE_RULES) + ['unknown']
+
+    if args.generate is not None:
+        frames = generate_fixture(POSE_RULES, args.generate)
+        fixture = {"frames": frames, "cases": evaluate(frames, pose_types)}
+    else:
+        with open(args.fixture, encoding='utf-8') as f:
+            fixture = json.load(f)
+        if fixture.get("coordinate_scale", COORDINATE_SCALE) != COORDINATE_SCALE:
+            sys.exit(f"❌ Fixture uses coordinate_scale {fixture['coordinate_scale']}, expected {COORDINATE_SCALE}")
+        frames = fixture["frames"]
+
+    if args.record or args.generate is not None:
+        if args.record:
+            fixture["cases"] = evaluate(frames, pose_types)
+        write_fixture(args.fixture, fixture)
+        print(f"💾 Recorded {len(fixture['cases'])} cases over {len(frames)} frames to {args.fixture}")
+        return
+
+    from pose_analysis import analyze_pose_accuracy
+    failures = 0
+    for case in fixture["cases"]:
+        frame = frame_from_fixture(frames[case["frame"]])
+        actual = result_record(case["frame"], case["pose_type"], analyze_pose_accuracy(frame, case["pose_type"]))
+        if actual != case or type(actual["score"]) is not type(case["score"]):
+            failures += 1
+            if failures <= 10:
+                print(f"❌ frame {case['frame']} {case['pose_type']}:\n   expected {case}\n   actual   {actual}")
+
+    # Auto mode must report every pose's recorded score and the best pose's full result
+    expected = {}
+    for case in fixture["cases"]:
+        if case["pose_type"] in POSE_RULES:
+            expected.setdefault(case["frame"], {})[case["pose_type"]] = case
+    from pose_analysis import recognize_pose
+    for index, cases in sorted(expected.items()):
+        pose_type, result, pose_scores = recognize_pose(frame_from_fixture(frames[index]))
+        scores = {p: case["score"] for p, case in cases.items()}
+        best = max(scores, key=lambda p: (scores[p], -list(POSE_RULES).index(p)))
+        actual = result_record(index, pose_type, result)
+        if pose_scores != scores or pose_type != best or actual != cases[best]:
+            failures += 1
+            if failures <= 10:
+                print(f"❌ frame {index} auto: picked {pose_type} {pose_scores}, expected {best} {scores}")
+
+    covered = set()
+    for points in frames:
+        covered |= coverage_keys(POSE_RULES, frame_from_fixture(points))
+    wanted = all_coverage_keys(POSE_RULES)
+    print(f"📊 Bucket coverage: {len(covered & wanted)}/{len(wanted)}")
+    for key in sorted(wanted - covered, key=str):
+        print(f"   not exercised: {key}")
+
+    if failures:
+        print(f"❌ {failures} checks differ from the fixture")
+        sys.exit(1)
+    print(f"✅ All {len(fixture['cases'])} cases and {len(expected)} auto recognitions match")
+
+
+if __name__ == '__main__':
+    main()
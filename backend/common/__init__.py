@@ -0,0 +1 @@
+"""Helpers shared by the Python services (backend/Ml and backend/Diet_Recommendation_System)"""
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Request Timing
+Request-scoped stage timer behind the `Server-Timing` response header. A
+client opts in per request with `X-Server-Timing: 1` or `?timing=1`; the
+stages timed while that request runs are summed by name and returned as
+`Server-Timing: decode;dur=3.1, detect;dur=41.7, total;dur=52.0` (ms).
+Requests that do not ask pay one context-variable lookup per stage.
+StageTimer also records every stage into a Prometheus histogram, so both
+services time their stages with the same label and buckets. Both the ML and
+the diet service import this module from backend/common.
+"""
+
+import contextlib
+import contextvars
+import time
+
+# prometheus_client is optional - without it stages only feed Server-Timing
+try:
+    from prometheus_client import Histogram
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+TIMING_HEADER = 'X-Server-Timing'
+TIMING_ARG = 'timing'
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+# Seconds; stages range from sub-millisecond parsing to model fits of a few seconds
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_current = contextvars.ContextVar('request_timer', default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        """Stage durations of one request (or one WebSocket frame)"""
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def as_dict(self):
+        """Stage durations in ms plus the total so far"""
+        timings = {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+        timings['total'] = round((time.perf_counter() - self.started) * 1000, 2)
+        return timings
+
+    def header(self):
+        """Server-Timing header value"""
+        return ', '.join(f"{name};dur={ms}" for name, ms in self.as_dict().items())
+
+
+class StageTimer:
+    def __init__(self, metric_name, documentation):
+        """
+        Stage histogram of one service, labelled by `stage`
+        Args:
+            metric_name: Prometheus metric name, e.g. ml_stage_seconds
+            documentation: Prometheus help text
+        """
+        self.histogram = None
+        if PROMETHEUS_AVAILABLE:
+            self.histogram = Histogram(metric_name, documentation, ['stage'], buckets=STAGE_BUCKETS)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a `with` block (or a decorated function) into the `name` stage and the request's timing"""
+        if self.histogram is None and not timing_active():
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        """Record an already measured stage duration"""
+        if self.histogram is not None:
+            self.histogram.labels(name).observe(seconds)
+        record_timing(name, seconds)
+
+
+def timing_active():
+    """True when the current request asked for its timing breakdown"""
+    return _current.get() is not None
+
+
+def record_timing(name, seconds):
+    """Add a measured stage duration to the current request's timer, if any"""
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+@contextlib.contextmanager
+def request_timer(enabled=True):
+    """Scope a RequestTimer to a `with` block; yields the timer, or None when not enabled"""
+    if not enabled:
+        yield None
+        return
+    timer = RequestTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+def timing_requested(value):
+    """Whether a header / query / message flag value asks for timings"""
+    return value is True or str(value).lower() in TRUE_VALUES
+
+
+def init_server_timing(app):
+    """
+    Add a Server-Timing header to responses of requests that ask for it
+    Args:
+        app: Flask app
+    """
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timer():
+        if request.headers.get('Upgrade', '').lower() == 'websocket':
+            return  # Streams time each frame themselves
+        if timing_requested(request.headers.get(TIMING_HEADER) or request.args.get(TIMING_ARG)):
+            g.request_timer = RequestTimer()
+            g.request_timer_token = _current.set(g.request_timer)
+
+    @app.after_request
+    def add_server_timing(response):
+        timer = g.get('request_timer')
+        if timer is not None:
+            response.headers['Server-Timing'] = timer.header()
+            # Cross-origin callers: fetch() may read the header, Resource Timing may expose it
+            response.headers.add('Access-Control-Expose-Headers', 'Server-Timing')
+            response.headers['Timing-Allow-Origin'] = '*'
+        return response
+
+    @app.teardown_request
+    def stop_request_timer(exc):
+        token = g.pop('request_timer_token', None)
+        if token is not None:
+            _current.reset(token)
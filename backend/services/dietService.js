@@ -49,16 +49,20 @@ class DietService {
                 pythonData.goal = 'weight_gain';
             }
             
+            const requestStart = Date.now();
             const response = await axios.post(
                 `${this.dietApiUrl}/recommend`,
                 pythonData,
                 { 
                     timeout: 15000,
                     headers: {
-                        'Content-Type': 'application/json'
+                        'Content-Type': 'application/json',
+                        // Ask the Diet API for its per-stage Server-Timing breakdown
+                        'X-Server-Timing': '1'
                     }
                 }
             );
+            console.log(`⏱️ Diet API responded in ${Date.now() - requestStart}ms (server: ${response.headers['server-timing'] || 'n/a'})`);
 
             return {
                 success: true,